@@ -0,0 +1,57 @@
+"""Spawn-to-first-byte latency of the CLI and Docker API runtime backends.
+
+Starts a container that echoes its stdin, writes one line, and measures the
+time from the spawn call until the first byte comes back.
+
+    python -m benchmarks.container_spawn --image busybox --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from clawcode.config import DOCKER_SOCKET
+from clawcode.container_runtime import ContainerSpec, _ping_socket, spawn_container
+
+
+async def _measure(backend: str, image: str, index: int) -> float:
+    spec = ContainerSpec(
+        name=f"clawcode-bench-{backend}-{int(time.time() * 1000)}-{index}",
+        image=image,
+        command=["cat"],
+    )
+    start = time.perf_counter()
+    process = await spawn_container(spec, backend=backend)
+    process.stdin.write(b"ping\n")
+    process.stdin.close()
+    await process.stdout.read(1)
+    elapsed = time.perf_counter() - start
+    await process.stdout.read()
+    await process.wait()
+    return elapsed
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", default="busybox")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    backends = ["cli"] + (["api"] if _ping_socket(DOCKER_SOCKET) else [])
+    for backend in backends:
+        await _measure(backend, args.image, -1)  # Warm image cache and connection pool
+        samples = sorted([await _measure(backend, args.image, i) for i in range(args.runs)])
+        print(
+            f"{backend:>4}: p50={statistics.median(samples) * 1000:.0f}ms "
+            f"p95={samples[int(len(samples) * 0.95) - 1] * 1000:.0f}ms "
+            f"min={samples[0] * 1000:.0f}ms runs={len(samples)}"
+        )
+    if "api" not in backends:
+        print(f" api: skipped, {DOCKER_SOCKET or 'DOCKER_HOST'} not reachable")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,76 @@
+"""Webhook bookkeeping throughput of the database layer.
+
+Each event does what ``_handle_webhook_event`` does to SQLite: check and mark
+the delivery id, store the message, upsert the repo and thread chats, and
+advance the router cursor. Compares one rollback-journal connection committing
+every write on the event loop (the previous setup) with WAL plus the writer
+thread's group commits. ``--concurrency`` events are in flight at once.
+
+    python -m benchmarks.db_writes --events 2000 --concurrency 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from clawcode import db
+from clawcode.models import NewMessage
+
+
+async def _event(i: int) -> None:
+    delivery_id = f"delivery-{i}"
+    if not await db.committed(db.mark_event_processed(delivery_id)):
+        return
+    await asyncio.sleep(0)  # Token / API calls happen here
+    timestamp = f"2024-01-01T00:00:{i % 60:02d}.{i:06d}Z"
+    thread_jid = f"gh:octo/repo{i % 20}#issue:{i % 500}"
+    db.store_message(NewMessage(
+        id=delivery_id, chat_jid=thread_jid, sender="octocat", sender_name="octocat",
+        content="@clawcode please take a look " * 8, timestamp=timestamp,
+    ))
+    db.store_chat_metadata(f"gh:octo/repo{i % 20}", timestamp, f"octo/repo{i % 20}", "github", True)
+    db.store_chat_metadata(thread_jid, timestamp, None, "github", True)
+    db.set_router_state("last_timestamp", timestamp)
+
+
+async def _run(events: int, concurrency: int) -> float:
+    start = time.perf_counter()
+    for base in range(0, events, concurrency):
+        await asyncio.gather(*(_event(i) for i in range(base, min(base + concurrency, events))))
+    await db.flush_writes()
+    return time.perf_counter() - start
+
+
+def _open_per_write_commit(path: Path) -> None:
+    db._db = sqlite3.connect(str(path))
+    db._db.row_factory = sqlite3.Row
+    db._create_schema(db._db)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16, help="Webhook events handled at once")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, open_db in (
+            ("per-write commit", _open_per_write_commit),
+            ("wal + writer", db.init_database),
+        ):
+            path = Path(tmp) / f"{name.split()[0]}.db"
+            open_db(path)
+            elapsed = asyncio.run(_run(args.events, args.concurrency))
+            stats = db.db_writer_stats()
+            db.close_database()
+            extra = f"  writes/commit={stats['writes_per_commit']}" if stats else ""
+            print(f"{name:>16}: {elapsed * 1000:8.1f}ms  {args.events / elapsed:8.0f} events/s{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Throughput of stdout frame parsing on multi-MB agent outputs.
+
+Compares the incremental byte-level parser with the previous approach
+(decode each chunk, append to a string, search it from the start).
+
+    python -m benchmarks.output_parser --size-mb 8 --chunk 8192
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from clawcode.output_parser import OUTPUT_END_MARKER, OUTPUT_START_MARKER, OutputFrameParser
+
+
+def _stdout(size: int, frames: int) -> bytes:
+    result = "log line with some unicode → ✓\n" * (size // frames // 34 + 1)
+    frame = f"{OUTPUT_START_MARKER}\n{json.dumps({'status': 'success', 'result': result})}\n{OUTPUT_END_MARKER}\n"
+    return frame.encode() * frames
+
+
+def _string_scan(data: bytes, chunk: int) -> int:
+    parse_buffer = ""
+    count = 0
+    for i in range(0, len(data), chunk):
+        parse_buffer += data[i:i + chunk].decode(errors="replace")
+        while OUTPUT_START_MARKER in parse_buffer:
+            start_idx = parse_buffer.index(OUTPUT_START_MARKER)
+            end_idx = parse_buffer.find(OUTPUT_END_MARKER, start_idx)
+            if end_idx == -1:
+                break
+            json.loads(parse_buffer[start_idx + len(OUTPUT_START_MARKER):end_idx].strip())
+            parse_buffer = parse_buffer[end_idx + len(OUTPUT_END_MARKER):]
+            count += 1
+    return count
+
+
+def _incremental(data: bytes, chunk: int) -> int:
+    parser = OutputFrameParser()
+    count = 0
+    for i in range(0, len(data), chunk):
+        for frame in parser.feed(data[i:i + chunk]):
+            json.loads(frame)
+            count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--frames", type=int, default=1, help="Split the output across this many results")
+    parser.add_argument("--chunk", type=int, default=8192, help="Pipe read size")
+    args = parser.parse_args()
+
+    data = _stdout(int(args.size_mb * 1024 * 1024), args.frames)
+    for name, fn in (("string-scan", _string_scan), ("incremental", _incremental)):
+        start = time.perf_counter()
+        count = fn(data, args.chunk)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {elapsed * 1000:8.1f}ms  {len(data) / elapsed / 1e6:8.1f} MB/s  frames={count}")
+
+
+if __name__ == "__main__":
+    main()
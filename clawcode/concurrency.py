@@ -0,0 +1,159 @@
+"""Adaptive Concurrency.
+
+Adjusts how many agent containers may run at once from host signals, instead
+of a fixed MAX_CONCURRENT_CONTAINERS. Every CONCURRENCY_ADJUST_INTERVAL the
+controller reads:
+
+    memory     MemAvailable from /proc/meminfo
+    pressure   PSI some avg10 for cpu / memory / io (/proc/pressure), else load average per CPU
+    oom        the kernel's oom_kill counter (/proc/vmstat) since the last check
+    docker     round-trip latency of a daemon ping
+
+and applies AIMD between CONCURRENCY_MIN and CONCURRENCY_MAX: any sign of
+overload halves the limit; otherwise, if work is waiting for a slot and there
+is memory for one more container, the limit grows by one. Every change is
+logged with its reason.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from clawcode.config import (
+    CONCURRENCY_ADJUST_INTERVAL,
+    CONCURRENCY_DOCKER_LATENCY_MAX,
+    CONCURRENCY_LOAD_MAX,
+    CONCURRENCY_MAX,
+    CONCURRENCY_MEMORY_PER_CONTAINER,
+    CONCURRENCY_MIN,
+    CONCURRENCY_PSI_MAX,
+    MAX_CONCURRENT_CONTAINERS,
+)
+from clawcode.container_resources import parse_size
+from clawcode.logger import logger
+
+PROC = Path("/proc")
+
+
+@dataclass
+class HostSignals:
+    mem_available_bytes: int | None = None
+    psi: dict[str, float] | None = None  # resource -> "some" avg10 (% of time stalled)
+    load_per_cpu: float | None = None
+    oom_kills: int | None = None  # Cumulative kernel counter
+    docker_latency_ms: float | None = None
+
+
+def read_host_signals(proc: Path = PROC) -> HostSignals:
+    signals = HostSignals()
+    try:
+        for line in (proc / "meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                signals.mem_available_bytes = int(line.split()[1]) * 1024
+                break
+    except (OSError, ValueError, IndexError):
+        pass
+
+    psi: dict[str, float] = {}
+    for resource in ("cpu", "memory", "io"):
+        try:
+            some = (proc / "pressure" / resource).read_text().splitlines()[0]
+            fields = dict(part.split("=") for part in some.split()[1:])
+            psi[resource] = float(fields["avg10"])
+        except (OSError, ValueError, IndexError, KeyError):
+            continue
+    signals.psi = psi or None
+
+    try:
+        signals.load_per_cpu = os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        pass
+
+    try:
+        for line in (proc / "vmstat").read_text().splitlines():
+            if line.startswith("oom_kill "):
+                signals.oom_kills = int(line.split()[1])
+                break
+    except (OSError, ValueError, IndexError):
+        pass
+    return signals
+
+
+class ConcurrencyController:
+    def __init__(
+        self,
+        floor: int = CONCURRENCY_MIN,
+        ceiling: int = CONCURRENCY_MAX,
+        initial: int = MAX_CONCURRENT_CONTAINERS,
+        memory_per_container: int = parse_size(CONCURRENCY_MEMORY_PER_CONTAINER),
+        read_signals: Callable[[], HostSignals] = read_host_signals,
+        docker_latency: Callable[[], Awaitable[float | None]] | None = None,
+    ) -> None:
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = min(self.ceiling, max(self.floor, initial))
+        self.memory_per_container = memory_per_container
+        self._read_signals = read_signals
+        self._docker_latency = docker_latency
+        self._last_oom_kills: int | None = None
+        self._on_change: Callable[[int], None] | None = None
+
+    def on_change(self, fn: Callable[[int], None]) -> None:
+        self._on_change = fn
+
+    def __call__(self) -> int:
+        return self.limit
+
+    def _overload_reason(self, signals: HostSignals) -> str | None:
+        if signals.oom_kills is not None:
+            previous, self._last_oom_kills = self._last_oom_kills, signals.oom_kills
+            if previous is not None and signals.oom_kills > previous:
+                return f"{signals.oom_kills - previous} OOM kill(s)"
+        if signals.mem_available_bytes is not None and signals.mem_available_bytes < self.memory_per_container // 4:
+            return f"memory available {signals.mem_available_bytes // 2**20} MiB"
+        if signals.psi:
+            stalled = {r: v for r, v in signals.psi.items() if v > CONCURRENCY_PSI_MAX}
+            if stalled:
+                return "pressure " + ", ".join(f"{r} {v:.0f}%" for r, v in stalled.items())
+        elif signals.load_per_cpu is not None and signals.load_per_cpu > CONCURRENCY_LOAD_MAX:
+            return f"load {signals.load_per_cpu:.2f} per CPU"
+        if signals.docker_latency_ms is not None and signals.docker_latency_ms > CONCURRENCY_DOCKER_LATENCY_MAX:
+            return f"docker latency {signals.docker_latency_ms:.0f} ms"
+        return None
+
+    def adjust(self, signals: HostSignals, active: int, waiting: int) -> int:
+        """One AIMD step. Returns the new limit."""
+        previous = self.limit
+        reason = self._overload_reason(signals)
+        if reason:
+            self.limit = max(self.floor, self.limit // 2)
+        elif waiting and active >= self.limit and self.limit < self.ceiling:
+            if signals.mem_available_bytes is not None and signals.mem_available_bytes < self.memory_per_container:
+                reason = f"demand, but memory available {signals.mem_available_bytes // 2**20} MiB"
+            else:
+                self.limit += 1
+                reason = f"{waiting} waiting, host has headroom"
+
+        if self.limit != previous:
+            logger.info("Concurrency limit changed", limit=self.limit, previous=previous, reason=reason, active=active, waiting=waiting)
+            if self._on_change:
+                self._on_change(self.limit)
+        elif reason:
+            logger.info("Concurrency limit held", limit=self.limit, reason=reason, active=active, waiting=waiting)
+        return self.limit
+
+    async def run(self, load: Callable[[], tuple[int, int]]) -> None:
+        """Adjust forever. ``load`` returns (active containers, groups waiting for a slot)."""
+        while True:
+            await asyncio.sleep(CONCURRENCY_ADJUST_INTERVAL / 1000)
+            try:
+                signals = await asyncio.to_thread(self._read_signals)
+                if self._docker_latency:
+                    signals.docker_latency_ms = await self._docker_latency()
+                self.adjust(signals, *load())
+            except Exception as err:
+                logger.warning("Concurrency adjustment failed", error=str(err))
@@ -11,6 +11,8 @@ _env_config = read_env_file(["ASSISTANT_NAME"])
 ASSISTANT_NAME: str = os.environ.get("ASSISTANT_NAME") or _env_config.get("ASSISTANT_NAME", "ClawCode")
 SCHEDULER_POLL_INTERVAL: int = 60_000  # ms
 RECONCILIATION_INTERVAL: int = 60_000  # ms
+RECOVERY_RAMP_BATCH: int = max(1, int(os.environ.get("RECOVERY_RAMP_BATCH", "2")))  # Threads re-queued per step after a restart
+RECOVERY_RAMP_INTERVAL: int = int(os.environ.get("RECOVERY_RAMP_INTERVAL", "1000"))  # ms between steps
 
 # Absolute paths needed for container mounts
 PROJECT_ROOT: Path = Path.cwd()
@@ -26,10 +28,79 @@ MAIN_GROUP_FOLDER: str = "main"
 CONTAINER_IMAGE: str = os.environ.get("CONTAINER_IMAGE", "clawcode-agent:latest")
 CONTAINER_TIMEOUT: int = int(os.environ.get("CONTAINER_TIMEOUT", "1800000"))
 CONTAINER_MAX_OUTPUT_SIZE: int = int(os.environ.get("CONTAINER_MAX_OUTPUT_SIZE", "10485760"))
+CONTAINER_OUTPUT_QUEUE_SIZE: int = max(1, int(os.environ.get("CONTAINER_OUTPUT_QUEUE_SIZE", "64")))  # Parsed outputs awaiting delivery per run
 IPC_POLL_INTERVAL: int = 1000  # ms
+IPC_WATCHER: str = os.environ.get("IPC_WATCHER", "auto")  # "auto" (inotify when available) | "poll"
+IPC_SOCKET: bool = os.environ.get("IPC_SOCKET", "true").lower() in ("1", "true", "yes")  # Offer containers the socket transport
+IPC_RESCAN_INTERVAL: int = int(os.environ.get("IPC_RESCAN_INTERVAL", "60000"))  # ms, full rescan behind inotify
+IPC_MAX_CONCURRENT: int = int(os.environ.get("IPC_MAX_CONCURRENT", "8"))  # Groups whose IPC files are handled at once
+IPC_LAG_WARN: int = int(os.environ.get("IPC_LAG_WARN", "10000"))  # ms, log groups whose IPC waited longer
 IDLE_TIMEOUT: int = int(os.environ.get("IDLE_TIMEOUT", "1800000"))
 MAX_CONCURRENT_CONTAINERS: int = max(1, int(os.environ.get("MAX_CONCURRENT_CONTAINERS", "5")))
 
+# Adaptive concurrency: the slot limit starts at MAX_CONCURRENT_CONTAINERS and moves (AIMD) within these bounds.
+# By default it only backs off below MAX_CONCURRENT_CONTAINERS; set CONCURRENCY_MAX higher to let it grow past it.
+CONCURRENCY_ADAPTIVE: bool = os.environ.get("CONCURRENCY_ADAPTIVE", "true").lower() in ("1", "true", "yes")
+CONCURRENCY_MIN: int = max(1, int(os.environ.get("CONCURRENCY_MIN", "1")))
+CONCURRENCY_MAX: int = max(1, int(os.environ.get("CONCURRENCY_MAX", str(MAX_CONCURRENT_CONTAINERS))))
+CONCURRENCY_ADJUST_INTERVAL: int = int(os.environ.get("CONCURRENCY_ADJUST_INTERVAL", "15000"))  # ms
+CONCURRENCY_MEMORY_PER_CONTAINER: str = os.environ.get("CONCURRENCY_MEMORY_PER_CONTAINER", "2g")  # Headroom needed to add a slot
+CONCURRENCY_PSI_MAX: float = float(os.environ.get("CONCURRENCY_PSI_MAX", "25"))  # % stalled (some avg10) before backing off
+CONCURRENCY_LOAD_MAX: float = float(os.environ.get("CONCURRENCY_LOAD_MAX", "2.0"))  # 1-min load per CPU, when PSI is unavailable
+CONCURRENCY_DOCKER_LATENCY_MAX: int = int(os.environ.get("CONCURRENCY_DOCKER_LATENCY_MAX", "2000"))  # ms per daemon ping
+
+# Default agent resource profile; containerConfig cpus/memory/tmpfs/blkio_weight override it per group
+CONTAINER_CPUS: float = float(os.environ.get("CONTAINER_CPUS", "0"))  # Cores; 0 = unlimited
+CONTAINER_MEMORY: str = os.environ.get("CONTAINER_MEMORY", "")  # e.g. "4g"; empty = unlimited
+CONTAINER_TMPFS: str = os.environ.get("CONTAINER_TMPFS", "")  # Comma-separated scratch mounts, path[:size], e.g. "/tmp:2g"
+CONTAINER_BLKIO_WEIGHT: int = int(os.environ.get("CONTAINER_BLKIO_WEIGHT", "0"))  # 10-1000; 0 = runtime default
+CONTAINER_STATS_INTERVAL: int = int(os.environ.get("CONTAINER_STATS_INTERVAL", "5000"))  # ms between usage samples; 0 disables
+
+# Per-run container stderr logs under groups/<folder>/logs (gzip, rotated)
+CONTAINER_LOG_FLUSH_BYTES: int = int(os.environ.get("CONTAINER_LOG_FLUSH_BYTES", "65536"))
+CONTAINER_LOG_ROTATE_BYTES: int = int(os.environ.get("CONTAINER_LOG_ROTATE_BYTES", str(16 * 1024**2)))  # Uncompressed, per file
+CONTAINER_LOG_MAX_PARTS: int = max(1, int(os.environ.get("CONTAINER_LOG_MAX_PARTS", "4")))  # Newest files kept per run
+CONTAINER_LOG_RETENTION: int = int(os.environ.get("CONTAINER_LOG_RETENTION", "604800000"))  # ms
+CONTAINER_LOG_MAX_GROUP_BYTES: int = int(os.environ.get("CONTAINER_LOG_MAX_GROUP_BYTES", str(256 * 1024**2)))
+
+# How the host drives Docker: Engine API over the unix socket, or the docker CLI
+CONTAINER_RUNTIME_BACKEND: str = os.environ.get("CONTAINER_RUNTIME_BACKEND", "auto")  # auto|api|cli
+_docker_host = os.environ.get("DOCKER_HOST", "unix:///var/run/docker.sock")
+DOCKER_SOCKET: str = _docker_host.removeprefix("unix://") if _docker_host.startswith("unix://") else ""
+
+# Process sandbox runtime (bubblewrap), selected per group with containerConfig.runtime = "sandbox"
+SANDBOX_PYTHON: str = os.environ.get("SANDBOX_PYTHON", "python3")  # Needs the agent runner's requirements
+SANDBOX_RUNNER_DIR: Path = Path(os.environ.get("SANDBOX_RUNNER_DIR", str(PROJECT_ROOT / "container" / "agent_runner")))
+SANDBOX_CGROUP_PARENT: str = os.environ.get("SANDBOX_CGROUP_PARENT", "")  # Delegated cgroup v2 dir; empty = no limits
+SANDBOX_MEMORY_MAX: str = os.environ.get("SANDBOX_MEMORY_MAX", "4G")
+SANDBOX_CPU_MAX: str = os.environ.get("SANDBOX_CPU_MAX", "max")  # cgroup cpu.max, e.g. "200000 100000" for 2 CPUs
+SANDBOX_SECCOMP_FILTER: str = os.environ.get("SANDBOX_SECCOMP_FILTER", "")  # Compiled BPF program for bwrap --seccomp
+
+# Background fetching of repo checkouts (fed by push/pull_request webhooks)
+REPO_PREFETCH_CONCURRENCY: int = max(1, int(os.environ.get("REPO_PREFETCH_CONCURRENCY", "2")))
+REPO_PREFETCH_ACTIVE_WINDOW: int = int(os.environ.get("REPO_PREFETCH_ACTIVE_WINDOW", "86400000"))  # ms
+REPO_PREFETCH_SWEEP_INTERVAL: int = int(os.environ.get("REPO_PREFETCH_SWEEP_INTERVAL", "900000"))  # ms
+REPO_FETCH_FRESHNESS: int = int(os.environ.get("REPO_FETCH_FRESHNESS", "300000"))  # ms
+
+# Disk quota for repo checkouts under data/repos (least recently used are evicted)
+REPO_CACHE_MAX_BYTES: int = int(os.environ.get("REPO_CACHE_MAX_BYTES", str(20 * 1024**3)))
+
+# Scheduled `git maintenance` of repo checkouts
+REPO_MAINTENANCE_INTERVAL: int = int(os.environ.get("REPO_MAINTENANCE_INTERVAL", "86400000"))  # ms, per checkout
+REPO_MAINTENANCE_MAX_PER_PASS: int = max(1, int(os.environ.get("REPO_MAINTENANCE_MAX_PER_PASS", "2")))
+
+# Per-run copy-on-write snapshots of the repo checkout mounted at /workspace/repo
+WORKSPACE_SNAPSHOT_MODE: str = os.environ.get("WORKSPACE_SNAPSHOT_MODE", "auto")  # auto|btrfs|reflink|hardlink|overlay|off
+WORKSPACE_SNAPSHOT_HARVEST: str = os.environ.get("WORKSPACE_SNAPSHOT_HARVEST", "never")  # never|error|always
+WORKSPACE_HARVEST_RETENTION: int = int(os.environ.get("WORKSPACE_HARVEST_RETENTION", "604800000"))  # ms
+
+# Warm agent container pool (opt-in; 0 disables). Size per mount layout follows recent arrival rate.
+# Warm containers are not counted against MAX_CONCURRENT_CONTAINERS.
+CONTAINER_POOL_MAX: int = max(0, int(os.environ.get("CONTAINER_POOL_MAX", "0")))
+CONTAINER_POOL_MAX_PER_LAYOUT: int = max(1, int(os.environ.get("CONTAINER_POOL_MAX_PER_LAYOUT", "2")))
+CONTAINER_POOL_WINDOW: int = int(os.environ.get("CONTAINER_POOL_WINDOW", "600000"))  # ms, arrival window and max warm age
+CONTAINER_POOL_HORIZON: int = int(os.environ.get("CONTAINER_POOL_HORIZON", "60000"))  # ms of expected arrivals to keep warm
+
 # HTTP server port for webhooks
 PORT: int = int(os.environ.get("PORT", "3000"))
 
@@ -0,0 +1,159 @@
+"""Container Logs.
+
+Per-run container stderr, written to ``groups/<folder>/logs`` as gzip files
+instead of one structlog call per line. Chunks are appended to an in-memory
+buffer; a background task compresses and writes it from a worker thread
+once CONTAINER_LOG_FLUSH_BYTES have accumulated, so the event loop never
+touches the disk or the compressor. Files rotate every
+CONTAINER_LOG_ROTATE_BYTES (uncompressed) and only the newest
+CONTAINER_LOG_MAX_PARTS parts of a run are kept. The last few KiB stay in
+memory so the runner can forward a tail to the main log.
+
+Retention (cleanup_container_logs) runs from the reconciliation loop: logs
+older than CONTAINER_LOG_RETENTION are deleted, then the oldest beyond
+CONTAINER_LOG_MAX_GROUP_BYTES per group.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import os
+import time
+from pathlib import Path
+
+from clawcode.config import (
+    CONTAINER_LOG_FLUSH_BYTES,
+    CONTAINER_LOG_MAX_GROUP_BYTES,
+    CONTAINER_LOG_MAX_PARTS,
+    CONTAINER_LOG_RETENTION,
+    CONTAINER_LOG_ROTATE_BYTES,
+    GROUPS_DIR,
+)
+from clawcode.logger import logger
+
+LOG_SUFFIX = ".log.gz"
+TAIL_BYTES = 16 * 1024
+
+
+class ContainerLogWriter:
+    def __init__(
+        self,
+        logs_dir: Path,
+        run_name: str,
+        rotate_bytes: int = CONTAINER_LOG_ROTATE_BYTES,
+        max_parts: int = CONTAINER_LOG_MAX_PARTS,
+        flush_bytes: int = CONTAINER_LOG_FLUSH_BYTES,
+    ) -> None:
+        self.logs_dir = logs_dir
+        self.run_name = run_name
+        self.rotate_bytes = rotate_bytes
+        self.max_parts = max_parts
+        self.flush_bytes = flush_bytes
+        self.bytes_written = 0
+        self._buf = bytearray()
+        self._tail = bytearray()
+        self._flushing: asyncio.Task | None = None
+        # Only touched from the worker thread
+        self._file: gzip.GzipFile | None = None
+        self._part = 0
+        self._part_bytes = 0
+
+    def part_path(self, part: int) -> Path:
+        return self.logs_dir / f"{self.run_name}.{part}{LOG_SUFFIX}"
+
+    @property
+    def path(self) -> Path:
+        """The file currently being written."""
+        return self.part_path(self._part)
+
+    def write(self, chunk: bytes) -> None:
+        self._buf += chunk
+        self._tail += chunk
+        if len(self._tail) > 2 * TAIL_BYTES:
+            del self._tail[:-TAIL_BYTES]
+        if len(self._buf) >= self.flush_bytes and (self._flushing is None or self._flushing.done()):
+            self._flushing = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        while self._buf:
+            data = bytes(self._buf)
+            self._buf.clear()
+            try:
+                await asyncio.to_thread(self._write_sync, data)
+            except OSError as err:
+                logger.warning("Failed to write container log", run=self.run_name, error=str(err))
+                return
+
+    async def flush(self) -> None:
+        """Write out whatever is buffered."""
+        if self._flushing:
+            await self._flushing
+        await self._flush()
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._file:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    def tail(self, max_lines: int = 20) -> list[str]:
+        lines = bytes(self._tail[-TAIL_BYTES:]).decode(errors="replace").splitlines()
+        return [line for line in lines if line.strip()][-max_lines:]
+
+    def tail_text(self) -> str:
+        return bytes(self._tail[-TAIL_BYTES:]).decode(errors="replace")
+
+    def _write_sync(self, data: bytes) -> None:
+        if self._file is not None and self._part_bytes >= self.rotate_bytes:
+            self._file.close()
+            self._file = None
+            self._part += 1
+            self._part_bytes = 0
+            try:
+                self.part_path(self._part - self.max_parts).unlink()
+            except OSError:
+                pass
+        if self._file is None:
+            self.logs_dir.mkdir(parents=True, exist_ok=True)
+            # Low compression level: cheap on CPU, still ~5-10x on log text
+            self._file = gzip.GzipFile(self.part_path(self._part), "wb", compresslevel=3)
+        self._file.write(data)
+        self._part_bytes += len(data)
+        self.bytes_written += len(data)
+
+
+def cleanup_container_logs(
+    groups_dir: Path = GROUPS_DIR,
+    max_age_ms: int = CONTAINER_LOG_RETENTION,
+    max_group_bytes: int = CONTAINER_LOG_MAX_GROUP_BYTES,
+) -> int:
+    """Apply log retention across all groups. Returns the number of files removed."""
+    if not groups_dir.is_dir():
+        return 0
+    cutoff = time.time() - max_age_ms / 1000
+    removed = 0
+    for group_dir in groups_dir.iterdir():
+        logs_dir = group_dir / "logs"
+        if not logs_dir.is_dir():
+            continue
+        files: list[tuple[float, int, Path]] = []
+        for entry in os.scandir(logs_dir):
+            if not entry.name.endswith(LOG_SUFFIX) or not entry.is_file():
+                continue
+            st = entry.stat()
+            files.append((st.st_mtime, st.st_size, Path(entry.path)))
+        files.sort()  # Oldest first
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= max_group_bytes:
+                break
+            try:
+                path.unlink()
+                removed += 1
+                total -= size
+            except OSError:
+                pass
+    if removed:
+        logger.info("Container logs cleaned up", removed=removed)
+    return removed
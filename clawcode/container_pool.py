@@ -0,0 +1,244 @@
+"""Container Pool.
+
+Keeps pre-started agent containers blocked on stdin, waiting for their
+ContainerInput, so a run skips `docker run`, interpreter start and SDK import.
+
+Containers are pooled per mount layout (which pins the group). When a run's
+repo mount is a per-run snapshot, warm containers bind an empty slot
+directory at /workspace/repo instead, and the snapshot's entries are moved
+into the slot when the container is claimed (late-bound workspace).
+
+Pool size per layout adapts to recent arrival rate: layouts that haven't
+seen a run within CONTAINER_POOL_WINDOW keep no warm containers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import shutil
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Coroutine
+
+from clawcode.config import (
+    CONTAINER_POOL_HORIZON,
+    CONTAINER_POOL_MAX,
+    CONTAINER_POOL_MAX_PER_LAYOUT,
+    CONTAINER_POOL_WINDOW,
+)
+from clawcode.logger import logger
+from clawcode.workspace_snapshot import POOL_SLOT_PREFIX, WORKSPACES_DIR
+
+REPO_SLOT_MARKER = "<repo-slot>"
+
+SpawnFn = Callable[[list[dict], str], Coroutine[None, None, asyncio.subprocess.Process]]
+StopFn = Callable[[str, asyncio.subprocess.Process], Coroutine[None, None, None]]
+
+
+@dataclass
+class WarmContainer:
+    key: tuple
+    process: asyncio.subprocess.Process
+    container_name: str
+    started_at: float
+    repo_slot: str | None = None  # Host dir bound at /workspace/repo, filled on claim
+
+
+@dataclass
+class _LayoutState:
+    mounts: list[dict]  # Template from the most recent run
+    arrivals: deque[float] = field(default_factory=deque)
+    warm: list[WarmContainer] = field(default_factory=list)
+    spawning: int = 0
+
+
+def pool_key(mounts: list[dict], repo_is_snapshot: bool) -> tuple:
+    """Layout key: every mount, with a per-run snapshot repo mount replaced by a slot."""
+    return tuple(
+        (REPO_SLOT_MARKER if repo_is_snapshot and m["container_path"] == "/workspace/repo" else m["host_path"],
+         m["container_path"],
+         m["readonly"])
+        for m in mounts
+    )
+
+
+def move_contents(src: str, dest: str) -> None:
+    """Move every entry of ``src`` into ``dest`` by rename (same filesystem, O(entries))."""
+    for entry in os.scandir(src):
+        os.rename(entry.path, os.path.join(dest, entry.name))
+
+
+def pool_slots() -> dict[str, Path]:
+    """Warm container slot dirs on disk, by container name."""
+    try:
+        return {
+            p.name.removeprefix(POOL_SLOT_PREFIX): p
+            for p in WORKSPACES_DIR.iterdir()
+            if p.name.startswith(POOL_SLOT_PREFIX)
+        }
+    except FileNotFoundError:
+        return {}
+
+
+class ContainerPool:
+    def __init__(
+        self,
+        spawn: SpawnFn,
+        stop: StopFn,
+        max_size: int = CONTAINER_POOL_MAX,
+        max_per_layout: int = CONTAINER_POOL_MAX_PER_LAYOUT,
+    ) -> None:
+        self._spawn = spawn
+        self._stop = stop
+        self.max_size = max_size
+        self.max_per_layout = max_per_layout
+        self._layouts: dict[tuple, _LayoutState] = {}
+        self.hits = 0
+        self.misses = 0
+        self._ready_latency: dict[bool, deque[float]] = {True: deque(maxlen=100), False: deque(maxlen=100)}
+
+    def _warm_count(self) -> int:
+        return sum(len(s.warm) + s.spawning for s in self._layouts.values())
+
+    def _arrival_rate(self, state: _LayoutState, now: float) -> float:
+        while state.arrivals and (now - state.arrivals[0]) * 1000 > CONTAINER_POOL_WINDOW:
+            state.arrivals.popleft()
+        return len(state.arrivals) / (CONTAINER_POOL_WINDOW / 1000)
+
+    def target_size(self, key: tuple) -> int:
+        """Warm containers to keep for a layout: expected arrivals over the refill horizon, at least 1 if active."""
+        state = self._layouts.get(key)
+        if not state:
+            return 0
+        rate = self._arrival_rate(state, time.time())
+        if rate == 0:
+            return 0
+        return max(1, min(self.max_per_layout, math.ceil(rate * CONTAINER_POOL_HORIZON / 1000)))
+
+    def acquire(self, key: tuple, mounts: list[dict]) -> WarmContainer | None:
+        """Claim a warm container for this layout, or None on a miss. Triggers a refill either way."""
+        state = self._layouts.get(key)
+        if state is None:
+            state = self._layouts[key] = _LayoutState(mounts=mounts)
+        state.mounts = mounts
+        state.arrivals.append(time.time())
+
+        claimed: WarmContainer | None = None
+        while state.warm:
+            candidate = state.warm.pop(0)
+            if candidate.process.returncode is None:
+                claimed = candidate
+                break
+            logger.debug("Discarding dead warm container", container_name=candidate.container_name)
+            self._remove_slot(candidate)
+
+        if claimed:
+            self.hits += 1
+        else:
+            self.misses += 1
+        asyncio.ensure_future(self._refill(key))
+        return claimed
+
+    def release_unused(self, warm: WarmContainer) -> None:
+        """A claimed container couldn't be used (e.g. slot binding failed): stop it."""
+        asyncio.ensure_future(self._retire(warm))
+
+    def record_ready_latency(self, hit: bool, seconds: float) -> None:
+        """Time from writing ContainerInput to the runner's first output byte."""
+        self._ready_latency[hit].append(seconds)
+
+    def stats(self) -> dict:
+        def p50(samples: deque[float]) -> float | None:
+            return round(sorted(samples)[len(samples) // 2], 3) if samples else None
+
+        lookups = self.hits + self.misses
+        return {
+            "warm": sum(len(s.warm) for s in self._layouts.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "hit_ready_p50_secs": p50(self._ready_latency[True]),
+            "miss_ready_p50_secs": p50(self._ready_latency[False]),
+        }
+
+    async def _refill(self, key: tuple) -> None:
+        state = self._layouts.get(key)
+        if not state:
+            return
+        while len(state.warm) + state.spawning < self.target_size(key) and self._warm_count() < self.max_size:
+            state.spawning += 1
+            try:
+                warm = await self._start(key, state.mounts)
+            except Exception as err:
+                logger.warning("Failed to start warm container", error=str(err))
+                return
+            finally:
+                state.spawning -= 1
+            if self._layouts.get(key) is not state:
+                await self._retire(warm)  # Pool closed while it was starting
+                return
+            state.warm.append(warm)
+
+    async def _start(self, key: tuple, mounts: list[dict]) -> WarmContainer:
+        group_part = next(
+            (os.path.basename(m["host_path"]) for m in mounts if m["container_path"] == "/workspace/group"),
+            "pool",
+        )
+        container_name = f"clawcode-{group_part}-{int(time.time() * 1000)}"
+        repo_slot: str | None = None
+        if any(k[0] == REPO_SLOT_MARKER for k in key):
+            slot = WORKSPACES_DIR / f"{POOL_SLOT_PREFIX}{container_name}" / "repo"
+            slot.mkdir(parents=True)
+            repo_slot = str(slot)
+            mounts = [
+                {**m, "host_path": repo_slot} if m["container_path"] == "/workspace/repo" else m
+                for m in mounts
+            ]
+        process = await self._spawn(mounts, container_name)
+        logger.debug("Warm container started", container_name=container_name)
+        return WarmContainer(key=key, process=process, container_name=container_name, started_at=time.time(), repo_slot=repo_slot)
+
+    def _remove_slot(self, warm: WarmContainer) -> None:
+        if warm.repo_slot:
+            shutil.rmtree(os.path.dirname(warm.repo_slot), ignore_errors=True)
+
+    async def _retire(self, warm: WarmContainer) -> None:
+        await self._stop(warm.container_name, warm.process)
+        self._remove_slot(warm)
+
+    async def maintain(self) -> None:
+        """Shrink layouts whose arrival rate dropped, drop dead containers, and recycle old ones.
+
+        Warm containers live at most CONTAINER_POOL_WINDOW so image updates and
+        refreshed skills are picked up; active layouts refill on the next arrival.
+        """
+        now = time.time()
+        for key, state in list(self._layouts.items()):
+            target = self.target_size(key)
+            alive: list[WarmContainer] = []
+            for warm in state.warm:
+                if warm.process.returncode is not None:
+                    self._remove_slot(warm)
+                elif (now - warm.started_at) * 1000 > CONTAINER_POOL_WINDOW:
+                    await self._retire(warm)
+                else:
+                    alive.append(warm)
+            state.warm = alive
+            while len(state.warm) > target:
+                warm = state.warm.pop()
+                logger.debug("Retiring idle warm container", container_name=warm.container_name)
+                await self._retire(warm)
+            if not state.warm and not state.arrivals and not state.spawning:
+                del self._layouts[key]
+        logger.debug("Container pool stats", **self.stats())
+
+    async def close(self) -> None:
+        """Stop every warm container (host shutdown)."""
+        layouts, self._layouts = self._layouts, {}
+        for state in layouts.values():
+            for warm in state.warm:
+                await self._retire(warm)
@@ -0,0 +1,172 @@
+"""Container Resources.
+
+Resource profiles for agent containers (CPU, memory, tmpfs scratch, block I/O
+weight) and sampling of what a run actually used. Profiles come from the
+CONTAINER_* defaults, overridden per group by ``containerConfig``. Usage is
+read from the container's cgroup (or the Docker stats endpoint) every
+CONTAINER_STATS_INTERVAL and stored with the run in ``agent_runs``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from clawcode.config import (
+    CONTAINER_BLKIO_WEIGHT,
+    CONTAINER_CPUS,
+    CONTAINER_MEMORY,
+    CONTAINER_STATS_INTERVAL,
+    CONTAINER_TMPFS,
+)
+from clawcode.logger import logger
+from clawcode.models import ContainerConfig
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """Bytes in a docker-style size ("512m", "4g", "1.5GiB", "1048576")."""
+    match = _SIZE_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+def parse_tmpfs(entries: list[str]) -> dict[str, str]:
+    """``["/tmp:2g", "/workspace/build"]`` -> {container_path: docker tmpfs options}."""
+    tmpfs: dict[str, str] = {}
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        path, _, size = entry.partition(":")
+        tmpfs[path] = f"size={parse_size(size)}" if size else ""
+    return tmpfs
+
+
+@dataclass
+class ResourceProfile:
+    cpus: float | None = None  # CPU cores
+    memory_bytes: int | None = None
+    tmpfs: dict[str, str] = field(default_factory=dict)  # container_path -> docker tmpfs options
+    blkio_weight: int | None = None  # 10-1000
+
+    @property
+    def is_default(self) -> bool:
+        return self == default_profile()
+
+
+def default_profile() -> ResourceProfile:
+    return ResourceProfile(
+        cpus=CONTAINER_CPUS or None,
+        memory_bytes=parse_size(CONTAINER_MEMORY) if CONTAINER_MEMORY else None,
+        tmpfs=parse_tmpfs(CONTAINER_TMPFS.split(",")),
+        blkio_weight=CONTAINER_BLKIO_WEIGHT or None,
+    )
+
+
+def resource_profile(config: ContainerConfig | None) -> ResourceProfile:
+    """The default profile with a group's containerConfig overrides applied."""
+    profile = default_profile()
+    if config is None:
+        return profile
+    if config.cpus is not None:
+        profile.cpus = config.cpus or None
+    if config.memory is not None:
+        profile.memory_bytes = parse_size(config.memory) if config.memory else None
+    if config.tmpfs is not None:
+        profile.tmpfs = parse_tmpfs(config.tmpfs)
+    if config.blkio_weight is not None:
+        profile.blkio_weight = config.blkio_weight or None
+    return profile
+
+
+# --- Usage sampling ---
+
+
+@dataclass
+class ResourceSample:
+    cpu_usec: int  # Cumulative CPU time of the container's cgroup
+    memory_bytes: int  # Current memory use
+    memory_peak_bytes: int | None = None  # Kernel-tracked peak, where available
+
+
+@dataclass
+class ResourceUsage:
+    cpu_ms: int
+    peak_memory_bytes: int
+    samples: int
+
+
+def read_cgroup_sample(cgroup: Path) -> ResourceSample | None:
+    """Read cgroup v2 cpu.stat / memory.current / memory.peak. None if the cgroup is gone."""
+    try:
+        cpu_usec = 0
+        for line in (cgroup / "cpu.stat").read_text().splitlines():
+            key, _, value = line.partition(" ")
+            if key == "usage_usec":
+                cpu_usec = int(value)
+                break
+        memory = int((cgroup / "memory.current").read_text())
+    except (OSError, ValueError):
+        return None
+    try:
+        peak: int | None = int((cgroup / "memory.peak").read_text())
+    except (OSError, ValueError):
+        peak = None  # Kernels before 5.19
+    return ResourceSample(cpu_usec=cpu_usec, memory_bytes=memory, memory_peak_bytes=peak)
+
+
+class UsageSampler:
+    """Polls ``sample`` while a run is live and keeps cumulative CPU and peak memory."""
+
+    def __init__(
+        self,
+        sample: Callable[[], Awaitable[ResourceSample | None]],
+        interval_secs: float = CONTAINER_STATS_INTERVAL / 1000,
+    ) -> None:
+        self._sample = sample
+        self.interval_secs = interval_secs
+        self.cpu_usec = 0
+        self.peak_memory_bytes = 0
+        self.samples = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.interval_secs > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def sample_once(self) -> None:
+        try:
+            sample = await self._sample()
+        except Exception as err:
+            logger.debug("Resource usage sample failed", error=str(err))
+            return
+        if sample is None:
+            return
+        self.samples += 1
+        self.cpu_usec = max(self.cpu_usec, sample.cpu_usec)
+        self.peak_memory_bytes = max(self.peak_memory_bytes, sample.memory_bytes, sample.memory_peak_bytes or 0)
+
+    async def stop(self) -> ResourceUsage | None:
+        """Stop polling. Returns the usage seen, or None if no sample succeeded."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if not self.samples:
+            return None
+        return ResourceUsage(cpu_ms=self.cpu_usec // 1000, peak_memory_bytes=self.peak_memory_bytes, samples=self.samples)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_secs)
+            await self.sample_once()
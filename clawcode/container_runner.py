@@ -16,21 +16,49 @@ from pathlib import Path
 from clawcode.config import (
     CONTAINER_IMAGE,
     CONTAINER_MAX_OUTPUT_SIZE,
+    CONTAINER_OUTPUT_QUEUE_SIZE,
+    CONTAINER_POOL_MAX,
     CONTAINER_TIMEOUT,
     DATA_DIR,
     GROUPS_DIR,
     IDLE_TIMEOUT,
     TIMEZONE,
 )
-from clawcode.container_runtime import CONTAINER_RUNTIME_BIN, readonly_mount_args, stop_container_cmd
+from clawcode.container_logs import ContainerLogWriter
+from clawcode.container_pool import ContainerPool, move_contents, pool_key
+from clawcode.container_resources import (
+    ResourceProfile,
+    UsageSampler,
+    default_profile,
+    resource_profile,
+)
+from clawcode.container_runtime import (
+    ContainerSpec,
+    attach_container,
+    container_stats,
+    forget_container_stats,
+    spawn_container,
+    stop_container,
+)
 from clawcode.env import read_env_file
 from clawcode.group_folder import resolve_group_folder_path, resolve_group_ipc_path
+from clawcode.ipc_transport import socket_hub
 from clawcode.logger import logger
 from clawcode.models import RegisteredGroup
 from clawcode.mount_security import validate_additional_mounts
+from clawcode.output_delivery import OutputDelivery
+from clawcode.output_parser import PROTOCOL_VERSION, OutputFrameParser
+from clawcode.run_ledger import RUNNER_PHASE_PREFIX, RunTimer
+from clawcode.sandbox_runtime import (
+    is_sandbox,
+    sandbox_available,
+    sandbox_stats,
+    spawn_sandbox,
+    stop_sandbox,
+)
+from clawcode.skills_sync import sync_skills
 
-OUTPUT_START_MARKER = "---CLAWCODE_OUTPUT_START---"
-OUTPUT_END_MARKER = "---CLAWCODE_OUTPUT_END---"
+RUNNER_PHASE_MARKER = RUNNER_PHASE_PREFIX.encode()
 
 
 @dataclass
@@ -44,11 +72,12 @@ class ContainerInput:
     assistant_name: str | None = None
     secrets: dict[str, str] | None = None
     repo_checkout_path: str | None = None
+    repo_is_snapshot: bool = False  # repo_checkout_path is a per-run snapshot (can be moved into a warm slot)
 
 
 @dataclass
 class ContainerOutput:
-    status: str  # 'success' | 'error'
+    status: str  # 'success' | 'error' | 'session' (a session id update only, sent mid-query)
     result: str | None
     new_session_id: str | None = None
     error: str | None = None
@@ -96,14 +125,8 @@ def _build_volume_mounts(
             },
         }, indent=2) + "\n")
 
-    # Sync skills
-    skills_src = Path.cwd() / "container" / "skills"
-    skills_dst = group_sessions_dir / "skills"
-    if skills_src.exists():
-        for skill_dir in skills_src.iterdir():
-            if skill_dir.is_dir():
-                dst_dir = skills_dst / skill_dir.name
-                shutil.copytree(str(skill_dir), str(dst_dir), dirs_exist_ok=True)
+    # Sync skills (no-op unless container/skills changed since this group's last sync)
+    sync_skills(group_sessions_dir / "skills")
 
     mounts.append({"host_path": str(group_sessions_dir), "container_path": "/home/node/.claude", "readonly": False})
 
@@ -131,35 +154,48 @@ def add_github_token(secrets: dict[str, str], token: str) -> None:
     secrets["GITHUB_TOKEN"] = token
 
 
-def _build_container_args(mounts: list[dict], container_name: str) -> list[str]:
-    args = ["run", "-i", "--rm", "--name", container_name]
-
-    # Container hardening
-    args.extend([
-        "--cap-drop=ALL",
-        "--cap-add=SYS_ADMIN",
-        "--security-opt=no-new-privileges",
-        "--pids-limit=512",
-        "--add-host=metadata.google.internal:0.0.0.0",
-        "--add-host=169.254.169.254:0.0.0.0",
-    ])
-
-    args.extend(["-e", f"TZ={TIMEZONE}"])
+def _build_container_spec(mounts: list[dict], container_name: str, profile: ResourceProfile | None = None) -> ContainerSpec:
+    profile = profile or default_profile()
+    spec = ContainerSpec(
+        name=container_name,
+        image=CONTAINER_IMAGE,
+        mounts=mounts,
+        env={"TZ": TIMEZONE},
+        # Container hardening
+        cap_drop=["ALL"],
+        cap_add=["SYS_ADMIN"],
+        security_opt=["no-new-privileges"],
+        pids_limit=512,
+        extra_hosts=["metadata.google.internal:0.0.0.0", "169.254.169.254:0.0.0.0"],
+        cpus=profile.cpus,
+        memory_bytes=profile.memory_bytes,
+        tmpfs=profile.tmpfs,
+        blkio_weight=profile.blkio_weight,
+    )
 
     host_uid = os.getuid()
     host_gid = os.getgid()
     if host_uid != 0 and host_uid != 1000:
-        args.extend(["--user", f"{host_uid}:{host_gid}"])
-        args.extend(["-e", "HOME=/home/node"])
+        spec.user = f"{host_uid}:{host_gid}"
+        spec.env["HOME"] = "/home/node"
+
+    return spec
 
-    for mount in mounts:
-        if mount["readonly"]:
-            args.extend(readonly_mount_args(mount["host_path"], mount["container_path"]))
-        else:
-            args.extend(["-v", f"{mount['host_path']}:{mount['container_path']}"])
 
-    args.append(CONTAINER_IMAGE)
-    return args
+def _group_runtime(group: RegisteredGroup) -> str:
+    runtime = group.container_config.runtime if group.container_config else None
+    if runtime == "sandbox" and not sandbox_available():
+        logger.warning("Sandbox runtime unavailable (bwrap not found), using docker", group=group.name)
+        return "docker"
+    return runtime or "docker"
+
+
+def _group_profile(group: RegisteredGroup) -> ResourceProfile:
+    try:
+        return resource_profile(group.container_config)
+    except ValueError as err:
+        logger.warning("Invalid resource profile in containerConfig, using defaults", group=group.name, error=str(err))
+        return default_profile()
 
 
 async def run_container_agent(
@@ -167,42 +203,75 @@ async def run_container_agent(
     input_data: ContainerInput,
     on_process: callable,
     on_output: callable | None = None,
+    run_timer: RunTimer | None = None,
 ) -> ContainerOutput:
-    """Spawn an agent container and stream results."""
+    """Spawn an agent container and stream results.
+
+    ``run_timer`` (optional) gets the spawned / first_byte / result / exit
+    phases and the runner's own phase markers.
+    """
     start_time = time.time()
 
     group_dir = resolve_group_folder_path(group.folder)
     Path(group_dir).mkdir(parents=True, exist_ok=True)
 
     mounts = _build_volume_mounts(group, input_data.is_main, input_data.repo_checkout_path)
-    safe_name = group.folder.replace("/", "-").replace("\\", "-")
-    container_name = f"clawcode-{safe_name}-{int(time.time() * 1000)}"
-    container_args = _build_container_args(mounts, container_name)
-
-    logger.info(
-        "Spawning container agent",
-        group=group.name,
-        container_name=container_name,
-        mount_count=len(mounts),
-        is_main=input_data.is_main,
-    )
 
-    logs_dir = Path(group_dir) / "logs"
-    logs_dir.mkdir(parents=True, exist_ok=True)
+    runtime = _group_runtime(group)
+    profile = _group_profile(group)
 
-    # Spawn the container process
-    process = await asyncio.create_subprocess_exec(
-        CONTAINER_RUNTIME_BIN,
-        *container_args,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+    # Claim a warm container with the same mount layout if the pool has one (sandboxes start fast enough).
+    # Warm containers run the default resource profile.
+    warm = None
+    if container_pool and runtime == "docker" and profile.is_default:
+        warm = container_pool.acquire(pool_key(mounts, input_data.repo_is_snapshot), mounts)
+    if warm and warm.repo_slot:
+        try:
+            move_contents(input_data.repo_checkout_path, warm.repo_slot)
+        except OSError as err:
+            logger.warning("Failed to bind snapshot into warm container", group=group.name, error=str(err))
+            try:
+                move_contents(warm.repo_slot, input_data.repo_checkout_path)
+            except OSError:
+                pass
+            container_pool.release_unused(warm)
+            warm = None
+
+    if warm:
+        process, container_name = warm.process, warm.container_name
+        logger.info(
+            "Using warm container agent",
+            group=group.name,
+            container_name=container_name,
+            warm_secs=round(time.time() - warm.started_at, 1),
+            is_main=input_data.is_main,
+        )
+    else:
+        safe_name = group.folder.replace("/", "-").replace("\\", "-")
+        container_name = f"clawcode-{safe_name}-{int(time.time() * 1000)}"
+        logger.info(
+            "Spawning container agent",
+            group=group.name,
+            container_name=container_name,
+            mount_count=len(mounts),
+            is_main=input_data.is_main,
+            runtime=runtime,
+        )
+        if runtime == "sandbox":
+            process = await spawn_sandbox(_build_container_spec(mounts, container_name, profile))
+        else:
+            process = await spawn_container(_build_container_spec(mounts, container_name, profile))
 
     on_process(process, container_name)
+    if run_timer:
+        run_timer.container_name = container_name
+        run_timer.runtime = "docker-warm" if warm else runtime
+        run_timer.profile = profile
+        run_timer.mark("spawned")
 
     # Pass secrets via stdin
     secrets = {**_read_secrets(), **(input_data.secrets or {})}
+    ipc_socket = await socket_hub.ensure(group.folder, container_name)
     stdin_data = json.dumps({
         "prompt": input_data.prompt,
         "sessionId": input_data.session_id,
@@ -212,18 +281,100 @@ async def run_container_agent(
         "isScheduledTask": input_data.is_scheduled_task,
         "assistantName": input_data.assistant_name,
         "secrets": secrets,
+        "protocolVersion": PROTOCOL_VERSION,
+        "ipcSocket": ipc_socket[0] if ipc_socket else None,
+        "ipcToken": ipc_socket[1] if ipc_socket else None,
     }).encode()
     process.stdin.write(stdin_data)
     process.stdin.close()
+    input_sent_at = time.time()
+    ready_recorded = False
+
+    def record_ready() -> None:
+        # First byte from the runner after it received input: startup latency as seen by the run
+        nonlocal ready_recorded
+        if not ready_recorded:
+            ready_recorded = True
+            if run_timer:
+                run_timer.mark("first_byte")
+            if container_pool:
+                container_pool.record_ready_latency(warm is not None, time.time() - input_sent_at)
+
+    try:
+        return await _stream_container(
+            group, process, container_name, runtime, on_output, run_timer, start_time, on_first_byte=record_ready
+        )
+    finally:
+        socket_hub.release(container_name)
+        if warm and warm.repo_slot:
+            # Hand the snapshot's contents back so release/harvest sees the run's changes
+            try:
+                move_contents(warm.repo_slot, input_data.repo_checkout_path)
+            except OSError as err:
+                logger.warning("Failed to return snapshot from warm container slot", group=group.name, error=str(err))
+            shutil.rmtree(os.path.dirname(warm.repo_slot), ignore_errors=True)
+
+
+async def adopt_container_agent(
+    group: RegisteredGroup,
+    container_name: str,
+    on_process: callable,
+    on_output: callable | None = None,
+    skip_results: int = 0,
+) -> ContainerOutput:
+    """Re-attach to an agent container that outlived the previous host process.
+
+    Its output is replayed from the start; the first ``skip_results`` results
+    were already delivered before the restart and are not passed on again.
+    """
+    start_time = time.time()
+    process = await attach_container(container_name)
+    on_process(process, container_name)
+    logger.info("Re-attached to running container agent", group=group.name, container_name=container_name, skip_results=skip_results)
+    return await _stream_container(group, process, container_name, "docker", on_output, None, start_time, skip_results=skip_results)
 
-    # Track output
+
+async def _stream_container(
+    group: RegisteredGroup,
+    process,
+    container_name: str,
+    runtime: str,
+    on_output: callable | None,
+    run_timer: RunTimer | None,
+    start_time: float,
+    on_first_byte: callable | None = None,
+    skip_results: int = 0,
+) -> ContainerOutput:
+    """Read a started container's output until it exits; returns the run's final ContainerOutput."""
+    logs_dir = Path(resolve_group_folder_path(group.folder)) / "logs"
+    logs_dir.mkdir(parents=True, exist_ok=True)
+
+    # Sample CPU / memory while the run is live, for right-sizing profiles
+    sampler = UsageSampler(
+        (lambda: sandbox_stats(container_name)) if runtime == "sandbox" else (lambda: container_stats(container_name))
+    )
+
+    record_ready = on_first_byte or (lambda: None)
+    # Track output. Raw stdout is only kept in legacy mode, for the last-line fallback
+    parser = OutputFrameParser(max_frame_size=CONTAINER_MAX_OUTPUT_SIZE)
+    frames: list[ContainerOutput] = []
     stdout_buf = bytearray()
-    stderr_buf = bytearray()
     stdout_truncated = False
-    stderr_truncated = False
-    parse_buffer = ""
+    # Stderr goes to a compressed per-run file; only its tail is kept in memory
+    container_log = ContainerLogWriter(logs_dir, container_name)
+    # Outputs are handed to on_output by a separate task, so a slow GitHub API never stalls the pipe
+    results_delivered = 0
+
+    async def deliver(output: ContainerOutput) -> None:
+        nonlocal results_delivered
+        await on_output(output)
+        if output.result:
+            results_delivered += 1
+
+    delivery = OutputDelivery(deliver, CONTAINER_OUTPUT_QUEUE_SIZE, group.name) if on_output else None
     new_session_id: str | None = None
     had_streaming_output = False
+    skipped = 0
     timed_out = False
 
     config_timeout = (group.container_config.timeout if group.container_config and group.container_config.timeout else CONTAINER_TIMEOUT) / 1000
@@ -249,14 +400,14 @@ async def run_container_agent(
 
     # Read stdout
     async def read_stdout():
-        nonlocal stdout_buf, stdout_truncated, parse_buffer, new_session_id, had_streaming_output
+        nonlocal stdout_truncated, new_session_id, had_streaming_output, skipped
         while True:
-            chunk = await process.stdout.read(8192)
+            chunk = await process.stdout.read(65536)
             if not chunk:
                 break
-            text = chunk.decode(errors="replace")
+            record_ready()
 
-            if not stdout_truncated:
+            if not on_output and not stdout_truncated:
                 remaining = CONTAINER_MAX_OUTPUT_SIZE - len(stdout_buf)
                 if len(chunk) > remaining:
                     stdout_buf.extend(chunk[:remaining])
@@ -265,58 +416,96 @@ async def run_container_agent(
                 else:
                     stdout_buf.extend(chunk)
 
-            if on_output:
-                parse_buffer += text
-                while OUTPUT_START_MARKER in parse_buffer:
-                    start_idx = parse_buffer.index(OUTPUT_START_MARKER)
-                    end_idx = parse_buffer.find(OUTPUT_END_MARKER, start_idx)
-                    if end_idx == -1:
-                        break
-                    json_str = parse_buffer[start_idx + len(OUTPUT_START_MARKER):end_idx].strip()
-                    parse_buffer = parse_buffer[end_idx + len(OUTPUT_END_MARKER):]
-                    try:
-                        parsed = json.loads(json_str)
-                        output = ContainerOutput(
-                            status=parsed.get("status", "success"),
-                            result=parsed.get("result"),
-                            new_session_id=parsed.get("newSessionId"),
-                            error=parsed.get("error"),
-                        )
-                        if output.new_session_id:
-                            new_session_id = output.new_session_id
-                        had_streaming_output = True
-                        reset_timeout()
-                        await on_output(output)
-                    except json.JSONDecodeError as err:
-                        logger.warning("Failed to parse streamed output chunk", group=group.name, error=str(err))
-
-    # Read stderr
+            dropped = parser.frames_dropped
+            completed = parser.feed(chunk)
+            if parser.frames_dropped > dropped:
+                logger.warning("Container output frame too large, dropped", group=group.name, limit=CONTAINER_MAX_OUTPUT_SIZE)
+            for json_str in completed:
+                try:
+                    message = json.loads(json_str)
+                except json.JSONDecodeError as err:
+                    logger.warning("Failed to parse streamed output chunk", group=group.name, error=str(err))
+                    continue
+                kind = message.get("type", "result")
+                if kind in ("progress", "usage", "tool_timing"):
+                    _log_runner_event(group, kind, message)
+                    continue
+                output = _output_from_message(message)
+                if not on_output:
+                    if output.status != "session":
+                        frames.append(output)
+                    continue
+                if output.new_session_id:
+                    new_session_id = output.new_session_id
+                if output.status == "session":
+                    await on_output(output)  # Applied right away, ahead of queued results
+                    continue
+                had_streaming_output = True
+                if skipped < skip_results:
+                    skipped += 1  # Delivered before a host restart
+                    continue
+                reset_timeout()
+                if run_timer:
+                    run_timer.mark("result")
+                await delivery.submit(output)
+
+    # Read stderr. Lines are only split out when a chunk carries a runner phase marker.
+    def scan_phase_markers(data: bytes) -> bytes:
+        """Record complete marker lines in ``data``; returns the unterminated last line."""
+        if RUNNER_PHASE_MARKER in data:
+            *lines, rest = data.split(b"\n")
+            for line in lines:
+                if RUNNER_PHASE_MARKER in line:
+                    run_timer.mark_runner_line(line.decode(errors="replace").strip())
+        else:
+            rest = data[data.rfind(b"\n") + 1:]
+        return rest[-65536:]  # Unterminated output: don't buffer without bound
+
     async def read_stderr():
-        nonlocal stderr_buf, stderr_truncated
+        pending_line = b""
         while True:
-            chunk = await process.stderr.read(8192)
+            chunk = await process.stderr.read(65536)
             if not chunk:
                 break
-            text = chunk.decode(errors="replace")
-            for line in text.strip().split("\n"):
-                if line:
-                    logger.debug(line, container=group.folder)
-            if not stderr_truncated:
-                remaining = CONTAINER_MAX_OUTPUT_SIZE - len(stderr_buf)
-                if len(chunk) > remaining:
-                    stderr_buf.extend(chunk[:remaining])
-                    stderr_truncated = True
-                else:
-                    stderr_buf.extend(chunk)
-
-    await asyncio.gather(read_stdout(), read_stderr())
-    return_code = await process.wait()
+            record_ready()
+            container_log.write(chunk)
+            if run_timer:
+                pending_line = scan_phase_markers(pending_line + chunk)
+        if run_timer and pending_line:
+            scan_phase_markers(pending_line + b"\n")
+
+    sampler.start()
+    try:
+        await asyncio.gather(read_stdout(), read_stderr())
+        return_code = await process.wait()
+        if run_timer:
+            run_timer.mark("exit")
+        usage = await sampler.stop()
+        if run_timer:
+            run_timer.usage = usage
+        if delivery:
+            await delivery.close()
+            if delivery.blocked_secs or delivery.failed:
+                logger.warning("Output delivery fell behind", group=group.name, **delivery.stats())
+            else:
+                logger.debug("Output delivery", group=group.name, **delivery.stats())
+    finally:
+        if delivery:
+            delivery.cancel()  # No-op once closed
+        await sampler.stop()
+        forget_container_stats(container_name)
+        await container_log.close()
 
     if timeout_handle:
         timeout_handle.cancel()
 
     duration = time.time() - start_time
 
+    if delivery and delivery.error and not results_delivered:
+        # Nothing reached the user: fail the run so its messages are retried
+        logger.error("Container output was not delivered", group=group.name, failed=delivery.failed, error=str(delivery.error))
+        return ContainerOutput(status="error", result=None, error=f"Output delivery failed: {delivery.error}")
+
     if timed_out:
         if had_streaming_output:
             logger.info("Container timed out after output (idle cleanup)", group=group.name, duration=f"{duration:.1f}s")
@@ -325,47 +514,67 @@ async def run_container_agent(
         return ContainerOutput(status="error", result=None, error=f"Container timed out after {config_timeout}s")
 
     if return_code != 0:
-        stderr_text = stderr_buf.decode(errors="replace")
-        logger.error("Container exited with error", group=group.name, code=return_code, duration=f"{duration:.1f}s")
+        stderr_text = container_log.tail_text()
+        logger.error(
+            "Container exited with error",
+            group=group.name,
+            code=return_code,
+            duration=f"{duration:.1f}s",
+            stderr_tail=container_log.tail(),
+            log_file=str(container_log.path),
+        )
         return ContainerOutput(
             status="error",
             result=None,
             error=f"Container exited with code {return_code}: {stderr_text[-200:]}",
         )
 
+    logger.debug("Container stderr tail", group=group.name, lines=container_log.tail(5), log_bytes=container_log.bytes_written)
     if on_output:
         logger.info("Container completed (streaming mode)", group=group.name, duration=f"{duration:.1f}s", new_session_id=new_session_id)
         return ContainerOutput(status="success", result=None, new_session_id=new_session_id)
 
-    # Legacy mode: parse last output marker pair
-    stdout_text = stdout_buf.decode(errors="replace")
+    # Legacy mode: first output frame, else the last line of stdout
     try:
-        start_idx = stdout_text.find(OUTPUT_START_MARKER)
-        end_idx = stdout_text.find(OUTPUT_END_MARKER)
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            json_line = stdout_text[start_idx + len(OUTPUT_START_MARKER):end_idx].strip()
-        else:
-            lines = stdout_text.strip().split("\n")
-            json_line = lines[-1]
-        parsed = json.loads(json_line)
-        return ContainerOutput(
-            status=parsed.get("status", "success"),
-            result=parsed.get("result"),
-            new_session_id=parsed.get("newSessionId"),
-            error=parsed.get("error"),
-        )
+        if frames:
+            return frames[0]
+        json_line = stdout_buf.decode(errors="replace").strip().split("\n")[-1]
+        return _output_from_message(json.loads(json_line))
     except Exception as err:
         return ContainerOutput(status="error", result=None, error=f"Failed to parse container output: {err}")
 
 
+def _output_from_message(message: dict) -> ContainerOutput:
+    """Map a runner message (result / error / session) to a ContainerOutput."""
+    kind = message.get("type", "result")
+    if kind == "session":
+        return ContainerOutput(status="session", result=None, new_session_id=message.get("sessionId"))
+    return ContainerOutput(
+        status="error" if kind == "error" else message.get("status", "success"),
+        result=message.get("result"),
+        new_session_id=message.get("newSessionId"),
+        error=message.get("error"),
+    )
+
+
+def _log_runner_event(group: RegisteredGroup, kind: str, message: dict) -> None:
+    fields = {k: v for k, v in message.items() if k not in ("type", "group", "event")}
+    if kind == "usage":
+        logger.info("Agent usage", group=group.name, **fields)
+    else:
+        logger.debug("Agent " + kind.replace("_", " "), group=group.name, **fields)
+
+
+async def _spawn_container(mounts: list[dict], container_name: str) -> asyncio.subprocess.Process:
+    return await spawn_container(_build_container_spec(mounts, container_name))
+
+
 async def _stop_container(container_name: str, process: asyncio.subprocess.Process) -> None:
+    if is_sandbox(container_name):
+        await stop_sandbox(container_name)
+        return
     try:
-        stop_proc = await asyncio.create_subprocess_shell(
-            stop_container_cmd(container_name),
-            stdout=asyncio.subprocess.DEVNULL,
-            stderr=asyncio.subprocess.DEVNULL,
-        )
-        await asyncio.wait_for(stop_proc.wait(), timeout=15)
+        await stop_container(container_name)
     except Exception:
         try:
             process.kill()
@@ -373,27 +582,4 @@ async def _stop_container(container_name: str, process: asyncio.subprocess.Proce
             pass
 
 
-def write_tasks_snapshot(group_folder: str, is_main: bool, tasks: list[dict]) -> None:
-    """Write filtered tasks to the group's IPC directory."""
-    group_ipc_dir = resolve_group_ipc_path(group_folder)
-    Path(group_ipc_dir).mkdir(parents=True, exist_ok=True)
-    filtered = tasks if is_main else [t for t in tasks if t.get("groupFolder") == group_folder]
-    tasks_file = Path(group_ipc_dir) / "current_tasks.json"
-    tasks_file.write_text(json.dumps(filtered, indent=2))
-
-
-def write_groups_snapshot(
-    group_folder: str,
-    is_main: bool,
-    groups: list[dict],
-    registered_jids: set[str],
-) -> None:
-    """Write available groups snapshot for the container to read."""
-    group_ipc_dir = resolve_group_ipc_path(group_folder)
-    Path(group_ipc_dir).mkdir(parents=True, exist_ok=True)
-    visible_groups = groups if is_main else []
-    groups_file = Path(group_ipc_dir) / "available_groups.json"
-    groups_file.write_text(json.dumps({
-        "groups": visible_groups,
-        "lastSync": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-    }, indent=2))
+container_pool: ContainerPool | None = ContainerPool(_spawn_container, _stop_container) if CONTAINER_POOL_MAX > 0 else None
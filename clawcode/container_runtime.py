@@ -5,12 +5,51 @@ All runtime-specific logic lives here so swapping runtimes means changing one fi
 
 from __future__ import annotations
 
+import asyncio
+import os
 import subprocess
+import time
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from pathlib import Path
 
+import httpx
+
+from clawcode.config import CONTAINER_RUNTIME_BACKEND, DOCKER_SOCKET
+from clawcode.container_resources import ResourceSample, read_cgroup_sample
+from clawcode.docker_api import DockerAPIError, DockerClient
 from clawcode.logger import logger
 
 CONTAINER_RUNTIME_BIN = "docker"
 
+# "api" (Engine API over DOCKER_SOCKET) or "cli"; resolved by ensure_container_runtime_running()
+_backend: str = "cli"
+_docker: DockerClient | None = None
+_cgroup_dirs: dict[str, Path | None] = {}  # Container name -> its cgroup v2 dir (CLI backend)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+@dataclass
+class ContainerSpec:
+    """Backend-neutral description of an agent container (`docker run -i --rm`)."""
+
+    name: str
+    image: str
+    mounts: list[dict] = field(default_factory=list)  # host_path, container_path, readonly
+    env: dict[str, str] = field(default_factory=dict)
+    user: str | None = None
+    cap_drop: list[str] = field(default_factory=list)
+    cap_add: list[str] = field(default_factory=list)
+    security_opt: list[str] = field(default_factory=list)
+    pids_limit: int | None = None
+    cpus: float | None = None
+    memory_bytes: int | None = None
+    tmpfs: dict[str, str] = field(default_factory=dict)  # container_path -> tmpfs options ("size=...")
+    blkio_weight: int | None = None
+    extra_hosts: list[str] = field(default_factory=list)
+    command: list[str] | None = None
+
 
 def readonly_mount_args(host_path: str, container_path: str) -> list[str]:
     """Returns CLI args for a readonly bind mount."""
@@ -22,8 +61,291 @@ def stop_container_cmd(name: str) -> str:
     return f"{CONTAINER_RUNTIME_BIN} stop {name}"
 
 
+def cli_run_args(spec: ContainerSpec) -> list[str]:
+    """Arguments for `docker run` (without the binary)."""
+    args = ["run", "-i", "--rm", "--name", spec.name]
+    args.extend(f"--cap-drop={cap}" for cap in spec.cap_drop)
+    args.extend(f"--cap-add={cap}" for cap in spec.cap_add)
+    args.extend(f"--security-opt={opt}" for opt in spec.security_opt)
+    if spec.pids_limit is not None:
+        args.append(f"--pids-limit={spec.pids_limit}")
+    if spec.cpus is not None:
+        args.append(f"--cpus={spec.cpus:g}")
+    if spec.memory_bytes is not None:
+        args.append(f"--memory={spec.memory_bytes}")
+    if spec.blkio_weight is not None:
+        args.append(f"--blkio-weight={spec.blkio_weight}")
+    for path, options in spec.tmpfs.items():
+        args.extend(["--tmpfs", f"{path}:{options}" if options else path])
+    args.extend(f"--add-host={host}" for host in spec.extra_hosts)
+    for key, value in spec.env.items():
+        args.extend(["-e", f"{key}={value}"])
+    if spec.user:
+        args.extend(["--user", spec.user])
+    for mount in spec.mounts:
+        if mount["readonly"]:
+            args.extend(readonly_mount_args(mount["host_path"], mount["container_path"]))
+        else:
+            args.extend(["-v", f"{mount['host_path']}:{mount['container_path']}"])
+    args.append(spec.image)
+    if spec.command:
+        args.extend(spec.command)
+    return args
+
+
+def api_create_config(spec: ContainerSpec) -> dict:
+    """Body for POST /containers/create, equivalent to cli_run_args()."""
+    host_config: dict = {
+        "AutoRemove": True,
+        "Binds": [
+            f"{m['host_path']}:{m['container_path']}" + (":ro" if m["readonly"] else "")
+            for m in spec.mounts
+        ],
+        "CapDrop": spec.cap_drop,
+        "CapAdd": spec.cap_add,
+        "SecurityOpt": spec.security_opt,
+        "ExtraHosts": spec.extra_hosts,
+    }
+    if spec.pids_limit is not None:
+        host_config["PidsLimit"] = spec.pids_limit
+    if spec.cpus is not None:
+        host_config["NanoCpus"] = int(spec.cpus * 1e9)
+    if spec.memory_bytes is not None:
+        host_config["Memory"] = spec.memory_bytes
+    if spec.blkio_weight is not None:
+        host_config["BlkioWeight"] = spec.blkio_weight
+    if spec.tmpfs:
+        host_config["Tmpfs"] = dict(spec.tmpfs)
+    config: dict = {
+        "Image": spec.image,
+        "Env": [f"{key}={value}" for key, value in spec.env.items()],
+        "AttachStdin": True,
+        "AttachStdout": True,
+        "AttachStderr": True,
+        "OpenStdin": True,
+        "StdinOnce": True,
+        "Tty": False,
+        "HostConfig": host_config,
+    }
+    if spec.user:
+        config["User"] = spec.user
+    if spec.command:
+        config["Cmd"] = spec.command
+    return config
+
+
+def runtime_backend() -> str:
+    return _backend
+
+
+def _docker_client() -> DockerClient:
+    global _docker
+    if _docker is None:
+        _docker = DockerClient(DOCKER_SOCKET)
+    return _docker
+
+
+def _ping_socket(socket_path: str) -> bool:
+    if not socket_path or not os.path.exists(socket_path):
+        return False
+    try:
+        with httpx.Client(transport=httpx.HTTPTransport(uds=socket_path), timeout=5) as client:
+            return client.get("http://docker/_ping").status_code == 200
+    except (httpx.HTTPError, OSError):
+        return False
+
+
+async def runtime_latency_ms() -> float | None:
+    """Round-trip time of a daemon ping in ms (API backend only; None otherwise or on failure)."""
+    if _backend != "api":
+        return None
+    start = time.monotonic()
+    try:
+        if not await _docker_client().ping():
+            return None
+    except (httpx.HTTPError, OSError):
+        return None
+    return (time.monotonic() - start) * 1000
+
+
+async def spawn_container(spec: ContainerSpec, backend: str | None = None):
+    """Start a container attached to stdin/stdout/stderr.
+
+    Returns an asyncio.subprocess.Process (CLI) or a docker_api.ContainerProcess (API);
+    both expose stdin/stdout/stderr, wait(), kill() and returncode.
+    """
+    if (backend or _backend) == "api":
+        try:
+            return await _docker_client().run_attached(spec.name, api_create_config(spec))
+        except (httpx.TransportError, OSError) as err:
+            # Daemon socket trouble: the CLI may still get through (and reports its own errors)
+            logger.warning("Docker API unavailable, spawning via CLI", container_name=spec.name, error=str(err))
+    return await asyncio.create_subprocess_exec(
+        CONTAINER_RUNTIME_BIN,
+        *cli_run_args(spec),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+
+class FollowedContainer:
+    """A running container re-attached through the CLI (`docker logs --follow` + `docker wait`).
+
+    Shaped like the process spawn_container returns, minus stdin.
+    """
+
+    def __init__(self, name: str, logs: asyncio.subprocess.Process, waiter: asyncio.subprocess.Process) -> None:
+        self.name = name
+        self.stdin = None
+        self.stdout = logs.stdout
+        self.stderr = logs.stderr
+        self.returncode: int | None = None
+        self._logs = logs
+        self._waiter = waiter
+
+    async def wait(self) -> int:
+        stdout, _ = await self._waiter.communicate()
+        await self._logs.wait()
+        try:
+            self.returncode = int(stdout.decode().strip())
+        except ValueError:
+            self.returncode = -1  # Removed before docker wait saw it exit
+        return self.returncode
+
+    def kill(self) -> None:
+        asyncio.ensure_future(asyncio.create_subprocess_exec(
+            CONTAINER_RUNTIME_BIN, "kill", self.name,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        ))
+
+
+async def attach_container(name: str, backend: str | None = None):
+    """Re-attach to a running container started by an earlier host process.
+
+    Its stdout/stderr are replayed from the start, then streamed. Returns a
+    docker_api.ContainerProcess (API) or a FollowedContainer (CLI).
+    """
+    if (backend or _backend) == "api":
+        try:
+            return await _docker_client().reattach(name)
+        except (httpx.TransportError, OSError) as err:
+            logger.warning("Docker API unavailable, attaching via CLI", container_name=name, error=str(err))
+    # Register the wait first so an exit between the two calls still reports its code
+    waiter = await asyncio.create_subprocess_exec(
+        CONTAINER_RUNTIME_BIN, "wait", name,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    logs = await asyncio.create_subprocess_exec(
+        CONTAINER_RUNTIME_BIN, "logs", "--follow", name,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    return FollowedContainer(name, logs, waiter)
+
+
+async def stop_container(name: str, backend: str | None = None) -> None:
+    """Stop a container by name. Raises if the runtime couldn't stop it."""
+    if (backend or _backend) == "api":
+        try:
+            await _docker_client().stop(name)
+            return
+        except (httpx.TransportError, OSError) as err:
+            logger.warning("Docker API unavailable, stopping via CLI", container_name=name, error=str(err))
+    stop_proc = await asyncio.create_subprocess_shell(
+        stop_container_cmd(name),
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    await asyncio.wait_for(stop_proc.wait(), timeout=15)
+
+
+async def list_containers(name_prefix: str, backend: str | None = None) -> list[str]:
+    """Names of running containers whose name contains ``name_prefix``."""
+    if (backend or _backend) == "api":
+        return [
+            name.lstrip("/")
+            for container in await _docker_client().list(name_prefix)
+            for name in container.get("Names", [])[:1]
+        ]
+    proc = await asyncio.create_subprocess_exec(
+        CONTAINER_RUNTIME_BIN, "ps", "--filter", f"name={name_prefix}", "--format", "{{.Names}}",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await proc.communicate()
+    return [name for name in stdout.decode().split("\n") if name]
+
+
+async def container_stats(name: str, backend: str | None = None) -> ResourceSample | None:
+    """CPU and memory counters of a running container, or None if unavailable."""
+    if (backend or _backend) == "api":
+        try:
+            data = await _docker_client().stats(name)
+        except (DockerAPIError, httpx.HTTPError, OSError):
+            return None
+        memory = data.get("memory_stats") or {}
+        if "usage" not in memory:
+            return None  # Not running
+        # Same accounting as `docker stats`: page cache that can be reclaimed doesn't count
+        inactive = (memory.get("stats") or {}).get("inactive_file", 0)
+        return ResourceSample(
+            cpu_usec=int(data["cpu_stats"]["cpu_usage"]["total_usage"]) // 1000,
+            memory_bytes=memory["usage"] - inactive,
+            memory_peak_bytes=memory.get("max_usage"),
+        )
+    if name not in _cgroup_dirs:
+        _cgroup_dirs[name] = await _find_cgroup_dir(name)
+    cgroup = _cgroup_dirs[name]
+    return read_cgroup_sample(cgroup) if cgroup else None
+
+
+def forget_container_stats(name: str) -> None:
+    """Drop what container_stats() cached about a container once its run is over."""
+    _cgroup_dirs.pop(name, None)
+
+
+async def _find_cgroup_dir(name: str) -> Path | None:
+    proc = await asyncio.create_subprocess_exec(
+        CONTAINER_RUNTIME_BIN, "inspect", "--format", "{{.Id}}", name,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await proc.communicate()
+    container_id = stdout.decode().strip()
+    if proc.returncode != 0 or not container_id:
+        return None
+    # systemd cgroup driver, then cgroupfs
+    for candidate in (CGROUP_ROOT / "system.slice" / f"docker-{container_id}.scope", CGROUP_ROOT / "docker" / container_id):
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+async def container_events(name_prefix: str):
+    """Yield lifecycle events (start/die/destroy...) for containers named ``name_prefix*``. API backend only."""
+    if _backend != "api":
+        raise RuntimeError("Container events require the Docker API backend")
+    async for event in _docker_client().events({"type": ["container"]}):
+        if event.get("Actor", {}).get("Attributes", {}).get("name", "").startswith(name_prefix):
+            yield event
+
+
 def ensure_container_runtime_running() -> None:
-    """Ensure the container runtime is running, starting it if needed."""
+    """Ensure the container runtime is running, starting it if needed.
+
+    Selects the Engine API backend when the Docker socket answers, otherwise the CLI.
+    """
+    global _backend
+    if CONTAINER_RUNTIME_BACKEND in ("auto", "api") and _ping_socket(DOCKER_SOCKET):
+        _backend = "api"
+        logger.debug("Container runtime reachable via Docker API", socket=DOCKER_SOCKET)
+        return
+    if CONTAINER_RUNTIME_BACKEND == "api":
+        logger.warning("Docker API socket unreachable, falling back to CLI", socket=DOCKER_SOCKET)
+    _backend = "cli"
     try:
         subprocess.run(
             [CONTAINER_RUNTIME_BIN, "info"],
@@ -49,15 +371,21 @@ def ensure_container_runtime_running() -> None:
         raise RuntimeError("Container runtime is required but failed to start") from err
 
 
-def cleanup_orphans() -> None:
-    """Kill orphaned ClawCode containers from previous runs."""
+def cleanup_orphans(keep: Collection[str] = (), candidates: Collection[str] | None = None) -> None:
+    """Kill orphaned ClawCode containers from previous runs (except those named in ``keep``).
+
+    With ``candidates``, only those names are considered instead of every
+    running ``clawcode-*`` container, so runs started since they were listed are safe.
+    """
     try:
-        result = subprocess.run(
-            [CONTAINER_RUNTIME_BIN, "ps", "--filter", "name=clawcode-", "--format", "{{.Names}}"],
-            capture_output=True,
-            text=True,
-        )
-        orphans = [name for name in result.stdout.strip().split("\n") if name]
+        if candidates is None:
+            result = subprocess.run(
+                [CONTAINER_RUNTIME_BIN, "ps", "--filter", "name=clawcode-", "--format", "{{.Names}}"],
+                capture_output=True,
+                text=True,
+            )
+            candidates = result.stdout.strip().split("\n")
+        orphans = [name for name in candidates if name and name not in keep]
         for name in orphans:
             try:
                 subprocess.run(
@@ -1,23 +1,94 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
 import json
 import sqlite3
+from collections.abc import Callable
+from concurrent.futures import Future
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
 
 from clawcode.config import ASSISTANT_NAME, DATA_DIR, STORE_DIR
+from clawcode.db_writer import DbWriter, configure_connection
 from clawcode.group_folder import is_valid_group_folder
 from clawcode.logger import logger
-from clawcode.models import NewMessage, RegisteredGroup, ScheduledTask, TaskRunLog
+from clawcode.models import (
+    AgentRun,
+    ContainerRun,
+    NewMessage,
+    RegisteredGroup,
+    RepoMaintenanceLog,
+    ScheduledTask,
+    TaskRunLog,
+)
 
-_db: sqlite3.Connection | None = None
+_db: sqlite3.Connection | None = None  # Reads (and writes, when there is no writer thread)
+_writer: DbWriter | None = None
+# Bumped on every mutation of what the per-group IPC snapshots show; never reset,
+# so a snapshot written against an earlier database is never mistaken as current.
+_snapshot_versions = {"tasks": 0, "groups": 0}
+
+
+def snapshot_version(kind: str) -> int:
+    """Change counter for ``"tasks"`` (scheduled tasks) or ``"groups"`` (chats / registered groups)."""
+    return _snapshot_versions[kind]
+
+
+def _bump_snapshot_version(*kinds: str) -> None:
+    for kind in kinds:
+        _snapshot_versions[kind] += 1
 
 
 def _get_db() -> sqlite3.Connection:
+    """The read connection. It sees committed writes only: ``await flush_writes()`` first to read your own."""
     if _db is None:
         raise RuntimeError("Database not initialized. Call init_database() first.")
     return _db
 
 
+def _write(fn: Callable[[sqlite3.Connection], Any], snapshot: str | None = None) -> Future:
+    """Run ``fn(conn)`` on the writer thread, batched into its next group commit.
+
+    Returns a future for ``fn``'s result; callers that report success should
+    ``await committed(...)`` it. ``snapshot`` names the snapshot version to bump
+    once the write is committed, so a snapshot never pairs a new version with
+    old data. Without a writer thread (the in-memory test database) the write
+    is committed right away.
+    """
+    if _db is None:
+        raise RuntimeError("Database not initialized. Call init_database() first.")
+    if _writer:
+        future = _writer.submit(fn)
+    else:
+        future = Future()
+        try:
+            future.set_result(fn(_db))
+            _db.commit()
+        except Exception as err:
+            _db.rollback()
+            future.set_exception(err)
+    if snapshot:
+        future.add_done_callback(lambda _: _bump_snapshot_version(snapshot))
+    return future
+
+
+async def committed(write: Future) -> Any:
+    """Wait for one write to commit without blocking the event loop; raises if it failed."""
+    return await asyncio.wrap_future(write)
+
+
+async def flush_writes() -> None:
+    """Wait until every write so far is committed, without blocking the event loop."""
+    if _writer:
+        await _writer.flush()
+
+
+def db_writer_stats() -> dict[str, Any]:
+    return _writer.stats() if _writer else {}
+
+
 def _create_schema(database: sqlite3.Connection) -> None:
     database.executescript("""
         CREATE TABLE IF NOT EXISTS chats (
@@ -36,10 +107,17 @@ def _create_schema(database: sqlite3.Connection) -> None:
             timestamp TEXT,
             is_from_me INTEGER,
             is_bot_message INTEGER DEFAULT 0,
+            seq INTEGER,  -- Per-thread arrival order, what thread cursors point at
             PRIMARY KEY (id, chat_jid),
             FOREIGN KEY (chat_jid) REFERENCES chats(jid)
         );
-        CREATE INDEX IF NOT EXISTS idx_timestamp ON messages(timestamp);
+        DROP INDEX IF EXISTS idx_timestamp;
+        DROP INDEX IF EXISTS idx_messages_chat_timestamp;
+
+        CREATE TABLE IF NOT EXISTS thread_cursors (
+            chat_jid TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL  -- Last message seq handed to the agent
+        );
 
         CREATE TABLE IF NOT EXISTS scheduled_tasks (
             id TEXT PRIMARY KEY,
@@ -54,8 +132,12 @@ def _create_schema(database: sqlite3.Connection) -> None:
             status TEXT DEFAULT 'active',
             created_at TEXT NOT NULL
         );
-        CREATE INDEX IF NOT EXISTS idx_next_run ON scheduled_tasks(next_run);
-        CREATE INDEX IF NOT EXISTS idx_status ON scheduled_tasks(status);
+        -- get_due_tasks only ever looks at active tasks with a next run
+        CREATE INDEX IF NOT EXISTS idx_due_tasks ON scheduled_tasks(next_run)
+            WHERE status = 'active' AND next_run IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS idx_tasks_group ON scheduled_tasks(group_folder, created_at);
+        DROP INDEX IF EXISTS idx_next_run;
+        DROP INDEX IF EXISTS idx_status;
 
         CREATE TABLE IF NOT EXISTS task_run_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -91,6 +173,57 @@ def _create_schema(database: sqlite3.Connection) -> None:
             delivery_id TEXT PRIMARY KEY,
             processed_at TEXT NOT NULL
         );
+        CREATE INDEX IF NOT EXISTS idx_processed_at ON processed_events(processed_at);
+
+        CREATE TABLE IF NOT EXISTS repo_maintenance_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            checkout TEXT NOT NULL,
+            task TEXT NOT NULL,
+            run_at TEXT NOT NULL,
+            duration_ms INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_repo_maintenance_logs ON repo_maintenance_logs(checkout, run_at);
+
+        CREATE TABLE IF NOT EXISTS agent_runs (
+            id TEXT PRIMARY KEY,
+            chat_jid TEXT NOT NULL,
+            group_folder TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            duration_ms INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            container_name TEXT,
+            runtime TEXT,
+            cpus REAL,
+            memory_limit_bytes INTEGER,
+            cpu_ms INTEGER,
+            peak_memory_bytes INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_agent_runs ON agent_runs(started_at);
+
+        CREATE TABLE IF NOT EXISTS agent_run_phases (
+            run_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            at_ms INTEGER NOT NULL,
+            elapsed_ms INTEGER NOT NULL,
+            PRIMARY KEY (run_id, seq),
+            FOREIGN KEY (run_id) REFERENCES agent_runs(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS container_runs (
+            container_name TEXT PRIMARY KEY,
+            chat_jid TEXT NOT NULL,
+            group_folder TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            session_id TEXT,
+            cursor INTEGER NOT NULL DEFAULT 0,
+            previous_cursor INTEGER NOT NULL DEFAULT 0,
+            outputs_delivered INTEGER NOT NULL DEFAULT 0,
+            task_id TEXT,
+            snapshot_root TEXT
+        );
     """)
 
     # Add context_mode column if it doesn't exist (migration for existing DBs)
@@ -102,12 +235,26 @@ def _create_schema(database: sqlite3.Connection) -> None:
     # Add is_bot_message column if it doesn't exist
     try:
         database.execute("ALTER TABLE messages ADD COLUMN is_bot_message INTEGER DEFAULT 0")
+    except sqlite3.OperationalError:
+        pass
+
+    # Bot messages are recognized by is_bot_message alone; flag old ones stored with just the name prefix (once)
+    if database.execute("PRAGMA user_version").fetchone()[0] < 1:
         database.execute(
-            "UPDATE messages SET is_bot_message = 1 WHERE content LIKE ?",
+            "UPDATE messages SET is_bot_message = 1 WHERE is_bot_message = 0 AND content LIKE ?",
             (f"{ASSISTANT_NAME}:%",),
         )
+        database.execute("PRAGMA user_version = 1")
+
+    # Number existing messages per thread, then turn timestamp cursors into seq cursors (once)
+    try:
+        database.execute("ALTER TABLE messages ADD COLUMN seq INTEGER")
     except sqlite3.OperationalError:
         pass
+    if database.execute("PRAGMA user_version").fetchone()[0] < 2:
+        _migrate_to_seq_cursors(database)
+        database.execute("PRAGMA user_version = 2")
+    database.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_chat_seq ON messages(chat_jid, seq)")
 
     # Add channel and is_group columns if they don't exist
     try:
@@ -117,17 +264,90 @@ def _create_schema(database: sqlite3.Connection) -> None:
     except sqlite3.OperationalError:
         pass
 
+    # Add resource profile / usage columns to agent_runs
+    try:
+        database.execute("ALTER TABLE agent_runs ADD COLUMN cpus REAL")
+        database.execute("ALTER TABLE agent_runs ADD COLUMN memory_limit_bytes INTEGER")
+        database.execute("ALTER TABLE agent_runs ADD COLUMN cpu_ms INTEGER")
+        database.execute("ALTER TABLE agent_runs ADD COLUMN peak_memory_bytes INTEGER")
+    except sqlite3.OperationalError:
+        pass
+
+    # Add scheduled task / workspace snapshot columns to container_runs
+    try:
+        database.execute("ALTER TABLE container_runs ADD COLUMN task_id TEXT")
+        database.execute("ALTER TABLE container_runs ADD COLUMN snapshot_root TEXT")
+    except sqlite3.OperationalError:
+        pass
+
     database.commit()
 
 
-def init_database() -> None:
-    global _db
-    db_path = STORE_DIR / "messages.db"
+def _migrate_to_seq_cursors(database: sqlite3.Connection) -> None:
+    database.execute(
+        """
+        UPDATE messages SET seq = numbered.n
+        FROM (
+            SELECT rowid AS rid, ROW_NUMBER() OVER (PARTITION BY chat_jid ORDER BY timestamp, rowid) AS n
+            FROM messages
+        ) AS numbered
+        WHERE messages.rowid = numbered.rid
+        """
+    )
+    last_seq_at = "SELECT COALESCE(MAX(seq), 0) FROM messages WHERE chat_jid = ? AND timestamp <= ?"
+    row = database.execute("SELECT value FROM router_state WHERE key = 'last_agent_timestamp'").fetchone()
+    try:
+        timestamps = json.loads(row[0]) if row else {}
+    except (json.JSONDecodeError, TypeError):
+        logger.warning("Corrupted last_agent_timestamp in DB, not migrated")
+        timestamps = {}
+    for chat_jid, timestamp in timestamps.items():
+        (seq,) = database.execute(last_seq_at, (chat_jid, timestamp)).fetchone()
+        database.execute("INSERT OR REPLACE INTO thread_cursors (chat_jid, seq) VALUES (?, ?)", (chat_jid, seq))
+    database.execute("DELETE FROM router_state WHERE key = 'last_agent_timestamp'")
+    for name, chat_jid, cursor, previous_cursor in database.execute(
+        "SELECT container_name, chat_jid, cursor, previous_cursor FROM container_runs"
+    ).fetchall():
+        database.execute(
+            "UPDATE container_runs SET cursor = ?, previous_cursor = ? WHERE container_name = ?",
+            (
+                database.execute(last_seq_at, (chat_jid, cursor)).fetchone()[0] if cursor else 0,
+                database.execute(last_seq_at, (chat_jid, previous_cursor)).fetchone()[0] if previous_cursor else 0,
+                name,
+            ),
+        )
+    if timestamps:
+        logger.info("Migrated message cursors to thread_cursors", threads=len(timestamps))
+
+
+def init_database(db_path: Path | None = None) -> None:
+    global _db, _writer
+    db_path = db_path or STORE_DIR / "messages.db"
     db_path.parent.mkdir(parents=True, exist_ok=True)
+    setup = sqlite3.connect(str(db_path))
+    configure_connection(setup)  # journal_mode=WAL is persistent
+    _create_schema(setup)
+    setup.close()
+
+    _writer = DbWriter(db_path)
+    atexit.register(close_database)
     _db = sqlite3.connect(str(db_path))
     _db.row_factory = sqlite3.Row
-    _create_schema(_db)
+    configure_connection(_db)
+    _db.execute("PRAGMA query_only = ON")  # Every write goes through the writer thread
     _migrate_json_state()
+    _bump_snapshot_version("tasks", "groups")
+
+
+def close_database() -> None:
+    """Commit pending writes and close both connections."""
+    global _db, _writer
+    if _writer:
+        _writer.close()
+        _writer = None
+    if _db:
+        _db.close()
+        _db = None
 
 
 def init_test_database() -> None:
@@ -136,6 +356,7 @@ def init_test_database() -> None:
     _db = sqlite3.connect(":memory:")
     _db.row_factory = sqlite3.Row
     _create_schema(_db)
+    _bump_snapshot_version("tasks", "groups")
 
 
 # --- Chat metadata ---
@@ -147,12 +368,11 @@ def store_chat_metadata(
     name: str | None = None,
     channel: str | None = None,
     is_group: bool | None = None,
-) -> None:
-    db = _get_db()
+) -> Future:
     group_val = None if is_group is None else (1 if is_group else 0)
 
     if name:
-        db.execute(
+        return _write(lambda db: db.execute(
             """
             INSERT INTO chats (jid, name, last_message_time, channel, is_group) VALUES (?, ?, ?, ?, ?)
             ON CONFLICT(jid) DO UPDATE SET
@@ -162,9 +382,9 @@ def store_chat_metadata(
                 is_group = COALESCE(excluded.is_group, is_group)
             """,
             (chat_jid, name, timestamp, channel, group_val),
-        )
+        ), snapshot="groups")
     else:
-        db.execute(
+        return _write(lambda db: db.execute(
             """
             INSERT INTO chats (jid, name, last_message_time, channel, is_group) VALUES (?, ?, ?, ?, ?)
             ON CONFLICT(jid) DO UPDATE SET
@@ -173,8 +393,7 @@ def store_chat_metadata(
                 is_group = COALESCE(excluded.is_group, is_group)
             """,
             (chat_jid, chat_jid, timestamp, channel, group_val),
-        )
-    db.commit()
+        ), snapshot="groups")
 
 
 def get_all_chats() -> list[dict]:
@@ -185,13 +404,39 @@ def get_all_chats() -> list[dict]:
     return [dict(r) for r in rows]
 
 
+def get_available_groups() -> list[dict]:
+    """Group chats as the main group's ``available_groups.json`` lists them."""
+    db = _get_db()
+    rows = db.execute(
+        """
+        SELECT c.jid, c.name, c.last_message_time AS lastActivity,
+               EXISTS(SELECT 1 FROM registered_groups r WHERE r.jid = c.jid) AS isRegistered
+        FROM chats c
+        WHERE c.is_group = 1 AND c.jid != '__group_sync__'
+        ORDER BY c.last_message_time DESC
+        """
+    ).fetchall()
+    return [{**dict(r), "isRegistered": bool(r["isRegistered"])} for r in rows]
+
+
 # --- Messages ---
 
 
 def store_message(msg: NewMessage) -> None:
-    db = _get_db()
-    db.execute(
-        "INSERT OR REPLACE INTO messages (id, chat_jid, sender, sender_name, content, timestamp, is_from_me, is_bot_message) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    """Insert (or update in place) a message; new ones get the next seq of their thread."""
+    is_bot_message = msg.is_bot_message or msg.content.startswith(f"{ASSISTANT_NAME}:")
+    _write(lambda db: db.execute(
+        """
+        INSERT INTO messages (id, chat_jid, sender, sender_name, content, timestamp, is_from_me, is_bot_message, seq)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM messages WHERE chat_jid = ?))
+        ON CONFLICT(id, chat_jid) DO UPDATE SET
+            sender = excluded.sender,
+            sender_name = excluded.sender_name,
+            content = excluded.content,
+            timestamp = excluded.timestamp,
+            is_from_me = excluded.is_from_me,
+            is_bot_message = excluded.is_bot_message
+        """,
         (
             msg.id,
             msg.chat_jid,
@@ -200,24 +445,24 @@ def store_message(msg: NewMessage) -> None:
             msg.content,
             msg.timestamp,
             1 if msg.is_from_me else 0,
-            1 if msg.is_bot_message else 0,
+            1 if is_bot_message else 0,
+            msg.chat_jid,
         ),
-    )
-    db.commit()
+    ))
 
 
-def get_messages_since(chat_jid: str, since_timestamp: str, bot_prefix: str) -> list[NewMessage]:
+def get_messages_since(chat_jid: str, since_seq: int) -> list[NewMessage]:
+    """Non-bot messages of ``chat_jid`` after cursor ``since_seq`` (a range scan of idx_messages_chat_seq)."""
     db = _get_db()
     rows = db.execute(
         """
-        SELECT id, chat_jid, sender, sender_name, content, timestamp
+        SELECT id, chat_jid, sender, sender_name, content, timestamp, seq
         FROM messages
-        WHERE chat_jid = ? AND timestamp > ?
-            AND is_bot_message = 0 AND content NOT LIKE ?
-            AND content != '' AND content IS NOT NULL
-        ORDER BY timestamp
+        WHERE chat_jid = ? AND seq > ?
+            AND is_bot_message = 0 AND content != '' AND content IS NOT NULL
+        ORDER BY seq
         """,
-        (chat_jid, since_timestamp, f"{bot_prefix}:%"),
+        (chat_jid, since_seq),
     ).fetchall()
     return [
         NewMessage(
@@ -227,17 +472,68 @@ def get_messages_since(chat_jid: str, since_timestamp: str, bot_prefix: str) ->
             sender_name=r["sender_name"],
             content=r["content"],
             timestamp=r["timestamp"],
+            seq=r["seq"],
         )
         for r in rows
     ]
 
 
-# --- Scheduled tasks ---
+# --- Thread cursors ---
 
 
-def create_task(task: ScheduledTask) -> None:
+def get_thread_cursor(chat_jid: str) -> int:
+    """Seq of the last message of ``chat_jid`` handed to the agent (0: none yet)."""
     db = _get_db()
-    db.execute(
+    row = db.execute("SELECT seq FROM thread_cursors WHERE chat_jid = ?", (chat_jid,)).fetchone()
+    return row["seq"] if row else 0
+
+
+def set_thread_cursor(chat_jid: str, seq: int) -> None:
+    _write(lambda db: db.execute(
+        "INSERT INTO thread_cursors (chat_jid, seq) VALUES (?, ?) ON CONFLICT(chat_jid) DO UPDATE SET seq = excluded.seq",
+        (chat_jid, seq),
+    ))
+
+
+def advance_thread_cursor(chat_jid: str) -> None:
+    """Move the cursor past every message of ``chat_jid`` stored so far (e.g. one piped to a live container)."""
+    _write(lambda db: db.execute(
+        """
+        INSERT INTO thread_cursors (chat_jid, seq)
+        SELECT ?, COALESCE(MAX(seq), 0) FROM messages WHERE chat_jid = ?
+        ON CONFLICT(chat_jid) DO UPDATE SET seq = MAX(seq, excluded.seq)
+        """,
+        (chat_jid, chat_jid),
+    ))
+
+
+def get_threads_with_pending_messages() -> list[dict]:
+    """Every thread with non-bot messages past its cursor, oldest waiting first.
+
+    One query: each chat's cursor is joined to a range seek of
+    idx_messages_chat_seq, so the cost follows the backlog, not the history.
+    Rows: chat_jid, pending (message count), oldest (timestamp of the first one).
+    """
+    db = _get_db()
+    rows = db.execute(
+        """
+        SELECT m.chat_jid, COUNT(*) AS pending, MIN(m.timestamp) AS oldest
+        FROM chats c
+        LEFT JOIN thread_cursors t ON t.chat_jid = c.jid
+        JOIN messages m ON m.chat_jid = c.jid AND m.seq > COALESCE(t.seq, 0)
+        WHERE m.is_bot_message = 0 AND m.content != '' AND m.content IS NOT NULL
+        GROUP BY m.chat_jid
+        ORDER BY oldest
+        """
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+# --- Scheduled tasks ---
+
+
+def create_task(task: ScheduledTask) -> Future:
+    return _write(lambda db: db.execute(
         """
         INSERT INTO scheduled_tasks (id, group_folder, chat_jid, prompt, schedule_type, schedule_value, context_mode, next_run, status, created_at)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -254,8 +550,7 @@ def create_task(task: ScheduledTask) -> None:
             task.status,
             task.created_at,
         ),
-    )
-    db.commit()
+    ), snapshot="tasks")
 
 
 def get_task_by_id(task_id: str) -> ScheduledTask | None:
@@ -272,8 +567,22 @@ def get_all_tasks() -> list[ScheduledTask]:
     return [ScheduledTask(**dict(r)) for r in rows]
 
 
-def update_task(task_id: str, **updates: str | None) -> None:
+def get_task_snapshot(group_folder: str | None = None) -> list[dict]:
+    """Tasks as ``current_tasks.json`` lists them: one group's, or all (``None``) for main."""
     db = _get_db()
+    query = """
+        SELECT id, group_folder AS groupFolder, prompt, schedule_type, schedule_value, status, next_run
+        FROM scheduled_tasks
+    """
+    if group_folder is None:
+        rows = db.execute(query + " ORDER BY created_at DESC").fetchall()
+    else:
+        rows = db.execute(query + " WHERE group_folder = ? ORDER BY created_at DESC", (group_folder,)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def update_task(task_id: str, **updates: str | None) -> Future | None:
+    """None if no allowed field was given (nothing to write)."""
     allowed = {"prompt", "schedule_type", "schedule_value", "next_run", "status"}
     fields = []
     values: list = []
@@ -283,18 +592,18 @@ def update_task(task_id: str, **updates: str | None) -> None:
             values.append(val)
 
     if not fields:
-        return
+        return None
 
     values.append(task_id)
-    db.execute(f"UPDATE scheduled_tasks SET {', '.join(fields)} WHERE id = ?", values)
-    db.commit()
+    return _write(lambda db: db.execute(f"UPDATE scheduled_tasks SET {', '.join(fields)} WHERE id = ?", values), snapshot="tasks")
 
 
-def delete_task(task_id: str) -> None:
-    db = _get_db()
-    db.execute("DELETE FROM task_run_logs WHERE task_id = ?", (task_id,))
-    db.execute("DELETE FROM scheduled_tasks WHERE id = ?", (task_id,))
-    db.commit()
+def delete_task(task_id: str) -> Future:
+    def write(db: sqlite3.Connection) -> None:
+        db.execute("DELETE FROM task_run_logs WHERE task_id = ?", (task_id,))
+        db.execute("DELETE FROM scheduled_tasks WHERE id = ?", (task_id,))
+
+    return _write(write, snapshot="tasks")
 
 
 def get_due_tasks() -> list[ScheduledTask]:
@@ -311,30 +620,26 @@ def get_due_tasks() -> list[ScheduledTask]:
     return [ScheduledTask(**dict(r)) for r in rows]
 
 
-def update_task_after_run(task_id: str, next_run: str | None, last_result: str) -> None:
-    db = _get_db()
+def update_task_after_run(task_id: str, next_run: str | None, last_result: str) -> Future:
     now = datetime.now(timezone.utc).isoformat()
-    db.execute(
+    return _write(lambda db: db.execute(
         """
         UPDATE scheduled_tasks
         SET next_run = ?, last_run = ?, last_result = ?, status = CASE WHEN ? IS NULL THEN 'completed' ELSE status END
         WHERE id = ?
         """,
         (next_run, now, last_result, next_run, task_id),
-    )
-    db.commit()
+    ), snapshot="tasks")
 
 
 def log_task_run(log: TaskRunLog) -> None:
-    db = _get_db()
-    db.execute(
+    _write(lambda db: db.execute(
         """
         INSERT INTO task_run_logs (task_id, run_at, duration_ms, status, result, error)
         VALUES (?, ?, ?, ?, ?, ?)
         """,
         (log.task_id, log.run_at, log.duration_ms, log.status, log.result, log.error),
-    )
-    db.commit()
+    ))
 
 
 # --- Router state ---
@@ -347,9 +652,7 @@ def get_router_state(key: str) -> str | None:
 
 
 def set_router_state(key: str, value: str) -> None:
-    db = _get_db()
-    db.execute("INSERT OR REPLACE INTO router_state (key, value) VALUES (?, ?)", (key, value))
-    db.commit()
+    _write(lambda db: db.execute("INSERT OR REPLACE INTO router_state (key, value) VALUES (?, ?)", (key, value)))
 
 
 # --- Sessions ---
@@ -364,12 +667,10 @@ def get_session(group_folder: str) -> str | None:
 
 
 def set_session(group_folder: str, session_id: str) -> None:
-    db = _get_db()
-    db.execute(
+    _write(lambda db: db.execute(
         "INSERT OR REPLACE INTO sessions (group_folder, session_id) VALUES (?, ?)",
         (group_folder, session_id),
-    )
-    db.commit()
+    ))
 
 
 def get_all_sessions() -> dict[str, str]:
@@ -406,13 +707,12 @@ def get_registered_group(jid: str) -> RegisteredGroup | None:
     )
 
 
-def set_registered_group(jid: str, group: RegisteredGroup) -> None:
+def set_registered_group(jid: str, group: RegisteredGroup) -> Future:
     if not is_valid_group_folder(group.folder):
         raise ValueError(f'Invalid group folder "{group.folder}" for JID {jid}')
-    db = _get_db()
     container_config_json = json.dumps(group.container_config.model_dump()) if group.container_config else None
     requires_trigger_val = 1 if group.requires_trigger is None else (1 if group.requires_trigger else 0)
-    db.execute(
+    return _write(lambda db: db.execute(
         """INSERT OR REPLACE INTO registered_groups (jid, name, folder, trigger_pattern, added_at, container_config, requires_trigger)
          VALUES (?, ?, ?, ?, ?, ?, ?)""",
         (
@@ -424,8 +724,7 @@ def set_registered_group(jid: str, group: RegisteredGroup) -> None:
             container_config_json,
             requires_trigger_val,
         ),
-    )
-    db.commit()
+    ), snapshot="groups")
 
 
 def get_all_registered_groups() -> dict[str, RegisteredGroup]:
@@ -463,22 +762,156 @@ def is_event_processed(delivery_id: str) -> bool:
     return row is not None
 
 
-def mark_event_processed(delivery_id: str) -> None:
-    db = _get_db()
-    db.execute(
+def mark_event_processed(delivery_id: str) -> Future:
+    """Resolves to True if the delivery was new, False if it was already marked."""
+    return _write(lambda db: db.execute(
         "INSERT OR IGNORE INTO processed_events (delivery_id, processed_at) VALUES (?, ?)",
         (delivery_id, datetime.now(timezone.utc).isoformat()),
-    )
-    db.commit()
+    ).rowcount == 1)
 
 
 def cleanup_processed_events(max_age_ms: int = 86_400_000) -> None:
+    cutoff = datetime.fromtimestamp(
+        (datetime.now(timezone.utc).timestamp() * 1000 - max_age_ms) / 1000, tz=timezone.utc
+    ).isoformat()
+    _write(lambda db: db.execute("DELETE FROM processed_events WHERE processed_at < ?", (cutoff,)))
+
+
+# --- Repo maintenance ---
+
+
+def log_repo_maintenance(log: RepoMaintenanceLog) -> None:
+    _write(lambda db: db.execute(
+        """
+        INSERT INTO repo_maintenance_logs (checkout, task, run_at, duration_ms, status, error)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (log.checkout, log.task, log.run_at, log.duration_ms, log.status, log.error),
+    ))
+
+
+def get_last_repo_maintenance() -> dict[str, str]:
+    """Most recent maintenance run_at per checkout."""
     db = _get_db()
+    rows = db.execute(
+        "SELECT checkout, MAX(run_at) AS run_at FROM repo_maintenance_logs GROUP BY checkout"
+    ).fetchall()
+    return {r["checkout"]: r["run_at"] for r in rows}
+
+
+def cleanup_repo_maintenance_logs(max_age_ms: int = 30 * 86_400_000) -> None:
     cutoff = datetime.fromtimestamp(
         (datetime.now(timezone.utc).timestamp() * 1000 - max_age_ms) / 1000, tz=timezone.utc
     ).isoformat()
-    db.execute("DELETE FROM processed_events WHERE processed_at < ?", (cutoff,))
-    db.commit()
+    _write(lambda db: db.execute("DELETE FROM repo_maintenance_logs WHERE run_at < ?", (cutoff,)))
+
+
+# --- Agent run ledger ---
+
+
+def log_agent_run(run: AgentRun) -> None:
+    def write(db: sqlite3.Connection) -> None:
+        db.execute(
+            """
+            INSERT INTO agent_runs (id, chat_jid, group_folder, started_at, duration_ms, status, container_name, runtime,
+                                    cpus, memory_limit_bytes, cpu_ms, peak_memory_bytes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                run.id, run.chat_jid, run.group_folder, run.started_at, run.duration_ms, run.status, run.container_name, run.runtime,
+                run.cpus, run.memory_limit_bytes, run.cpu_ms, run.peak_memory_bytes,
+            ),
+        )
+        db.executemany(
+            "INSERT INTO agent_run_phases (run_id, seq, phase, at_ms, elapsed_ms) VALUES (?, ?, ?, ?, ?)",
+            [(run.id, seq, p.phase, p.at_ms, p.elapsed_ms) for seq, p in enumerate(run.phases)],
+        )
+
+    _write(write)
+
+
+def get_agent_run_phases(since: str, group_folder: str | None = None) -> list[dict]:
+    """Phase timings of runs started at or after ``since``: group_folder, runtime, phase, elapsed_ms."""
+    db = _get_db()
+    query = """
+        SELECT r.group_folder, r.runtime, p.phase, p.elapsed_ms
+        FROM agent_runs r JOIN agent_run_phases p ON p.run_id = r.id
+        WHERE r.started_at >= ?
+    """
+    params: list[str] = [since]
+    if group_folder:
+        query += " AND r.group_folder = ?"
+        params.append(group_folder)
+    rows = db.execute(query + " ORDER BY r.started_at, p.seq", params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_agent_run_usage(since: str, group_folder: str | None = None) -> list[dict]:
+    """Sampled usage of runs started at or after ``since``: group_folder, cpus, memory_limit_bytes, cpu_ms, peak_memory_bytes."""
+    db = _get_db()
+    query = """
+        SELECT group_folder, cpus, memory_limit_bytes, cpu_ms, peak_memory_bytes
+        FROM agent_runs
+        WHERE started_at >= ? AND cpu_ms IS NOT NULL
+    """
+    params: list[str] = [since]
+    if group_folder:
+        query += " AND group_folder = ?"
+        params.append(group_folder)
+    rows = db.execute(query + " ORDER BY started_at", params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def cleanup_agent_runs(max_age_ms: int = 30 * 86_400_000) -> None:
+    cutoff = datetime.fromtimestamp(
+        (datetime.now(timezone.utc).timestamp() * 1000 - max_age_ms) / 1000, tz=timezone.utc
+    ).isoformat()
+
+    def write(db: sqlite3.Connection) -> None:
+        db.execute("DELETE FROM agent_run_phases WHERE run_id IN (SELECT id FROM agent_runs WHERE started_at < ?)", (cutoff,))
+        db.execute("DELETE FROM agent_runs WHERE started_at < ?", (cutoff,))
+
+    _write(write)
+
+
+# --- Container run registry ---
+
+
+def register_container_run(run: ContainerRun) -> None:
+    _write(lambda db: db.execute(
+        """
+        INSERT OR REPLACE INTO container_runs
+            (container_name, chat_jid, group_folder, started_at, session_id, cursor, previous_cursor, outputs_delivered,
+             task_id, snapshot_root)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            run.container_name, run.chat_jid, run.group_folder, run.started_at, run.session_id,
+            run.cursor, run.previous_cursor, run.outputs_delivered, run.task_id, run.snapshot_root,
+        ),
+    ))
+
+
+def record_container_run_output(container_name: str, session_id: str | None = None) -> None:
+    """Count one delivered result (and keep the latest session id)."""
+    _write(lambda db: db.execute(
+        """
+        UPDATE container_runs
+        SET outputs_delivered = outputs_delivered + 1, session_id = COALESCE(?, session_id)
+        WHERE container_name = ?
+        """,
+        (session_id, container_name),
+    ))
+
+
+def delete_container_run(container_name: str) -> None:
+    _write(lambda db: db.execute("DELETE FROM container_runs WHERE container_name = ?", (container_name,)))
+
+
+def get_container_runs() -> list[ContainerRun]:
+    db = _get_db()
+    rows = db.execute("SELECT * FROM container_runs ORDER BY started_at").fetchall()
+    return [ContainerRun(**dict(row)) for row in rows]
 
 
 # --- JSON migration ---
@@ -501,8 +934,14 @@ def _migrate_json_state() -> None:
     if router_state:
         if router_state.get("last_timestamp"):
             set_router_state("last_timestamp", router_state["last_timestamp"])
-        if router_state.get("last_agent_timestamp"):
-            set_router_state("last_agent_timestamp", json.dumps(router_state["last_agent_timestamp"]))
+        for chat_jid, timestamp in (router_state.get("last_agent_timestamp") or {}).items():
+            _write(lambda db, chat_jid=chat_jid, timestamp=timestamp: db.execute(
+                """
+                INSERT OR REPLACE INTO thread_cursors (chat_jid, seq)
+                SELECT ?, COALESCE(MAX(seq), 0) FROM messages WHERE chat_jid = ? AND timestamp <= ?
+                """,
+                (chat_jid, chat_jid, timestamp),
+            ))
 
     # Migrate sessions.json
     sessions = migrate_file("sessions.json")
@@ -0,0 +1,139 @@
+"""Database Writer.
+
+Owns the SQLite write connection on a dedicated thread so commits (and their
+fsyncs) never run on the event loop. Writes are queued as functions of the
+connection; the thread runs whatever has accumulated in one transaction (a
+group commit), each write inside its own savepoint so a failing one is rolled
+back and reported without taking the rest of the batch with it.
+
+The database runs in WAL mode, so the read connection used on the event loop
+sees every committed write without blocking on the writer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any
+
+from clawcode.logger import logger
+
+MAX_BATCH = 512  # Writes per transaction
+
+Write = Callable[[sqlite3.Connection], Any]
+
+
+def configure_connection(conn: sqlite3.Connection) -> None:
+    """Pragmas shared by the read and write connections."""
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")  # In WAL mode: durable up to the last checkpointed commit on power loss
+    conn.execute("PRAGMA busy_timeout = 5000")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -16000")  # 16 MiB
+
+
+class DbWriter:
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._queue: queue.SimpleQueue[tuple[Write, Future] | None] = queue.SimpleQueue()
+        self._last: Future | None = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._ready = Future()
+        # Group commit metrics
+        self.writes = 0
+        self.batches = 0
+        self.failed = 0
+        self._thread.start()
+        self._ready.result()  # Surface connection errors to the caller
+
+    def submit(self, fn: Write) -> Future:
+        """Queue ``fn(conn)``; the future resolves to its result once committed."""
+        future: Future = Future()
+        with self._lock:
+            self._queue.put((fn, future))
+            self._last = future
+        return future
+
+    async def flush(self) -> None:
+        """Wait, without blocking the event loop, until every write submitted so far is committed."""
+        last = self._last
+        if last is not None and not last.done():
+            await asyncio.wait([asyncio.wrap_future(last)])
+
+    def close(self) -> None:
+        """Commit what's queued, then stop the thread and close its connection."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "writes": self.writes,
+            "batches": self.batches,
+            "failed": self.failed,
+            "writes_per_commit": round(self.writes / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _run(self) -> None:
+        try:
+            conn = sqlite3.connect(str(self._path), isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            configure_connection(conn)
+        except Exception as err:
+            self._ready.set_exception(err)
+            return
+        self._ready.set_result(None)
+
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < MAX_BATCH:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+        conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: list[tuple[Write, Future]]) -> None:
+        outcomes: list[tuple[Future, Any, BaseException | None]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, future in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    result = fn(conn)
+                    conn.execute("RELEASE write")
+                    outcomes.append((future, result, None))
+                except Exception as err:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    outcomes.append((future, None, err))
+            conn.execute("COMMIT")
+        except Exception as err:
+            # The transaction itself failed (e.g. disk full): nothing in the batch was written
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            outcomes = [(future, None, err) for _, future in batch]
+
+        self.batches += 1
+        for future, result, error in outcomes:
+            self.writes += 1
+            if error is None:
+                future.set_result(result)
+            else:
+                self.failed += 1
+                logger.error("Database write failed", error=str(error))
+                future.set_exception(error)
@@ -0,0 +1,294 @@
+"""Docker Engine API client over the daemon's unix socket.
+
+Used by container_runtime instead of shelling out to the docker CLI. Regular
+requests share one pooled httpx connection pool; attach uses a dedicated
+hijacked connection because httpx can't hand back the raw stream after an
+HTTP upgrade.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+from collections.abc import AsyncIterator
+from urllib.parse import quote, urlencode
+
+import httpx
+
+API_VERSION = "v1.41"
+
+STREAM_STDIN = 0
+STREAM_STDOUT = 1
+STREAM_STDERR = 2
+
+ATTACH_DRAIN_TIMEOUT = 10.0  # Secs after exit to wait for the daemon to end the attach stream
+
+
+class DockerAPIError(RuntimeError):
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(f"Docker API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+def _check(response: httpx.Response) -> None:
+    if response.status_code >= 400:
+        try:
+            message = response.json().get("message", response.text)
+        except ValueError:
+            message = response.text
+        raise DockerAPIError(response.status_code, message)
+
+
+class _AttachedStdin:
+    """Write side of an attach connection. ``close`` half-closes so the container sees EOF."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self._writer = writer
+
+    def write(self, data: bytes) -> None:
+        self._writer.write(data)
+
+    def close(self) -> None:
+        if self._writer.can_write_eof() and not self._writer.is_closing():
+            self._writer.write_eof()
+
+
+async def demux_stream(reader: asyncio.StreamReader, stdout: asyncio.StreamReader, stderr: asyncio.StreamReader) -> None:
+    """Split a non-TTY attach stream into stdout/stderr.
+
+    Each frame is an 8-byte header ``[stream, 0, 0, 0, size(uint32 BE)]`` followed by the payload.
+    """
+    try:
+        while True:
+            header = await reader.readexactly(8)
+            stream, size = header[0], struct.unpack(">I", header[4:])[0]
+            payload = await reader.readexactly(size) if size else b""
+            (stderr if stream == STREAM_STDERR else stdout).feed_data(payload)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        stdout.feed_eof()
+        stderr.feed_eof()
+
+
+class ContainerProcess:
+    """An attached container with the subset of asyncio.subprocess.Process the runner uses."""
+
+    def __init__(
+        self,
+        client: DockerClient,
+        container_id: str,
+        writer: asyncio.StreamWriter,
+        stdout: asyncio.StreamReader,
+        stderr: asyncio.StreamReader,
+        demux: asyncio.Task,
+        waiter: asyncio.Task,
+    ) -> None:
+        self.container_id = container_id
+        self.pid: int | None = None
+        self.stdin = _AttachedStdin(writer)
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode: int | None = None
+        self._client = client
+        self._writer = writer
+        self._demux = demux
+        self._waiter = waiter
+        self._closer = asyncio.ensure_future(self._close_after_exit())
+
+    async def _close_after_exit(self) -> None:
+        await asyncio.wait([self._waiter])
+        task = self._waiter
+        self.returncode = task.result() if not task.cancelled() and not task.exception() else -1
+        # /wait answers on its own connection, possibly before the last frames (the result)
+        # are read off the attach stream. The daemon ends that stream itself once the
+        # container is gone; only force it closed if that doesn't happen.
+        try:
+            await asyncio.wait_for(asyncio.shield(self._demux), timeout=ATTACH_DRAIN_TIMEOUT)
+        except TimeoutError:
+            pass
+        finally:
+            self._writer.close()
+        await self._demux
+
+    async def wait(self) -> int:
+        await asyncio.shield(self._closer)
+        return self.returncode if self.returncode is not None else -1
+
+    def kill(self) -> None:
+        asyncio.ensure_future(self._client.kill(self.container_id))
+
+
+class DockerClient:
+    def __init__(self, socket_path: str) -> None:
+        self.socket_path = socket_path
+        self._http: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            self._http = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=self.socket_path),
+                base_url=f"http://docker/{API_VERSION}",
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=8),
+            )
+            self._loop = loop
+        return self._http
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def ping(self) -> bool:
+        response = await self.http.get("/_ping")
+        return response.status_code == 200
+
+    async def create(self, name: str, config: dict) -> str:
+        response = await self.http.post("/containers/create", params={"name": name}, json=config)
+        _check(response)
+        return response.json()["Id"]
+
+    async def start(self, container_id: str) -> None:
+        response = await self.http.post(f"/containers/{container_id}/start")
+        if response.status_code != 304:  # Already started
+            _check(response)
+
+    async def wait(self, container_id: str, condition: str = "next-exit") -> int:
+        return await (await self.register_wait(container_id, condition))
+
+    async def register_wait(self, container_id: str, condition: str = "next-exit") -> asyncio.Task[int]:
+        """Send a wait request and return once the daemon has registered it.
+
+        The daemon sends the response headers as soon as the wait is in
+        place and the body when the condition is met. The returned task
+        resolves to the exit code.
+        """
+        request = self.http.build_request(
+            "POST",
+            f"/containers/{container_id}/wait",
+            params={"condition": condition},
+            timeout=httpx.Timeout(30.0, read=None),
+        )
+        response = await self.http.send(request, stream=True)
+
+        async def exit_code() -> int:
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+            _check(response)
+            return int(response.json().get("StatusCode", -1))
+
+        return asyncio.create_task(exit_code())
+
+    async def stop(self, container_id: str, timeout_secs: int = 10) -> None:
+        response = await self.http.post(
+            f"/containers/{container_id}/stop",
+            params={"t": timeout_secs},
+            timeout=timeout_secs + 15,
+        )
+        if response.status_code not in (304, 404):  # Already stopped / already removed
+            _check(response)
+
+    async def kill(self, container_id: str) -> None:
+        response = await self.http.post(f"/containers/{container_id}/kill")
+        if response.status_code not in (404, 409):  # Gone / not running
+            _check(response)
+
+    async def remove(self, container_id: str, force: bool = False) -> None:
+        response = await self.http.delete(f"/containers/{container_id}", params={"force": int(force)})
+        if response.status_code != 404:
+            _check(response)
+
+    async def list(self, name_prefix: str | None = None, all: bool = False) -> list[dict]:
+        params: dict[str, str] = {"all": str(int(all))}
+        if name_prefix:
+            params["filters"] = json.dumps({"name": [name_prefix]})
+        response = await self.http.get("/containers/json", params=params)
+        _check(response)
+        return response.json()
+
+    async def stats(self, container_id: str) -> dict:
+        """One stats snapshot (cgroup CPU / memory counters) without the two-sample CPU delay."""
+        response = await self.http.get(
+            f"/containers/{container_id}/stats",
+            params={"stream": "false", "one-shot": "true"},
+        )
+        _check(response)
+        return response.json()
+
+    async def events(self, filters: dict[str, list[str]] | None = None) -> AsyncIterator[dict]:
+        """Stream daemon events until the caller stops iterating."""
+        params = {"filters": json.dumps(filters)} if filters else {}
+        async with self.http.stream("GET", "/events", params=params, timeout=httpx.Timeout(30.0, read=None)) as response:
+            _check(response)
+            async for line in response.aiter_lines():
+                if line:
+                    yield json.loads(line)
+
+    async def attach(
+        self, container_id: str, stdin: bool = True, logs: bool = False
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open a hijacked attach connection (stdin + stdout + stderr).
+
+        ``logs`` replays everything the container wrote before streaming what follows.
+        """
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        query = urlencode({"stream": 1, "stdin": int(stdin), "stdout": 1, "stderr": 1, "logs": int(logs)})
+        writer.write(
+            f"POST /{API_VERSION}/containers/{quote(container_id)}/attach?{query} HTTP/1.1\r\n"
+            "Host: docker\r\n"
+            "Connection: Upgrade\r\n"
+            "Upgrade: tcp\r\n"
+            "Content-Length: 0\r\n"
+            "\r\n".encode()
+        )
+        await writer.drain()
+        status_line = (await reader.readline()).decode(errors="replace")
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = status_line.split(" ", 2)
+        status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+        if status not in (101, 200):
+            writer.close()
+            raise DockerAPIError(status, f"attach failed: {status_line.strip()}")
+        return reader, writer
+
+    async def run_attached(self, name: str, config: dict) -> ContainerProcess:
+        """create → attach → wait → start, the same order as `docker run -i`, so no output is missed.
+
+        The wait is registered before start, so a container that exits at once is still seen exiting.
+        """
+        container_id = await self.create(name, config)
+        try:
+            reader, writer = await self.attach(container_id)
+        except BaseException:
+            await self.remove(container_id, force=True)
+            raise
+        stdout, stderr = asyncio.StreamReader(), asyncio.StreamReader()
+        demux = asyncio.create_task(demux_stream(reader, stdout, stderr))
+        auto_remove = config.get("HostConfig", {}).get("AutoRemove", False)
+        waiter: asyncio.Task | None = None
+        try:
+            waiter = await self.register_wait(container_id, "removed" if auto_remove else "next-exit")
+            await self.start(container_id)
+        except BaseException:
+            if waiter:
+                waiter.cancel()
+            writer.close()
+            await self.remove(container_id, force=True)
+            raise
+        return ContainerProcess(self, container_id, writer, stdout, stderr, demux, waiter)
+
+    async def reattach(self, container_id: str) -> ContainerProcess:
+        """Attach to a container that is already running, replaying its output from the start."""
+        reader, writer = await self.attach(container_id, stdin=False, logs=True)
+        stdout, stderr = asyncio.StreamReader(), asyncio.StreamReader()
+        demux = asyncio.create_task(demux_stream(reader, stdout, stderr))
+        waiter = asyncio.create_task(self.wait(container_id, "not-running"))
+        return ContainerProcess(self, container_id, writer, stdout, stderr, demux, waiter)
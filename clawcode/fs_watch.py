@@ -0,0 +1,93 @@
+"""Filesystem Watching.
+
+Minimal inotify(7) binding over ctypes (Linux only), used by the IPC watcher.
+The descriptor is non-blocking so it can be read from the event loop with
+``loop.add_reader``; nothing runs until the kernel reports an event.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+_libc: ctypes.CDLL | None = None
+
+
+def _load_libc() -> ctypes.CDLL:
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc = libc
+    return _libc
+
+
+@dataclass
+class WatchEvent:
+    path: Path | None  # Watched directory (None for IN_Q_OVERFLOW)
+    name: str  # Entry within it ("" for events on the directory itself)
+    mask: int
+
+
+class Inotify:
+    """An inotify instance. Raises OSError when inotify can't be used."""
+
+    def __init__(self) -> None:
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._paths: dict[int, Path] = {}  # Watch descriptor -> directory
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        self._paths[wd] = path
+        return wd
+
+    def read_events(self) -> list[WatchEvent]:
+        """Everything queued right now (empty if nothing is)."""
+        events: list[WatchEvent] = []
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                if mask & IN_IGNORED:
+                    self._paths.pop(wd, None)  # Directory removed (or watch dropped)
+                    continue
+                events.append(WatchEvent(self._paths.get(wd), name, mask))
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._paths.clear()
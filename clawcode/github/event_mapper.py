@@ -42,6 +42,23 @@ def parse_repo_from_jid(jid: str) -> tuple[str, str]:
     return parts[0], parts[1]
 
 
+def map_webhook_to_prefetch(event_name: str, payload: dict) -> str | None:
+    """Return the repo JID whose checkout a push/pull_request webhook makes stale, if any."""
+    if event_name == "push":
+        if payload.get("deleted"):
+            return None
+    elif event_name == "pull_request":
+        if payload.get("action") not in ("opened", "synchronize", "reopened", "closed"):
+            return None
+    else:
+        return None
+
+    repo = payload.get("repository")
+    if not repo or not payload.get("installation"):
+        return None
+    return f"gh:{repo['full_name']}"
+
+
 def map_webhook_to_event(
     event_name: str,
     payload: dict,
@@ -6,13 +6,12 @@ Manages per-group concurrency, message queuing, and container lifecycle.
 from __future__ import annotations
 
 import asyncio
-import json
-import os
 import time
 from dataclasses import dataclass, field
 from typing import Callable, Coroutine
 
-from clawcode.config import DATA_DIR, MAX_CONCURRENT_CONTAINERS
+from clawcode.config import MAX_CONCURRENT_CONTAINERS
+from clawcode.ipc_transport import socket_hub, write_input_file
 from clawcode.logger import logger
 
 MAX_RETRIES = 5
@@ -37,6 +36,9 @@ class GroupState:
     container_name: str | None = None
     group_folder: str | None = None
     retry_count: int = 0
+    enqueued_at: float | None = None  # First message check waiting for the next run
+    run_enqueued_at: float | None = None  # When the current run's work was enqueued
+    run_started_at: float | None = None  # When the current run got its slot
 
 
 class GroupQueue:
@@ -45,6 +47,7 @@ class GroupQueue:
         self._active_count = 0
         self._waiting_groups: list[str] = []
         self._process_messages_fn: Callable[[str], Coroutine[None, None, bool]] | None = None
+        self._concurrency_limit_fn: Callable[[], int] | None = None
         self._shutting_down = False
 
     def _get_group(self, group_jid: str) -> GroupState:
@@ -55,18 +58,36 @@ class GroupQueue:
     def set_process_messages_fn(self, fn: Callable[[str], Coroutine[None, None, bool]]) -> None:
         self._process_messages_fn = fn
 
+    def set_concurrency_limit_fn(self, fn: Callable[[], int]) -> None:
+        """Take the container slot limit from ``fn`` (e.g. the adaptive controller) instead of the config."""
+        self._concurrency_limit_fn = fn
+
+    def _concurrency_limit(self) -> int:
+        return self._concurrency_limit_fn() if self._concurrency_limit_fn else MAX_CONCURRENT_CONTAINERS
+
+    def load(self) -> tuple[int, int]:
+        """(active containers, groups waiting for a slot)."""
+        return self._active_count, len(self._waiting_groups)
+
+    def on_concurrency_limit_changed(self, limit: int) -> None:
+        """Start waiting groups if the limit went up; a lower limit takes effect as runs finish."""
+        if not self._shutting_down:
+            self._drain_waiting()
+
     def enqueue_message_check(self, group_jid: str) -> None:
         if self._shutting_down:
             return
 
         state = self._get_group(group_jid)
+        if state.enqueued_at is None:
+            state.enqueued_at = time.time()
 
         if state.active:
             state.pending_messages = True
             logger.debug("Container active, message queued", group_jid=group_jid)
             return
 
-        if self._active_count >= MAX_CONCURRENT_CONTAINERS:
+        if self._active_count >= self._concurrency_limit():
             state.pending_messages = True
             if group_jid not in self._waiting_groups:
                 self._waiting_groups.append(group_jid)
@@ -93,7 +114,7 @@ class GroupQueue:
             logger.debug("Container active, task queued", group_jid=group_jid, task_id=task_id)
             return
 
-        if self._active_count >= MAX_CONCURRENT_CONTAINERS:
+        if self._active_count >= self._concurrency_limit():
             state.pending_tasks.append(QueuedTask(id=task_id, group_jid=group_jid, fn=fn))
             if group_jid not in self._waiting_groups:
                 self._waiting_groups.append(group_jid)
@@ -103,11 +124,50 @@ class GroupQueue:
         self._activate(state)
         asyncio.ensure_future(self._run_task(group_jid, QueuedTask(id=task_id, group_jid=group_jid, fn=fn)))
 
+    def adopt(
+        self,
+        group_jid: str,
+        container_name: str,
+        group_folder: str,
+        fn: Callable[[str], Coroutine[None, None, bool]],
+        task_id: str | None = None,
+    ) -> bool:
+        """Give a container that outlived the previous host process its slot back.
+
+        ``fn`` streams the container to completion and, like the process-messages
+        function, returns False to retry. Adopted runs count against the limit.
+        With ``task_id`` the container is a scheduled task's: it runs as a task
+        (no piped messages) and ``fn``'s result is ignored. Returns False, without
+        adopting, if the group already holds a slot.
+        """
+        state = self._get_group(group_jid)
+        if state.active:
+            logger.warning("Group already active, not adopting container", group_jid=group_jid, container_name=container_name)
+            return False
+        self._activate(state)
+        state.container_name = container_name
+        state.group_folder = group_folder
+        if task_id:
+            task = QueuedTask(id=task_id, group_jid=group_jid, fn=lambda: fn(group_jid))
+            asyncio.ensure_future(self._run_task(group_jid, task))
+        else:
+            asyncio.ensure_future(self._run_for_group(group_jid, "adopted", fn))
+        return True
+
     def _activate(self, state: GroupState) -> None:
         """Mark a group slot as active synchronously before launching a future."""
         state.active = True
         self._active_count += 1
 
+    def active_jids(self) -> list[str]:
+        """JIDs that currently hold a container slot (including runs still preparing)."""
+        return [jid for jid, state in self._groups.items() if state.active]
+
+    def run_timing(self, group_jid: str) -> tuple[float | None, float | None]:
+        """(enqueued_at, slot_acquired_at) of the group's current message run."""
+        state = self._get_group(group_jid)
+        return state.run_enqueued_at, state.run_started_at
+
     def register_process(self, group_jid: str, proc: object, container_name: str, group_folder: str | None = None) -> None:
         state = self._get_group(group_jid)
         state.process = proc
@@ -127,41 +187,36 @@ class GroupQueue:
             return False
         state.idle_waiting = False
 
-        input_dir = DATA_DIR / "ipc" / state.group_folder / "input"
-        try:
-            input_dir.mkdir(parents=True, exist_ok=True)
-            filename = f"{int(time.time() * 1000)}-{os.urandom(3).hex()}.json"
-            filepath = input_dir / filename
-            temp_path = filepath.with_suffix(".json.tmp")
-            temp_path.write_text(json.dumps({"type": "message", "text": text}))
-            temp_path.rename(filepath)
-            return True
-        except Exception:
-            return False
+        message = {"type": "message", "text": text}
+        sent = bool(state.container_name) and socket_hub.send(state.container_name, message)
+        return sent or write_input_file(state.group_folder, message)
 
     def close_stdin(self, group_jid: str) -> None:
         state = self._get_group(group_jid)
         if not state.active or not state.group_folder:
             return
 
-        input_dir = DATA_DIR / "ipc" / state.group_folder / "input"
-        try:
-            input_dir.mkdir(parents=True, exist_ok=True)
-            (input_dir / "_close").write_text("")
-        except Exception:
-            pass
+        message = {"type": "close"}
+        if not (state.container_name and socket_hub.send(state.container_name, message)):
+            write_input_file(state.group_folder, message)
 
-    async def _run_for_group(self, group_jid: str, reason: str) -> None:
+    async def _run_for_group(
+        self, group_jid: str, reason: str, fn: Callable[[str], Coroutine[None, None, bool]] | None = None
+    ) -> None:
         state = self._get_group(group_jid)
         state.idle_waiting = False
         state.is_task_container = False
         state.pending_messages = False
+        state.run_started_at = time.time()
+        state.run_enqueued_at = state.enqueued_at or state.run_started_at
+        state.enqueued_at = None
 
         logger.debug("Starting container for group", group_jid=group_jid, reason=reason, active_count=self._active_count)
 
         try:
-            if self._process_messages_fn:
-                success = await self._process_messages_fn(group_jid)
+            process_fn = fn or self._process_messages_fn
+            if process_fn:
+                success = await process_fn(group_jid)
                 if success:
                     state.retry_count = 0
                 else:
@@ -230,7 +285,7 @@ class GroupQueue:
         self._drain_waiting()
 
     def _drain_waiting(self) -> None:
-        while self._waiting_groups and self._active_count < MAX_CONCURRENT_CONTAINERS:
+        while self._waiting_groups and self._active_count < self._concurrency_limit():
             next_jid = self._waiting_groups.pop(0)
             state = self._get_group(next_jid)
 
@@ -250,7 +305,7 @@ class GroupQueue:
             if state.process and state.container_name
         ]
         logger.info(
-            "GroupQueue shutting down (containers detached, not killed)",
+            "GroupQueue shutting down (containers detached, re-adopted on restart)",
             active_count=self._active_count,
             detached_containers=active_containers,
         )
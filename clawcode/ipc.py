@@ -1,6 +1,15 @@
 """IPC Watcher.
 
-Polls per-group IPC directories for messages and tasks written by container agents.
+Watches per-group IPC directories for messages and tasks written by container
+agents (the file transport; ipc_transport has the socket one). With inotify,
+a group's directories are only read when a completed ``.json`` file lands in
+them (plus a rescan every IPC_RESCAN_INTERVAL); elsewhere, or with
+IPC_WATCHER=poll, every group is polled each IPC_POLL_INTERVAL.
+
+Groups are drained by per-group consumers: files of one group are handled in
+order, while different groups proceed concurrently (at most
+IPC_MAX_CONCURRENT at a time), so one slow or rate-limited repo doesn't hold
+up everyone else's IPC.
 """
 
 from __future__ import annotations
@@ -10,14 +19,36 @@ import json
 import random
 import shutil
 import time
+from collections.abc import Awaitable
+from concurrent.futures import Future
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any, Callable, Coroutine
 
 from croniter import croniter
 
-from clawcode.config import DATA_DIR, IPC_POLL_INTERVAL, MAIN_GROUP_FOLDER
-from clawcode.db import create_task, delete_task, get_task_by_id, update_task
+from clawcode.config import (
+    DATA_DIR,
+    IPC_LAG_WARN,
+    IPC_MAX_CONCURRENT,
+    IPC_POLL_INTERVAL,
+    IPC_RESCAN_INTERVAL,
+    IPC_WATCHER,
+    MAIN_GROUP_FOLDER,
+)
+from clawcode.db import committed, create_task, delete_task, get_task_by_id, update_task
+from clawcode.fs_watch import (
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_ISDIR,
+    IN_MOVED_TO,
+    IN_ONLYDIR,
+    IN_Q_OVERFLOW,
+    Inotify,
+)
 from clawcode.group_folder import is_valid_group_folder
+from clawcode.ipc_transport import socket_hub
 from clawcode.logger import logger
 from clawcode.models import RegisteredGroup, ScheduledTask
 
@@ -28,7 +59,7 @@ class IpcDeps:
         send_message: Callable[[str, str], Coroutine],
         send_structured_message: Callable[[str, str, Any], Coroutine] | None,
         registered_groups: Callable[[], dict[str, RegisteredGroup]],
-        register_group: Callable[[str, RegisteredGroup], None],
+        register_group: Callable[[str, RegisteredGroup], Future | None],
         sync_group_metadata: Callable[[bool], Coroutine],
         get_available_groups: Callable[[], list[dict]],
         write_groups_snapshot: Callable[[str, bool, list[dict], set[str]], None],
@@ -42,11 +73,78 @@ class IpcDeps:
         self.write_groups_snapshot = write_groups_snapshot
 
 
+@dataclass
+class GroupIpcLag:
+    pending_since: float | None = None  # First wake-up not yet drained (monotonic)
+    drains: int = 0
+    last_lag_secs: float = 0.0  # Wake-up to drained, for the latest drain
+    max_lag_secs: float = 0.0
+
+
+class IpcDispatcher:
+    """Runs ``process_group`` on a per-group consumer task.
+
+    ``schedule`` marks a group dirty; its consumer drains it (again, if it was
+    marked while draining) and exits once clean. One consumer per group keeps
+    a group's files in order; a semaphore caps how many groups run at once.
+    """
+
+    def __init__(self, process_group: Callable[[str], Awaitable[None]], max_concurrent: int) -> None:
+        self._process_group = process_group
+        self._slots = asyncio.Semaphore(max(1, max_concurrent))
+        self._consumers: dict[str, asyncio.Task] = {}
+        self._lag: dict[str, GroupIpcLag] = {}
+
+    def schedule(self, source_group: str) -> None:
+        lag = self._lag.setdefault(source_group, GroupIpcLag())
+        if lag.pending_since is None:
+            lag.pending_since = time.monotonic()
+        if source_group not in self._consumers:
+            self._consumers[source_group] = asyncio.create_task(self._consume(source_group))
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-group lag: how long IPC files waited between wake-up and being handled."""
+        now = time.monotonic()
+        return {
+            source_group: {
+                "pending_secs": round(now - lag.pending_since, 3) if lag.pending_since is not None else 0.0,
+                "drains": lag.drains,
+                "last_lag_secs": round(lag.last_lag_secs, 3),
+                "max_lag_secs": round(lag.max_lag_secs, 3),
+            }
+            for source_group, lag in self._lag.items()
+        }
+
+    async def _consume(self, source_group: str) -> None:
+        lag = self._lag[source_group]
+        try:
+            while lag.pending_since is not None:
+                async with self._slots:
+                    since, lag.pending_since = lag.pending_since, None
+                    try:
+                        await self._process_group(source_group)
+                    except Exception as err:
+                        logger.error("Error draining IPC group", source_group=source_group, error=str(err))
+                lag.drains += 1
+                lag.last_lag_secs = time.monotonic() - since
+                lag.max_lag_secs = max(lag.max_lag_secs, lag.last_lag_secs)
+                if lag.last_lag_secs * 1000 > IPC_LAG_WARN:
+                    logger.warning("IPC delivery lagging", source_group=source_group, lag_secs=round(lag.last_lag_secs, 3))
+        finally:
+            del self._consumers[source_group]
+
+
 _ipc_watcher_running = False
+_dispatcher: IpcDispatcher | None = None
+
+
+def ipc_lag_stats() -> dict[str, dict[str, Any]]:
+    """Per-group IPC lag from the running watcher (empty before it starts)."""
+    return _dispatcher.stats() if _dispatcher else {}
 
 
 async def start_ipc_watcher(deps: IpcDeps) -> None:
-    global _ipc_watcher_running
+    global _ipc_watcher_running, _dispatcher
     if _ipc_watcher_running:
         logger.debug("IPC watcher already running, skipping duplicate start")
         return
@@ -55,95 +153,199 @@ async def start_ipc_watcher(deps: IpcDeps) -> None:
     ipc_base_dir = DATA_DIR / "ipc"
     ipc_base_dir.mkdir(parents=True, exist_ok=True)
 
-    async def process_ipc_files():
+    def list_group_folders() -> list[str]:
+        return [f.name for f in ipc_base_dir.iterdir() if f.is_dir() and f.name != "errors"]
+
+    async def process_group(source_group: str) -> None:
+        """Drain one group's messages/ and tasks/ directories."""
+        is_main = source_group == MAIN_GROUP_FOLDER
+        messages_dir = ipc_base_dir / source_group / "messages"
+        tasks_dir = ipc_base_dir / source_group / "tasks"
+
+        # Process messages
+        try:
+            if messages_dir.exists():
+                for file_path in sorted(messages_dir.glob("*.json")):
+                    try:
+                        data = json.loads(file_path.read_text())
+                        try:
+                            await handle_ipc_message(data, source_group, deps)
+                        except PermissionError:
+                            pass  # Logged; the file is dropped like any handled one
+                        file_path.unlink()
+                    except Exception as err:
+                        logger.error("Error processing IPC message", file=file_path.name, source_group=source_group, error=str(err))
+                        error_dir = ipc_base_dir / "errors"
+                        error_dir.mkdir(parents=True, exist_ok=True)
+                        shutil.move(str(file_path), str(error_dir / f"{source_group}-{file_path.name}"))
+        except Exception as err:
+            logger.error("Error reading IPC messages directory", source_group=source_group, error=str(err))
+
+        # Process tasks
+        try:
+            if tasks_dir.exists():
+                for file_path in sorted(tasks_dir.glob("*.json")):
+                    try:
+                        data = json.loads(file_path.read_text())
+                        await process_task_ipc(data, source_group, is_main, deps)
+                        file_path.unlink()
+                    except Exception as err:
+                        logger.error("Error processing IPC task", file=file_path.name, source_group=source_group, error=str(err))
+                        error_dir = ipc_base_dir / "errors"
+                        error_dir.mkdir(parents=True, exist_ok=True)
+                        shutil.move(str(file_path), str(error_dir / f"{source_group}-{file_path.name}"))
+        except Exception as err:
+            logger.error("Error reading IPC tasks directory", source_group=source_group, error=str(err))
+
+    dispatcher = _dispatcher = IpcDispatcher(process_group, IPC_MAX_CONCURRENT)
+
+    async def poll_ipc_files():
         while True:
             try:
-                group_folders = [
-                    f.name
-                    for f in ipc_base_dir.iterdir()
-                    if f.is_dir() and f.name != "errors"
-                ]
+                group_folders = list_group_folders()
             except Exception as err:
                 logger.error("Error reading IPC base directory", error=str(err))
                 await asyncio.sleep(IPC_POLL_INTERVAL / 1000)
                 continue
 
-            registered_groups = deps.registered_groups()
-
             for source_group in group_folders:
-                is_main = source_group == MAIN_GROUP_FOLDER
-                messages_dir = ipc_base_dir / source_group / "messages"
-                tasks_dir = ipc_base_dir / source_group / "tasks"
+                dispatcher.schedule(source_group)
 
-                # Process messages
-                try:
-                    if messages_dir.exists():
-                        for file_path in sorted(messages_dir.glob("*.json")):
-                            try:
-                                data = json.loads(file_path.read_text())
-                                chat_jid = data.get("chatJid")
-                                if chat_jid:
-                                    repo_jid = chat_jid.split("#")[0] if chat_jid.startswith("gh:") else chat_jid
-                                    target_group = registered_groups.get(repo_jid) or registered_groups.get(chat_jid)
-                                    authorized = is_main or (target_group and target_group.folder == source_group)
-
-                                    if not authorized:
-                                        logger.warning("Unauthorized IPC message attempt blocked", chat_jid=chat_jid, source_group=source_group)
-                                    elif data.get("type") == "message" and data.get("text"):
-                                        await deps.send_message(chat_jid, data["text"])
-                                    elif data.get("type") == "github_comment" and data.get("text") and deps.send_structured_message:
-                                        target = {
-                                            "type": "pr_comment" if "#pr:" in chat_jid else "issue_comment",
-                                            "issue_number": data.get("issueNumber"),
-                                            "pr_number": data.get("prNumber"),
-                                        }
-                                        await deps.send_structured_message(chat_jid, data["text"], target)
-                                    elif data.get("type") == "github_review" and data.get("body") and deps.send_structured_message:
-                                        target = {
-                                            "type": "pr_review",
-                                            "pr_number": data.get("prNumber"),
-                                            "review_action": data.get("event"),
-                                            "review_comments": data.get("comments"),
-                                        }
-                                        await deps.send_structured_message(chat_jid, data["body"], target)
-                                    elif data.get("type") == "github_create_pr" and data.get("title") and deps.send_structured_message:
-                                        target = {
-                                            "type": "new_pr",
-                                            "title": data.get("title"),
-                                            "head": data.get("head"),
-                                            "base": data.get("base"),
-                                        }
-                                        await deps.send_structured_message(chat_jid, data.get("body", ""), target)
-
-                                file_path.unlink()
-                            except Exception as err:
-                                logger.error("Error processing IPC message", file=file_path.name, source_group=source_group, error=str(err))
-                                error_dir = ipc_base_dir / "errors"
-                                error_dir.mkdir(parents=True, exist_ok=True)
-                                shutil.move(str(file_path), str(error_dir / f"{source_group}-{file_path.name}"))
-                except Exception as err:
-                    logger.error("Error reading IPC messages directory", source_group=source_group, error=str(err))
+            await asyncio.sleep(IPC_POLL_INTERVAL / 1000)
+
+    async def watch_ipc_files(inotify: Inotify):
+        dirty: set[str] = set()
+        wake = asyncio.Event()
+
+        def watch_group(source_group: str) -> None:
+            group_dir = ipc_base_dir / source_group
+            try:
+                inotify.add_watch(group_dir, IN_CREATE | IN_MOVED_TO | IN_ONLYDIR)  # messages/ and tasks/ appearing
+            except OSError as err:
+                logger.warning("Failed to watch IPC directory, left to rescans", source_group=source_group, error=str(err))
+                return
+            for subdir in ("messages", "tasks"):
+                watch_drop_dir(group_dir / subdir)
+            dirty.add(source_group)  # Files may have landed before the watch
+
+        def watch_drop_dir(path: Path) -> None:
+            try:
+                inotify.add_watch(path, IN_MOVED_TO | IN_CLOSE_WRITE | IN_ONLYDIR)
+            except FileNotFoundError:
+                pass  # Watched once the group directory reports it
+            except OSError as err:
+                logger.warning("Failed to watch IPC directory, left to rescans", path=str(path), error=str(err))
+
+        def on_events() -> None:
+            for event in inotify.read_events():
+                if event.mask & IN_Q_OVERFLOW or event.path is None:
+                    dirty.update(list_group_folders())
+                    continue
+                if event.path == ipc_base_dir:
+                    if event.mask & IN_ISDIR and event.name != "errors":
+                        watch_group(event.name)
+                    continue
+                source_group = event.path.relative_to(ipc_base_dir).parts[0]
+                if event.path.parent == ipc_base_dir:
+                    if event.mask & IN_ISDIR and event.name in ("messages", "tasks"):
+                        watch_drop_dir(event.path / event.name)
+                        dirty.add(source_group)
+                elif event.name.endswith(".json"):
+                    dirty.add(source_group)
+            if dirty:
+                wake.set()
+
+        inotify.add_watch(ipc_base_dir, IN_CREATE | IN_MOVED_TO | IN_ONLYDIR)
+        asyncio.get_running_loop().add_reader(inotify.fileno(), on_events)
+        for source_group in list_group_folders():
+            watch_group(source_group)
+        wake.set()  # Drain whatever arrived while no host was watching
 
-                # Process tasks
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), IPC_RESCAN_INTERVAL / 1000)
+            except TimeoutError:
+                # Safety net for anything inotify couldn't report (e.g. a watch limit was hit)
                 try:
-                    if tasks_dir.exists():
-                        for file_path in sorted(tasks_dir.glob("*.json")):
-                            try:
-                                data = json.loads(file_path.read_text())
-                                await process_task_ipc(data, source_group, is_main, deps)
-                                file_path.unlink()
-                            except Exception as err:
-                                logger.error("Error processing IPC task", file=file_path.name, source_group=source_group, error=str(err))
-                                error_dir = ipc_base_dir / "errors"
-                                error_dir.mkdir(parents=True, exist_ok=True)
-                                shutil.move(str(file_path), str(error_dir / f"{source_group}-{file_path.name}"))
+                    dirty.update(list_group_folders())
                 except Exception as err:
-                    logger.error("Error reading IPC tasks directory", source_group=source_group, error=str(err))
+                    logger.error("Error reading IPC base directory", error=str(err))
+            wake.clear()
+            batch = sorted(dirty)
+            dirty.clear()
+            for source_group in batch:
+                dispatcher.schedule(source_group)
+
+    # Containers that connect to their group socket send the same requests over it
+    socket_hub.set_handler(lambda source_group, data: handle_ipc_request(data, source_group, deps))
+
+    inotify: Inotify | None = None
+    if IPC_WATCHER != "poll":
+        try:
+            inotify = Inotify()
+        except OSError as err:
+            logger.info("inotify unavailable, polling IPC directories", error=str(err))
+
+    if inotify:
+        asyncio.create_task(watch_ipc_files(inotify))
+    else:
+        asyncio.create_task(poll_ipc_files())
+    logger.info("IPC watcher started (per-group namespaces)", mode="inotify" if inotify else "poll")
 
-            await asyncio.sleep(IPC_POLL_INTERVAL / 1000)
 
-    asyncio.create_task(process_ipc_files())
-    logger.info("IPC watcher started (per-group namespaces)")
+MESSAGE_TYPES = ("message", "github_comment", "github_review", "github_create_pr")
+
+
+async def handle_ipc_request(data: dict, source_group: str, deps: IpcDeps) -> None:
+    """Act on one request from a group's container, whichever transport it came by."""
+    if data.get("type") in MESSAGE_TYPES:
+        await handle_ipc_message(data, source_group, deps)
+    else:
+        await process_task_ipc(data, source_group, source_group == MAIN_GROUP_FOLDER, deps)
+
+
+async def handle_ipc_message(data: dict, source_group: str, deps: IpcDeps) -> None:
+    """Send a message / GitHub action on behalf of ``source_group``.
+
+    Raises PermissionError when the group may not post to the target chat.
+    """
+    registered_groups = deps.registered_groups()
+    is_main = source_group == MAIN_GROUP_FOLDER
+    chat_jid = data.get("chatJid")
+    if not chat_jid:
+        return
+    repo_jid = chat_jid.split("#")[0] if chat_jid.startswith("gh:") else chat_jid
+    target_group = registered_groups.get(repo_jid) or registered_groups.get(chat_jid)
+    authorized = is_main or (target_group and target_group.folder == source_group)
+
+    if not authorized:
+        logger.warning("Unauthorized IPC message attempt blocked", chat_jid=chat_jid, source_group=source_group)
+        raise PermissionError(f"{source_group} may not post to {chat_jid}")
+    if data.get("type") == "message" and data.get("text"):
+        await deps.send_message(chat_jid, data["text"])
+    elif data.get("type") == "github_comment" and data.get("text") and deps.send_structured_message:
+        target = {
+            "type": "pr_comment" if "#pr:" in chat_jid else "issue_comment",
+            "issue_number": data.get("issueNumber"),
+            "pr_number": data.get("prNumber"),
+        }
+        await deps.send_structured_message(chat_jid, data["text"], target)
+    elif data.get("type") == "github_review" and data.get("body") and deps.send_structured_message:
+        target = {
+            "type": "pr_review",
+            "pr_number": data.get("prNumber"),
+            "review_action": data.get("event"),
+            "review_comments": data.get("comments"),
+        }
+        await deps.send_structured_message(chat_jid, data["body"], target)
+    elif data.get("type") == "github_create_pr" and data.get("title") and deps.send_structured_message:
+        target = {
+            "type": "new_pr",
+            "title": data.get("title"),
+            "head": data.get("head"),
+            "base": data.get("base"),
+        }
+        await deps.send_structured_message(chat_jid, data.get("body", ""), target)
 
 
 async def process_task_ipc(
@@ -191,7 +393,7 @@ async def process_task_ipc(
             if context_mode not in ("group", "isolated"):
                 context_mode = "isolated"
 
-            create_task(ScheduledTask(
+            await committed(create_task(ScheduledTask(
                 id=task_id,
                 group_folder=target_folder,
                 chat_jid=target_jid,
@@ -202,14 +404,14 @@ async def process_task_ipc(
                 next_run=next_run,
                 status="active",
                 created_at=datetime.now(timezone.utc).isoformat(),
-            ))
+            )))
             logger.info("Task created via IPC", task_id=task_id, source_group=source_group, target_folder=target_folder)
 
     elif data["type"] == "pause_task":
         if data.get("taskId"):
             task = get_task_by_id(data["taskId"])
             if task and (is_main or task.group_folder == source_group):
-                update_task(data["taskId"], status="paused")
+                await committed(update_task(data["taskId"], status="paused"))
                 logger.info("Task paused via IPC", task_id=data["taskId"], source_group=source_group)
             else:
                 logger.warning("Unauthorized task pause attempt", task_id=data["taskId"], source_group=source_group)
@@ -218,7 +420,7 @@ async def process_task_ipc(
         if data.get("taskId"):
             task = get_task_by_id(data["taskId"])
             if task and (is_main or task.group_folder == source_group):
-                update_task(data["taskId"], status="active")
+                await committed(update_task(data["taskId"], status="active"))
                 logger.info("Task resumed via IPC", task_id=data["taskId"], source_group=source_group)
             else:
                 logger.warning("Unauthorized task resume attempt", task_id=data["taskId"], source_group=source_group)
@@ -227,7 +429,7 @@ async def process_task_ipc(
         if data.get("taskId"):
             task = get_task_by_id(data["taskId"])
             if task and (is_main or task.group_folder == source_group):
-                delete_task(data["taskId"])
+                await committed(delete_task(data["taskId"]))
                 logger.info("Task cancelled via IPC", task_id=data["taskId"], source_group=source_group)
             else:
                 logger.warning("Unauthorized task cancel attempt", task_id=data["taskId"], source_group=source_group)
@@ -249,7 +451,7 @@ async def process_task_ipc(
             if not is_valid_group_folder(data["folder"]):
                 logger.warning("Invalid register_group request - unsafe folder name", source_group=source_group, folder=data["folder"])
                 return
-            deps.register_group(data["jid"], RegisteredGroup(
+            write = deps.register_group(data["jid"], RegisteredGroup(
                 name=data["name"],
                 folder=data["folder"],
                 trigger=data["trigger"],
@@ -257,5 +459,7 @@ async def process_task_ipc(
                 container_config=data.get("containerConfig"),
                 requires_trigger=data.get("requiresTrigger"),
             ))
+            if write:
+                await committed(write)
     else:
         logger.warning("Unknown IPC task type", type=data["type"])
@@ -0,0 +1,85 @@
+"""IPC Snapshots.
+
+Writes the read-only files a container finds in its IPC directory:
+``current_tasks.json`` (the group's scheduled tasks, all of them for main) and
+``available_groups.json`` (group chats, main only). Each is filtered in SQL
+and only rebuilt when the database's snapshot version for it moved since the
+group's last write, and only rewritten when its content actually changed.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from clawcode.db import get_available_groups, get_task_snapshot, snapshot_version
+from clawcode.group_folder import resolve_group_ipc_path
+
+TASKS_FILE = "current_tasks.json"
+GROUPS_FILE = "available_groups.json"
+
+
+class IpcSnapshots:
+    def __init__(self) -> None:
+        # (group folder, file name) -> (snapshot version, content) of the last write
+        self._written: dict[tuple[str, str], tuple[int | None, list[dict]]] = {}
+
+    def write_tasks(self, group_folder: str, is_main: bool) -> bool:
+        """Refresh ``current_tasks.json``; True if the file was rewritten."""
+        return self._write(
+            group_folder,
+            TASKS_FILE,
+            snapshot_version("tasks"),
+            lambda: get_task_snapshot(None if is_main else group_folder),
+            json.dumps,
+        )
+
+    def write_groups(self, group_folder: str, is_main: bool, groups: list[dict] | None = None) -> bool:
+        """Refresh ``available_groups.json``; True if the file was rewritten.
+
+        Non-main groups always get an empty list. ``groups`` (freshly synced)
+        is written as given instead of being read back from the database.
+        """
+        if not is_main:
+            version, build = 0, list
+        elif groups is not None:
+            version, build = None, lambda: groups
+        else:
+            version, build = snapshot_version("groups"), get_available_groups
+        return self._write(group_folder, GROUPS_FILE, version, build, _render_groups)
+
+    def _write(
+        self,
+        group_folder: str,
+        filename: str,
+        version: int | None,
+        build: Callable[[], list[dict]],
+        render: Callable[[list[dict]], str],
+    ) -> bool:
+        """Rebuild unless ``version`` (None: unknown) is what was last written; write unless unchanged."""
+        path = Path(resolve_group_ipc_path(group_folder)) / filename
+        key = (group_folder, filename)
+        previous = self._written.get(key)
+        if previous and path.exists():
+            if version is not None and previous[0] == version:
+                return False
+            content = build()
+            if previous[1] == content:
+                self._written[key] = (version, content)
+                return False
+        else:
+            content = build()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(render(content))
+        self._written[key] = (version, content)
+        return True
+
+
+def _render_groups(groups: list[dict]) -> str:
+    # lastSync is left out of the compared content, or every rebuild would rewrite the file
+    return json.dumps({"groups": groups, "lastSync": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())})
+
+
+ipc_snapshots = IpcSnapshots()
@@ -0,0 +1,230 @@
+"""IPC Transport.
+
+Host side of the channel to agent containers. Two transports:
+
+    socket   ``ipc/<group>/host.sock`` (``/workspace/ipc/host.sock`` in the
+             container), a Unix socket carrying length-prefixed JSON frames
+             (4-byte big-endian length, like stdout protocol 2)
+    files    JSON files dropped into ``ipc/<group>/input`` (host -> container)
+             and ``messages/`` / ``tasks/`` (container -> host), watched by ipc.py
+
+Several containers of one group (one per thread) share its socket, so each
+run gets a token in its stdin (``ipcToken``). A connection's first frame must
+be ``{"type": "hello", "token": ...}``; the token names the container the
+connection belongs to, and host messages are routed by container name.
+
+After the hello, every frame carries a per-sender ``seq`` and is answered, in order, with
+``{"type": "ack", "ack": n, "ok": bool, "error": ...}``. The container's
+requests are acked once the host has acted on them (so a tool call learns
+whether its comment was posted); host messages the container never acked are
+re-sent as input files when the connection drops. Runners that don't connect
+keep using files only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import secrets
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from clawcode.config import IPC_SOCKET
+from clawcode.group_folder import resolve_group_ipc_path
+from clawcode.logger import logger
+from clawcode.output_parser import encode_frame
+
+SOCKET_NAME = "host.sock"
+CONTAINER_SOCKET_PATH = "/workspace/ipc/" + SOCKET_NAME
+MAX_FRAME_SIZE = 1024 * 1024
+HELLO_TIMEOUT_SECS = 10.0
+
+RequestHandler = Callable[[str, dict], Awaitable[None]]  # (source group folder, request); raise to nack
+
+
+def write_input_file(group_folder: str, data: dict) -> bool:
+    """File transport: drop ``data`` into the group's input directory (tmp + rename).
+
+    A close message becomes the ``_close`` sentinel.
+    """
+    input_dir = Path(resolve_group_ipc_path(group_folder)) / "input"
+    try:
+        input_dir.mkdir(parents=True, exist_ok=True)
+        if data.get("type") == "close":
+            (input_dir / "_close").write_text("")
+            return True
+        filepath = input_dir / f"{int(time.time() * 1000)}-{os.urandom(3).hex()}.json"
+        temp_path = filepath.with_suffix(".json.tmp")
+        temp_path.write_text(json.dumps(data))
+        temp_path.rename(filepath)
+        return True
+    except Exception:
+        return False
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict | None:
+    """Next JSON frame, or None at EOF."""
+    try:
+        header = await reader.readexactly(4)
+        size = int.from_bytes(header, "big")
+        if size > MAX_FRAME_SIZE:
+            raise ValueError(f"IPC frame of {size} bytes exceeds {MAX_FRAME_SIZE}")
+        return json.loads(await reader.readexactly(size))
+    except asyncio.IncompleteReadError:
+        return None
+
+
+class IpcConnection:
+    """One container's connection to its group socket."""
+
+    def __init__(self, group_folder: str, container_name: str, writer: asyncio.StreamWriter) -> None:
+        self.group_folder = group_folder
+        self.container_name = container_name
+        self._writer = writer
+        self._seq = 0
+        self.unacked: dict[int, dict] = {}  # Host messages the container hasn't acked yet
+
+    @property
+    def closing(self) -> bool:
+        return self._writer.is_closing()
+
+    def write(self, frame: dict) -> None:
+        self._writer.write(encode_frame(json.dumps(frame).encode()))
+
+    def send(self, message: dict) -> None:
+        self._seq += 1
+        self.unacked[self._seq] = message
+        self.write({**message, "seq": self._seq})
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class IpcSocketHub:
+    """Per-group listening sockets and the live connection of each container."""
+
+    def __init__(self) -> None:
+        self._servers: dict[str, asyncio.AbstractServer] = {}
+        self._tokens: dict[str, str] = {}  # Run token -> container name
+        self._connections: dict[str, IpcConnection] = {}  # By container name
+        self._serving: set[asyncio.Task] = set()  # One per accepted connection
+        self._handler: RequestHandler | None = None
+        self._closing = False
+
+    def set_handler(self, handler: RequestHandler) -> None:
+        self._handler = handler
+
+    async def ensure(self, group_folder: str, container_name: str) -> tuple[str, str] | None:
+        """Listen on the group's socket and issue ``container_name`` a token.
+
+        Returns (socket path inside the container, token), or None if the socket is unavailable.
+        """
+        if not IPC_SOCKET or not self._handler:
+            return None
+        if group_folder not in self._servers:
+            path = Path(resolve_group_ipc_path(group_folder)) / SOCKET_NAME
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.unlink(missing_ok=True)  # Left behind by an earlier host process
+                server = await asyncio.start_unix_server(
+                    lambda reader, writer: self._serve(group_folder, reader, writer), path=str(path)
+                )
+                os.chmod(path, 0o666)  # The container may run as a different uid
+            except OSError as err:
+                logger.warning("IPC socket unavailable, using files", group_folder=group_folder, error=str(err))
+                return None
+            self._servers[group_folder] = server
+        token = secrets.token_urlsafe(16)
+        self._tokens[token] = container_name
+        return CONTAINER_SOCKET_PATH, token
+
+    def release(self, container_name: str) -> None:
+        """The run is over: revoke its token and drop its connection."""
+        self._tokens = {t: name for t, name in self._tokens.items() if name != container_name}
+        connection = self._connections.get(container_name)
+        if connection:
+            connection.close()
+
+    def send(self, container_name: str, message: dict) -> bool:
+        """Send to the container's connection. False if it isn't connected (use files)."""
+        connection = self._connections.get(container_name)
+        if not connection or connection.closing:
+            return False
+        connection.send(message)
+        return True
+
+    async def close(self) -> None:
+        """Stop listening and drop every connection (host shutdown).
+
+        Unacked messages are not re-sent as files: the runner may have received
+        them, and its container outlives the host, so they'd be delivered twice.
+        """
+        self._closing = True
+        for server in self._servers.values():
+            server.close()
+        for connection in list(self._connections.values()):
+            connection.close()
+        for server in self._servers.values():
+            await server.wait_closed()
+        if self._serving:
+            await asyncio.wait(self._serving)
+        self._servers.clear()
+        self._tokens.clear()
+        self._connections.clear()
+
+    async def _hello(self, group_folder: str, reader: asyncio.StreamReader) -> str | None:
+        """Container name for a connection's hello frame, or None if it didn't present a valid token."""
+        try:
+            frame = await asyncio.wait_for(read_frame(reader), timeout=HELLO_TIMEOUT_SECS)
+        except (TimeoutError, ValueError, ConnectionError):
+            return None
+        if not frame or frame.get("type") != "hello":
+            return None
+        return self._tokens.get(str(frame.get("token")))
+
+    async def _serve(self, group_folder: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._serving.add(task)
+        task.add_done_callback(self._serving.discard)
+        container_name = await self._hello(group_folder, reader)
+        if container_name is None:
+            logger.warning("IPC socket connection without a valid hello, closed", group_folder=group_folder)
+            writer.close()
+            return
+        connection = IpcConnection(group_folder, container_name, writer)
+        previous = self._connections.get(container_name)
+        if previous:
+            previous.close()  # The same container reconnected
+        self._connections[container_name] = connection
+        logger.debug("IPC socket connected", group_folder=group_folder, container_name=container_name)
+        try:
+            while (frame := await read_frame(reader)) is not None:
+                seq = frame.pop("seq", None)
+                if frame.get("type") == "ack":
+                    connection.unacked.pop(frame.get("ack"), None)
+                    continue
+                # Requests are handled one at a time, so they take effect in the order sent
+                try:
+                    await self._handler(group_folder, frame)
+                    connection.write({"type": "ack", "ack": seq, "ok": True})
+                except Exception as err:
+                    connection.write({"type": "ack", "ack": seq, "ok": False, "error": str(err)})
+                await writer.drain()
+        except (ConnectionError, ValueError) as err:
+            logger.warning("IPC socket connection failed", group_folder=group_folder, error=str(err))
+        finally:
+            if self._connections.get(container_name) is connection:
+                del self._connections[container_name]
+            writer.close()
+            if self._closing:
+                return
+            # Whatever the container didn't confirm goes out through the file transport
+            for message in connection.unacked.values():
+                write_input_file(group_folder, message)
+            if connection.unacked:
+                logger.info("IPC socket closed with unacked messages, re-sent as files", group_folder=group_folder, count=len(connection.unacked))
+
+
+socket_hub = IpcSocketHub()
@@ -26,6 +26,12 @@ class MountAllowlist(BaseModel):
 class ContainerConfig(BaseModel):
     additional_mounts: list[AdditionalMount] | None = None
     timeout: int | None = None  # Default: 300000 (5 minutes)
+    runtime: str | None = None  # "docker" (default) | "sandbox" (bubblewrap, trusted repos only)
+    # Resource profile overrides (defaults: CONTAINER_CPUS, CONTAINER_MEMORY, CONTAINER_TMPFS, CONTAINER_BLKIO_WEIGHT)
+    cpus: float | None = None  # CPU cores, e.g. 2.0; 0 = unlimited
+    memory: str | None = None  # e.g. "4g"; "" = unlimited
+    tmpfs: list[str] | None = None  # Scratch mounts, "path" or "path:size", e.g. ["/tmp:2g", "/home/node/.cache"]
+    blkio_weight: int | None = None  # Relative block I/O share, 10-1000
 
 
 class RegisteredGroup(BaseModel):
@@ -58,6 +64,7 @@ class NewMessage(BaseModel):
     is_from_me: bool = False
     is_bot_message: bool = False
     github_metadata: GitHubEventMetadata | None = None
+    seq: int | None = None  # Per-thread arrival order, assigned when stored
 
 
 class ScheduledTask(BaseModel):
@@ -84,6 +91,52 @@ class TaskRunLog(BaseModel):
     error: str | None = None
 
 
+class RepoMaintenanceLog(BaseModel):
+    checkout: str  # Directory name under data/repos, e.g. 'owner--repo'
+    task: str  # git maintenance task, e.g. 'commit-graph'
+    run_at: str
+    duration_ms: int
+    status: str  # 'success' | 'error'
+    error: str | None = None
+
+
+class AgentRunPhase(BaseModel):
+    phase: str  # Host phase (e.g. 'spawned') or runner phase prefixed 'runner:'
+    at_ms: int  # Epoch ms
+    elapsed_ms: int  # Since the previous phase of the run
+
+
+class AgentRun(BaseModel):
+    id: str
+    chat_jid: str
+    group_folder: str
+    started_at: str
+    duration_ms: int
+    status: str  # 'success' | 'error'
+    container_name: str | None = None
+    runtime: str | None = None  # 'docker' | 'docker-warm' | 'sandbox'
+    cpus: float | None = None  # Profile limits the run had
+    memory_limit_bytes: int | None = None
+    cpu_ms: int | None = None  # Sampled usage; None when no sample succeeded
+    peak_memory_bytes: int | None = None
+    phases: list[AgentRunPhase] = []
+
+
+class ContainerRun(BaseModel):
+    """An agent container the host is streaming, persisted so a restarted host can re-attach to it."""
+
+    container_name: str
+    chat_jid: str
+    group_folder: str
+    started_at: str
+    session_id: str | None = None
+    cursor: int = 0  # Thread cursor (message seq) the run advanced to
+    previous_cursor: int = 0  # Cursor to roll back to if the run is lost
+    outputs_delivered: int = 0  # Results already handed to the channel (skipped on re-attach)
+    task_id: str | None = None  # Set for scheduled task runs
+    snapshot_root: str | None = None  # Workspace snapshot the run mounts, released when it finishes
+
+
 class Channel(Protocol):
     """Channel abstraction for posting messages to GitHub (or other platforms)."""
 
@@ -0,0 +1,80 @@
+"""Output Delivery.
+
+Decouples reading a container's stdout from handling what it produced. The
+reader submits parsed outputs to a bounded per-run queue; a separate task
+hands them to ``on_output`` (which posts to GitHub) in order. A slow API only
+fills the queue; the reader keeps draining the pipe, so the agent never
+blocks on a stdout write unless the queue is full.
+
+A failed delivery doesn't stop the ones after it; the first error is kept in
+``error`` so the run can still be reported as failed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from clawcode.logger import logger
+
+
+class OutputDelivery:
+    def __init__(self, on_output: Callable[[Any], Awaitable[None]], maxsize: int, group: str = "") -> None:
+        self.on_output = on_output
+        self.group = group
+        self._queue: asyncio.Queue[tuple[Any, float] | None] = asyncio.Queue(maxsize=maxsize)
+        self._task = asyncio.create_task(self._run())
+        # Backpressure metrics
+        self.delivered = 0
+        self.failed = 0
+        self.error: Exception | None = None  # First failure
+        self.max_depth = 0
+        self.blocked_secs = 0.0  # Time the reader waited on a full queue
+        self.max_lag_secs = 0.0  # Longest submit-to-delivered time
+
+    async def submit(self, output: Any) -> None:
+        """Queue an output for delivery; waits only while the queue is full."""
+        item = (output, time.monotonic())
+        if self._queue.full():
+            blocked_at = time.monotonic()
+            await self._queue.put(item)
+            self.blocked_secs += time.monotonic() - blocked_at
+        else:
+            self._queue.put_nowait(item)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    async def close(self) -> None:
+        """Deliver everything still queued, then stop."""
+        await self._queue.put(None)
+        await self._task
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "max_depth": self.max_depth,
+            "blocked_secs": round(self.blocked_secs, 3),
+            "max_lag_secs": round(self.max_lag_secs, 3),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            output, submitted_at = item
+            try:
+                await self.on_output(output)
+                self.delivered += 1
+            except Exception as err:
+                # One failed post must not stop later outputs (or the reader) from going through
+                self.failed += 1
+                if self.error is None:
+                    self.error = err
+                logger.error("Output delivery failed", group=self.group, error=str(err))
+            self.max_lag_secs = max(self.max_lag_secs, time.monotonic() - submitted_at)
@@ -0,0 +1,152 @@
+"""Output Frame Parser.
+
+Incremental parser for the agent runner's stdout. Two framings exist:
+
+Protocol 1 (markers), spoken by every runner: each JSON message is printed as
+
+    ---CLAWCODE_OUTPUT_START---
+    {"status": ..., "result": ...}
+    ---CLAWCODE_OUTPUT_END---
+
+Protocol 2 (length-prefixed), used when the host offers it in the stdin JSON
+(``protocolVersion``) and the runner supports it. The runner then writes a
+``CLAWCODE_PROTOCOL 2`` line first, routes any stray prints to stderr, and
+sends each message as a 4-byte big-endian length followed by that many bytes
+of UTF-8 JSON. Messages carry a ``type`` (MESSAGE_TYPES); marker frames have
+none and are results.
+
+The parser detects the framing from the first bytes, so older runner images
+keep working. It works on raw bytes: chunks are appended to one buffer, a
+scan offset remembers how far the buffer was already searched, and bytes are
+dropped as soon as they can no longer be part of a frame. Payloads are
+decoded only once complete, so multi-byte UTF-8 split across chunks decodes
+intact.
+"""
+
+from __future__ import annotations
+
+OUTPUT_START_MARKER = "---CLAWCODE_OUTPUT_START---"
+OUTPUT_END_MARKER = "---CLAWCODE_OUTPUT_END---"
+
+PROTOCOL_VERSION = 2  # Highest version this host speaks
+PROTOCOL_HELLO = "CLAWCODE_PROTOCOL "
+MESSAGE_TYPES = ("result", "session", "progress", "usage", "tool_timing", "error")
+
+_START = OUTPUT_START_MARKER.encode()
+_END = OUTPUT_END_MARKER.encode()
+_HELLO = PROTOCOL_HELLO.encode()
+_HELLO_MAX_LEN = 64
+_LENGTH_BYTES = 4
+
+
+def encode_frame(payload: bytes) -> bytes:
+    """Length-prefix one protocol 2 message."""
+    return len(payload).to_bytes(_LENGTH_BYTES, "big") + payload
+
+
+class OutputFrameParser:
+    """Feed stdout chunks, get back the JSON text of each completed message."""
+
+    def __init__(self, max_frame_size: int | None = None) -> None:
+        self.max_frame_size = max_frame_size
+        self.protocol: int | None = None  # Decided from the first bytes of output
+        self.bytes_seen = 0
+        self.frames_dropped = 0  # Frames discarded for exceeding max_frame_size
+        self._buf = bytearray()
+        self._scan = 0  # Buffer offset searched so far for the next marker
+        self._in_frame = False  # _buf starts with a frame's payload (start marker consumed)
+        self._skipping = False  # Inside an oversized marker frame: discard until its end marker
+        self._skip_bytes = 0  # Remaining bytes of an oversized length-prefixed frame
+
+    def feed(self, chunk: bytes) -> list[str]:
+        self.bytes_seen += len(chunk)
+        self._buf += chunk
+        if self.protocol is None and not self._detect_protocol():
+            return []
+        if self.protocol == 2:
+            return self._feed_length_prefixed()
+        return self._feed_markers()
+
+    def _detect_protocol(self) -> bool:
+        head = bytes(self._buf[:len(_HELLO)])
+        if not _HELLO.startswith(head):
+            self.protocol = 1
+            return True
+        if len(self._buf) < len(_HELLO):
+            return False
+        newline = self._buf.find(b"\n", 0, _HELLO_MAX_LEN)
+        if newline == -1:
+            if len(self._buf) < _HELLO_MAX_LEN:
+                return False
+            self.protocol = 1
+            return True
+        try:
+            version = int(self._buf[len(_HELLO):newline])
+        except ValueError:
+            version = 1
+        # A runner never announces more than the host offered; anything else falls back to markers
+        self.protocol = 2 if version == 2 else 1
+        del self._buf[:newline + 1]
+        return True
+
+    def _feed_length_prefixed(self) -> list[str]:
+        frames: list[str] = []
+        while True:
+            if self._skip_bytes:
+                skipped = min(self._skip_bytes, len(self._buf))
+                del self._buf[:skipped]
+                self._skip_bytes -= skipped
+                if self._skip_bytes:
+                    return frames
+            if len(self._buf) < _LENGTH_BYTES:
+                return frames
+            size = int.from_bytes(self._buf[:_LENGTH_BYTES], "big")
+            if self.max_frame_size is not None and size > self.max_frame_size:
+                self.frames_dropped += 1
+                del self._buf[:_LENGTH_BYTES]
+                self._skip_bytes = size
+                continue
+            end = _LENGTH_BYTES + size
+            if len(self._buf) < end:
+                return frames
+            frames.append(self._buf[_LENGTH_BYTES:end].decode(errors="replace"))
+            del self._buf[:end]
+
+    def _feed_markers(self) -> list[str]:
+        frames: list[str] = []
+        while True:
+            marker = _END if self._in_frame else _START
+            idx = self._buf.find(marker, self._scan)
+            if idx == -1:
+                self._park(len(marker))
+                return frames
+            if self._in_frame:
+                if not self._skipping:
+                    frames.append(self._buf[:idx].decode(errors="replace").strip())
+                self._skipping = False
+            # Everything up to and including the marker is consumed
+            del self._buf[:idx + len(marker)]
+            self._scan = 0
+            self._in_frame = not self._in_frame
+
+    def _park(self, marker_len: int) -> None:
+        """No marker in the buffer yet: keep only what a later chunk could still need."""
+        # A marker may straddle this chunk and the next, so its first bytes stay searchable
+        keep_from = max(0, len(self._buf) - marker_len + 1)
+        if not self._in_frame:
+            del self._buf[:keep_from]  # Text between frames is never needed
+            self._scan = 0
+            return
+        if self._skipping or (self.max_frame_size is not None and keep_from > self.max_frame_size):
+            if not self._skipping:
+                self._skipping = True
+                self.frames_dropped += 1
+            del self._buf[:keep_from]
+            self._scan = 0
+            return
+        self._scan = keep_from
+
+    @property
+    def buffered(self) -> int:
+        """Bytes currently held (an incomplete frame, or a possible partial marker)."""
+        return len(self._buf)
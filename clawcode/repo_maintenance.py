@@ -0,0 +1,114 @@
+"""Repo Maintenance.
+
+Runs `git maintenance` tasks over cached checkouts from the reconciliation
+loop, so repeated shallow fetches don't pile up loose objects and packs.
+Auto-gc is disabled on checkouts; this scheduler replaces it off the hot path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from clawcode.config import REPO_MAINTENANCE_INTERVAL, REPO_MAINTENANCE_MAX_PER_PASS
+from clawcode.db import (
+    cleanup_repo_maintenance_logs,
+    get_last_repo_maintenance,
+    log_repo_maintenance,
+)
+from clawcode.logger import logger
+from clawcode.models import RepoMaintenanceLog
+from clawcode.repo_cache import REPOS_DIR, checkout_lock, run_git
+
+MAINTENANCE_TASKS = ("pack-refs", "loose-objects", "incremental-repack", "commit-graph")
+TASK_TIMEOUT_SECS = 600
+
+
+class RepoMaintenanceScheduler:
+    def __init__(
+        self,
+        interval_ms: int = REPO_MAINTENANCE_INTERVAL,
+        max_per_pass: int = REPO_MAINTENANCE_MAX_PER_PASS,
+    ) -> None:
+        self.interval_ms = interval_ms
+        self.max_per_pass = max_per_pass
+        self._last_run: dict[str, float] | None = None
+        self._pass: asyncio.Task | None = None
+
+    def _load_last_run(self) -> dict[str, float]:
+        if self._last_run is None:
+            self._last_run = {
+                checkout: datetime.fromisoformat(run_at).timestamp()
+                for checkout, run_at in get_last_repo_maintenance().items()
+            }
+        return self._last_run
+
+    def due_checkouts(self, active: set[str]) -> list[str]:
+        """Checkouts whose last maintenance is older than the interval, oldest first."""
+        last_run = self._load_last_run()
+        now = time.time()
+        try:
+            names = [p.name for p in REPOS_DIR.iterdir() if (p / ".git").is_dir()]
+        except FileNotFoundError:
+            return []
+        due = [
+            name
+            for name in names
+            if name not in active and (now - last_run.get(name, 0.0)) * 1000 >= self.interval_ms
+        ]
+        due.sort(key=lambda name: last_run.get(name, 0.0))
+        return due[: self.max_per_pass]
+
+    def run_pending(self, get_active: Callable[[], set[str]]) -> bool:
+        """Start a maintenance pass in the background unless one is still running."""
+        if self._pass and not self._pass.done():
+            return False
+        self._pass = asyncio.create_task(self._run_pass(get_active))
+        return True
+
+    async def _run_pass(self, get_active: Callable[[], set[str]]) -> None:
+        try:
+            for name in self.due_checkouts(get_active()):
+                await self._maintain(name, get_active)
+            cleanup_repo_maintenance_logs()
+        except Exception as err:
+            logger.error("Repo maintenance pass failed", error=str(err))
+
+    async def _maintain(self, name: str, get_active: Callable[[], set[str]]) -> None:
+        repo_dir = str(REPOS_DIR / name)
+        durations: dict[str, int] = {}
+
+        async with checkout_lock(name):
+            await run_git("-C", repo_dir, "config", "gc.auto", "0", timeout=10)
+            await run_git("-C", repo_dir, "config", "maintenance.auto", "false", timeout=10)
+
+        for task in MAINTENANCE_TASKS:
+            # Each task holds the lock on its own so a run arriving mid-pass waits for one task at most
+            if name in get_active():
+                logger.debug("Repo became active, deferring remaining maintenance", checkout=name)
+                return
+            async with checkout_lock(name):
+                start = time.time()
+                error: str | None = None
+                try:
+                    await run_git("-C", repo_dir, "maintenance", "run", f"--task={task}", timeout=TASK_TIMEOUT_SECS)
+                except Exception as err:
+                    error = str(err)
+                duration_ms = int((time.time() - start) * 1000)
+
+            durations[task] = duration_ms
+            log_repo_maintenance(RepoMaintenanceLog(
+                checkout=name,
+                task=task,
+                run_at=datetime.now(timezone.utc).isoformat(),
+                duration_ms=duration_ms,
+                status="error" if error else "success",
+                error=error,
+            ))
+            if error:
+                logger.warning("Repo maintenance task failed", checkout=name, task=task, error=error)
+
+        self._load_last_run()[name] = time.time()
+        logger.info("Repo maintenance completed", checkout=name, durations_ms=durations)
@@ -0,0 +1,189 @@
+"""Repo Prefetcher.
+
+Keeps checkouts of active repos fresh in the background so agent runs find
+the objects already local. Fed by push/pull_request webhooks and by a
+periodic sweep from the reconciliation loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Coroutine
+
+from clawcode.config import (
+    REPO_FETCH_FRESHNESS,
+    REPO_PREFETCH_ACTIVE_WINDOW,
+    REPO_PREFETCH_CONCURRENCY,
+    REPO_PREFETCH_SWEEP_INTERVAL,
+)
+from clawcode.github.event_mapper import parse_repo_from_jid
+from clawcode.logger import logger
+from clawcode.repo_cache import (
+    CheckoutCache,
+    checkout_dir,
+    checkout_name,
+    fetch_checkout,
+    reset_checkout,
+)
+
+BASE_BACKOFF_MS = 30_000
+MAX_BACKOFF_MS = 1_800_000
+
+
+@dataclass
+class _RepoState:
+    last_activity: float = 0.0
+    last_fetch: float = 0.0
+    push_seq: int = 1  # bumped on every push; starts ahead so an unfetched repo is stale
+    fetched_seq: int = 0  # push_seq observed when the last successful fetch started
+    failures: int = 0
+    retry_at: float = 0.0
+
+
+class RepoPrefetcher:
+    def __init__(
+        self,
+        get_token: Callable[[str, str], Coroutine[None, None, str]],
+        concurrency: int = REPO_PREFETCH_CONCURRENCY,
+        cache: CheckoutCache | None = None,
+    ) -> None:
+        self._get_token = get_token
+        self._cache = cache
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._repos: dict[str, _RepoState] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._pristine: set[str] = set()  # Checkouts fully reset since a run last wrote to them
+        if cache:
+            cache.on_evict = self.forget_checkout
+
+    def _get_repo(self, repo_jid: str) -> _RepoState:
+        if repo_jid not in self._repos:
+            self._repos[repo_jid] = _RepoState()
+        return self._repos[repo_jid]
+
+    def note_activity(self, repo_jid: str) -> None:
+        """Mark a repo as active so the periodic sweep keeps it warm."""
+        self._get_repo(repo_jid).last_activity = time.time()
+
+    def notify_push(self, repo_jid: str) -> None:
+        """Refs changed upstream: mark the checkout stale and fetch it in the background."""
+        state = self._get_repo(repo_jid)
+        state.push_seq += 1
+        state.last_activity = time.time()
+        self.schedule(repo_jid)
+
+    def is_fresh(self, repo_jid: str) -> bool:
+        state = self._repos.get(repo_jid)
+        if not state or state.fetched_seq < state.push_seq:
+            return False
+        return (time.time() - state.last_fetch) * 1000 < REPO_FETCH_FRESHNESS
+
+    def schedule(self, repo_jid: str) -> bool:
+        """Start a background fetch unless one is running or the repo is backing off."""
+        if repo_jid in self._inflight:
+            return False
+        state = self._get_repo(repo_jid)
+        if time.time() < state.retry_at:
+            logger.debug("Repo prefetch backing off", repo_jid=repo_jid, failures=state.failures)
+            return False
+        self._inflight[repo_jid] = asyncio.ensure_future(self._prefetch(repo_jid))
+        return True
+
+    def sweep(self) -> int:
+        """Schedule fetches for recently active repos that are stale. Returns the count scheduled."""
+        now = time.time()
+        scheduled = 0
+        for repo_jid, state in self._repos.items():
+            if (now - state.last_activity) * 1000 > REPO_PREFETCH_ACTIVE_WINDOW:
+                continue
+            overdue = (now - state.last_fetch) * 1000 >= REPO_PREFETCH_SWEEP_INTERVAL
+            if (overdue or state.fetched_seq < state.push_seq) and self.schedule(repo_jid):
+                scheduled += 1
+        if scheduled:
+            logger.debug("Repo prefetch sweep scheduled fetches", count=scheduled)
+        return scheduled
+
+    async def _fetch(self, repo_jid: str, token: str | None = None) -> None:
+        state = self._get_repo(repo_jid)
+        seq = state.push_seq
+        owner, repo = parse_repo_from_jid(repo_jid)
+        if token is None:
+            token = await self._get_token(owner, repo)
+        start = time.time()
+        cloned = await fetch_checkout(owner, repo, token)
+        if self._cache:
+            self._cache.mark_changed(checkout_name(owner, repo), cloned=cloned)
+        state.fetched_seq = seq
+        state.last_fetch = time.time()
+        state.failures = 0
+        state.retry_at = 0.0
+        logger.debug("Repo fetched", repo_jid=repo_jid, duration_ms=int((state.last_fetch - start) * 1000))
+
+    async def _prefetch(self, repo_jid: str) -> None:
+        state = self._get_repo(repo_jid)
+        try:
+            async with self._semaphore:
+                await self._fetch(repo_jid)
+        except Exception as err:
+            state.failures += 1
+            delay_ms = min(BASE_BACKOFF_MS * (2 ** (state.failures - 1)), MAX_BACKOFF_MS)
+            state.retry_at = time.time() + delay_ms / 1000
+            logger.warning("Repo prefetch failed", repo_jid=repo_jid, failures=state.failures, retry_in_ms=delay_ms, error=str(err))
+        finally:
+            self._inflight.pop(repo_jid, None)
+
+        # A push landed while we were fetching
+        if state.failures == 0 and state.fetched_seq < state.push_seq:
+            self.schedule(repo_jid)
+
+    async def prepare_checkout(self, owner: str, repo: str, token: str, pristine: bool = False) -> str:
+        """Return a checkout reset to origin/HEAD, fetching only if the prefetcher hasn't.
+
+        ``pristine`` means the caller won't write to the checkout (it mounts a
+        snapshot), so once fully reset, later resets are skipped while HEAD hasn't moved.
+        """
+        repo_jid = f"gh:{owner}/{repo}"
+        self.note_activity(repo_jid)
+
+        inflight = self._inflight.get(repo_jid)
+        if inflight:
+            await asyncio.shield(inflight)
+
+        on_disk = (checkout_dir(owner, repo) / ".git").exists()
+        if self._cache:
+            self._cache.record_use(checkout_name(owner, repo), hit=on_disk)
+
+        if not on_disk or not self.is_fresh(repo_jid):
+            try:
+                await self._fetch(repo_jid, token)
+            except Exception as err:
+                if not on_disk:
+                    raise
+                logger.warning("Failed to fetch repo, using existing checkout", owner=owner, repo=repo, error=str(err))
+
+        try:
+            path = await reset_checkout(owner, repo, only_if_moved=pristine and repo_jid in self._pristine)
+        except FileNotFoundError:
+            # Evicted between the checks above and taking the lock: clone it again
+            logger.info("Checkout evicted while preparing, re-fetching", owner=owner, repo=repo)
+            await self._fetch(repo_jid, token)
+            path = await reset_checkout(owner, repo)
+        if pristine:
+            self._pristine.add(repo_jid)
+        else:
+            self._pristine.discard(repo_jid)
+        return path
+
+    def forget_checkout(self, name: str) -> None:
+        """The checkout was evicted: it is neither fresh nor pristine any more."""
+        for repo_jid, state in self._repos.items():
+            if checkout_name(*parse_repo_from_jid(repo_jid)) == name:
+                state.fetched_seq = 0
+                state.last_fetch = 0.0
+                self._pristine.discard(repo_jid)
+
+    def mark_dirty(self, repo_jid: str) -> None:
+        """A run wrote to the shared checkout; the next prepare must do a full reset."""
+        self._pristine.discard(repo_jid)
@@ -0,0 +1,174 @@
+"""Run Ledger.
+
+Phase timestamps for each agent run, written to the agent_runs /
+agent_run_phases tables when the run ends, plus the ``clawcode-runs`` report
+(p50/p95/p99 per phase per repo, plus sampled CPU / peak memory per run).
+
+Host phases, in order:
+    enqueued → slot_acquired → checkout_ready → tokens_ready → spawned →
+    first_byte → result (each) → result_posted (each) → exit
+The agent runner adds its own phases (runner:sdk_connected, ...) by writing
+``CLAWCODE_PHASE <name> <epoch_ms>`` lines to stderr.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from clawcode.container_resources import ResourceProfile, ResourceUsage
+from clawcode.db import get_agent_run_phases, get_agent_run_usage, init_database, log_agent_run
+from clawcode.logger import logger
+from clawcode.models import AgentRun, AgentRunPhase
+
+RUNNER_PHASE_PREFIX = "CLAWCODE_PHASE "
+
+
+class RunTimer:
+    def __init__(
+        self,
+        chat_jid: str,
+        group_folder: str,
+        enqueued_at: float | None = None,
+        slot_acquired_at: float | None = None,
+    ) -> None:
+        now = time.time()
+        self.run_id = f"{group_folder}-{int(now * 1000)}-{os.urandom(2).hex()}"
+        self.chat_jid = chat_jid
+        self.group_folder = group_folder
+        self.container_name: str | None = None
+        self.runtime: str | None = None
+        self.profile: ResourceProfile | None = None
+        self.usage: ResourceUsage | None = None
+        self._phases: list[tuple[str, float]] = []
+        self.mark("enqueued", enqueued_at or now)
+        self.mark("slot_acquired", slot_acquired_at or now)
+
+    def mark(self, phase: str, at: float | None = None) -> None:
+        self._phases.append((phase, at if at is not None else time.time()))
+
+    def mark_runner_line(self, line: str) -> bool:
+        """Record a runner phase marker line. Returns False if the line isn't one."""
+        if not line.startswith(RUNNER_PHASE_PREFIX):
+            return False
+        try:
+            name, at_ms = line[len(RUNNER_PHASE_PREFIX):].split()
+            self.mark(f"runner:{name}", int(at_ms) / 1000)
+        except ValueError:
+            return False
+        return True
+
+    def build(self, status: str) -> AgentRun:
+        phases = sorted(self._phases, key=lambda p: p[1])
+        started = phases[0][1]
+        records: list[AgentRunPhase] = []
+        previous = started
+        for name, at in phases:
+            records.append(AgentRunPhase(phase=name, at_ms=int(at * 1000), elapsed_ms=int((at - previous) * 1000)))
+            previous = at
+        return AgentRun(
+            id=self.run_id,
+            chat_jid=self.chat_jid,
+            group_folder=self.group_folder,
+            started_at=datetime.fromtimestamp(started, tz=timezone.utc).isoformat(),
+            duration_ms=int((phases[-1][1] - started) * 1000),
+            status=status,
+            container_name=self.container_name,
+            runtime=self.runtime,
+            cpus=self.profile.cpus if self.profile else None,
+            memory_limit_bytes=self.profile.memory_bytes if self.profile else None,
+            cpu_ms=self.usage.cpu_ms if self.usage else None,
+            peak_memory_bytes=self.usage.peak_memory_bytes if self.usage else None,
+            phases=records,
+        )
+
+    def finish(self, status: str) -> None:
+        """Write the run to the ledger. Never raises: timing must not fail a run."""
+        try:
+            log_agent_run(self.build(status))
+        except Exception as err:
+            logger.warning("Failed to record agent run timings", run_id=self.run_id, error=str(err))
+
+
+# --- Report ---
+
+
+def _percentile(sorted_values: list[int], pct: float) -> int:
+    """Nearest-rank percentile."""
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def summarize_phases(rows: list[dict]) -> dict[str, dict[str, dict[str, int]]]:
+    """{group_folder: {phase: {count, p50, p95, p99}}} in phase order of first appearance."""
+    samples: dict[str, dict[str, list[int]]] = {}
+    for row in rows:
+        samples.setdefault(row["group_folder"], {}).setdefault(row["phase"], []).append(row["elapsed_ms"])
+    summary: dict[str, dict[str, dict[str, int]]] = {}
+    for group_folder, phases in samples.items():
+        summary[group_folder] = {}
+        for phase, values in phases.items():
+            values.sort()
+            summary[group_folder][phase] = {
+                "count": len(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+            }
+    return summary
+
+
+def summarize_usage(rows: list[dict]) -> dict[str, dict[str, int]]:
+    """{group_folder: {count, cpu_ms_p50/p95, peak_mib_p50/p95/max, limit_mib}} for sizing resource profiles."""
+    samples: dict[str, list[dict]] = {}
+    for row in rows:
+        samples.setdefault(row["group_folder"], []).append(row)
+    summary: dict[str, dict[str, int]] = {}
+    for group_folder, runs in samples.items():
+        cpu = sorted(r["cpu_ms"] for r in runs)
+        peak = sorted(r["peak_memory_bytes"] // (1024 * 1024) for r in runs)
+        limits = [r["memory_limit_bytes"] for r in runs if r["memory_limit_bytes"]]
+        summary[group_folder] = {
+            "count": len(runs),
+            "cpu_ms_p50": _percentile(cpu, 50),
+            "cpu_ms_p95": _percentile(cpu, 95),
+            "peak_mib_p50": _percentile(peak, 50),
+            "peak_mib_p95": _percentile(peak, 95),
+            "peak_mib_max": peak[-1],
+            "limit_mib": limits[-1] // (1024 * 1024) if limits else 0,
+        }
+    return summary
+
+
+def report_main() -> None:
+    """Entry point for ``clawcode-runs``: print phase latency percentiles per repo."""
+    parser = argparse.ArgumentParser(description="Agent run phase timings (ms spent reaching each phase)")
+    parser.add_argument("--hours", type=float, default=24, help="Look back this many hours (default 24)")
+    parser.add_argument("--repo", help="Only this group folder, e.g. owner--repo")
+    args = parser.parse_args()
+
+    init_database()
+    since = (datetime.now(timezone.utc) - timedelta(hours=args.hours)).isoformat()
+    summary = summarize_phases(get_agent_run_phases(since, args.repo))
+    if not summary:
+        print(f"No agent runs in the last {args.hours:g}h")
+        return
+    for group_folder, phases in summary.items():
+        print(f"\n{group_folder}")
+        print(f"  {'phase':<28}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for phase, stats in phases.items():
+            print(f"  {phase:<28}{stats['count']:>6}{stats['p50']:>9}{stats['p95']:>9}{stats['p99']:>9}")
+
+    usage = summarize_usage(get_agent_run_usage(since, args.repo))
+    if usage:
+        print("\nResource usage per run (CPU seconds, peak memory MiB)")
+        print(f"  {'repo':<28}{'n':>6}{'cpu p50':>9}{'cpu p95':>9}{'mem p50':>9}{'mem p95':>9}{'mem max':>9}{'limit':>9}")
+        for group_folder, stats in usage.items():
+            limit = str(stats["limit_mib"]) if stats["limit_mib"] else "-"
+            print(
+                f"  {group_folder:<28}{stats['count']:>6}"
+                f"{stats['cpu_ms_p50'] / 1000:>9.1f}{stats['cpu_ms_p95'] / 1000:>9.1f}"
+                f"{stats['peak_mib_p50']:>9}{stats['peak_mib_p95']:>9}{stats['peak_mib_max']:>9}{limit:>9}"
+            )
@@ -0,0 +1,217 @@
+"""Process sandbox runtime for trusted repos.
+
+Runs the agent runner as a host process inside bubblewrap instead of a Docker
+container: new user/pid/ipc/uts namespaces, a tmpfs root with the host's
+system dirs bound read-only, and the same /workspace layout as the container
+(built from the same ContainerSpec). Talks the same stdin/stdout protocol,
+so the runner can't tell the difference, and spawns in milliseconds.
+
+The network namespace is shared with the host, and the host's Python and
+node toolchain are used, so this is only for repos whose agents are trusted.
+Optional hardening:
+    SANDBOX_CGROUP_PARENT   delegated cgroup v2 dir; each run gets a child
+                            with memory.max / cpu.max / pids.max (the group's
+                            resource profile if set) and reports usage from it
+    SANDBOX_SECCOMP_FILTER  compiled BPF program handed to bwrap --seccomp
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+from pathlib import Path
+
+from clawcode.config import (
+    DATA_DIR,
+    SANDBOX_CGROUP_PARENT,
+    SANDBOX_CPU_MAX,
+    SANDBOX_MEMORY_MAX,
+    SANDBOX_PYTHON,
+    SANDBOX_RUNNER_DIR,
+    SANDBOX_SECCOMP_FILTER,
+)
+from clawcode.container_resources import ResourceSample, read_cgroup_sample
+from clawcode.container_runtime import ContainerSpec
+from clawcode.logger import logger
+
+BWRAP_BIN = "bwrap"
+SANDBOX_UID = 1000  # Same uid as the image's node user
+SYSTEM_RO_DIRS = ("/usr", "/etc", "/opt")
+SYSTEM_ROOT_LINKS = ("/bin", "/sbin", "/lib", "/lib32", "/lib64")
+
+_sandboxes: dict[str, asyncio.subprocess.Process] = {}
+_cgroups: dict[str, Path] = {}
+
+
+def sandbox_available() -> bool:
+    return shutil.which(BWRAP_BIN) is not None
+
+
+def is_sandbox(name: str) -> bool:
+    return name in _sandboxes
+
+
+def _hosts_file(extra_hosts: list[str]) -> Path:
+    """/etc/hosts with the spec's extra hosts (e.g. metadata endpoints blackholed) appended."""
+    path = DATA_DIR / "sandbox" / "hosts"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        base = Path("/etc/hosts").read_text()
+    except OSError:
+        base = "127.0.0.1 localhost\n"
+    lines = [f"{ip} {host}" for host, _, ip in (entry.rpartition(":") for entry in extra_hosts)]
+    content = base.rstrip("\n") + "\n" + "".join(f"{line}\n" for line in lines)
+    if not path.exists() or path.read_text() != content:
+        path.write_text(content)
+    return path
+
+
+def _python_prefix() -> str | None:
+    """Install prefix of SANDBOX_PYTHON when it lives outside the system dirs (pyenv, venvs)."""
+    binary = shutil.which(SANDBOX_PYTHON)
+    if not binary:
+        return None
+    prefix = str(Path(os.path.realpath(binary)).parent.parent)
+    return None if any(prefix.startswith(d) for d in SYSTEM_RO_DIRS) else prefix
+
+
+def build_bwrap_args(spec: ContainerSpec, seccomp_fd: int | None = None) -> list[str]:
+    args = [
+        "--unshare-user", "--uid", str(SANDBOX_UID), "--gid", str(SANDBOX_UID),
+        "--unshare-pid", "--unshare-ipc", "--unshare-uts", "--unshare-cgroup-try",
+        "--die-with-parent", "--new-session", "--cap-drop", "ALL",
+        "--hostname", spec.name[:63],
+    ]
+    for d in SYSTEM_RO_DIRS:
+        args.extend(["--ro-bind-try", d, d])
+    for link in SYSTEM_ROOT_LINKS:
+        if os.path.islink(link):
+            args.extend(["--symlink", os.readlink(link), link])
+        else:
+            args.extend(["--ro-bind-try", link, link])
+    prefix = _python_prefix()
+    if prefix:
+        args.extend(["--ro-bind", prefix, prefix])
+    if spec.extra_hosts:
+        args.extend(["--ro-bind", str(_hosts_file(spec.extra_hosts)), "/etc/hosts"])
+    args.extend(["--proc", "/proc", "--dev", "/dev", "--tmpfs", "/tmp", "--dir", "/home/node"])
+
+    args.extend(["--ro-bind", str(SANDBOX_RUNNER_DIR), "/app"])
+    for mount in spec.mounts:
+        flag = "--ro-bind" if mount["readonly"] else "--bind"
+        args.extend([flag, mount["host_path"], mount["container_path"]])
+    for path in spec.tmpfs:
+        if path != "/tmp":
+            args.extend(["--tmpfs", path])
+    args.extend(["--chdir", "/workspace/group"])
+
+    if seccomp_fd is not None:
+        args.extend(["--seccomp", str(seccomp_fd)])
+
+    args.append("--")
+    args.extend(spec.command or [SANDBOX_PYTHON, "/app/main.py"])
+    return args
+
+
+def _create_cgroup(spec: ContainerSpec) -> Path | None:
+    if not SANDBOX_CGROUP_PARENT:
+        return None
+    cgroup = Path(SANDBOX_CGROUP_PARENT) / spec.name
+    memory_max = str(spec.memory_bytes) if spec.memory_bytes is not None else SANDBOX_MEMORY_MAX
+    cpu_max = f"{int(spec.cpus * 100_000)} 100000" if spec.cpus is not None else SANDBOX_CPU_MAX
+    try:
+        cgroup.mkdir()
+        (cgroup / "memory.max").write_text(memory_max)
+        (cgroup / "cpu.max").write_text(cpu_max)
+        if spec.pids_limit is not None:
+            (cgroup / "pids.max").write_text(str(spec.pids_limit))
+    except OSError as err:
+        logger.warning("Failed to set up sandbox cgroup, running without limits", cgroup=str(cgroup), error=str(err))
+        _remove_cgroup(cgroup)
+        return None
+    if spec.blkio_weight is not None:
+        try:
+            # blkio weight 10..1000 -> io.weight 1..10000, as runc converts it
+            io_weight = 1 + (spec.blkio_weight - 10) * 9999 // 990
+            (cgroup / "io.weight").write_text(f"default {io_weight}")
+        except OSError:
+            pass  # io controller not delegated
+    return cgroup
+
+
+def _remove_cgroup(cgroup: Path) -> None:
+    try:
+        cgroup.rmdir()
+    except OSError:
+        pass
+
+
+async def spawn_sandbox(spec: ContainerSpec) -> asyncio.subprocess.Process:
+    """Start the agent runner in a bubblewrap sandbox with stdin/stdout/stderr piped."""
+    seccomp_fd: int | None = None
+    if SANDBOX_SECCOMP_FILTER:
+        seccomp_fd = os.open(SANDBOX_SECCOMP_FILTER, os.O_RDONLY)
+    cgroup = _create_cgroup(spec)
+
+    argv = [BWRAP_BIN, *build_bwrap_args(spec, seccomp_fd)]
+    if cgroup:
+        # Join the cgroup before exec so nothing runs outside the limits
+        argv = ["sh", "-c", 'echo $$ > "$0/cgroup.procs" && exec "$@"', str(cgroup), *argv]
+
+    # Only what the runner needs; secrets still arrive on stdin
+    env = {
+        "PATH": os.environ.get("PATH", "/usr/local/bin:/usr/bin:/bin"),
+        "HOME": "/home/node",
+        "LANG": os.environ.get("LANG", "C.UTF-8"),
+        **spec.env,
+    }
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            pass_fds=(seccomp_fd,) if seccomp_fd is not None else (),
+        )
+    except BaseException:
+        if cgroup:
+            _remove_cgroup(cgroup)
+        raise
+    finally:
+        if seccomp_fd is not None:
+            os.close(seccomp_fd)
+
+    _sandboxes[spec.name] = process
+    if cgroup:
+        _cgroups[spec.name] = cgroup
+
+    async def reap() -> None:
+        await process.wait()
+        _sandboxes.pop(spec.name, None)
+        _cgroups.pop(spec.name, None)
+        if cgroup:
+            _remove_cgroup(cgroup)
+
+    asyncio.ensure_future(reap())
+    return process
+
+
+async def sandbox_stats(name: str) -> ResourceSample | None:
+    """CPU and memory counters from the sandbox's cgroup (None without SANDBOX_CGROUP_PARENT)."""
+    cgroup = _cgroups.get(name)
+    return read_cgroup_sample(cgroup) if cgroup else None
+
+
+async def stop_sandbox(name: str, grace_secs: float = 10) -> None:
+    """SIGTERM bwrap (the runner dies with it via --die-with-parent), SIGKILL after the grace period."""
+    process = _sandboxes.get(name)
+    if not process or process.returncode is not None:
+        return
+    process.terminate()
+    try:
+        await asyncio.wait_for(process.wait(), timeout=grace_secs)
+    except TimeoutError:
+        process.kill()
+
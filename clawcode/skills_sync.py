@@ -0,0 +1,143 @@
+"""Skills Sync.
+
+Copies container/skills into each group's .claude/skills directory, but only
+when the skills' content changed. A content-hash manifest of the source tree
+is computed once and re-validated at most every SKILLS_RESCAN_SECS; each
+group's last synced manifest, and the size and mtime of every file it wrote,
+is remembered in memory and in a marker file. When nothing changed,
+preparing a spawn costs one stat per synced file. Synced files the agent
+edited or deleted are copied again.
+
+Only files this sync wrote are ever updated or removed; anything the agent
+adds to its skills directory is left alone.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from clawcode.config import PROJECT_ROOT
+from clawcode.logger import logger
+
+SKILLS_SRC: Path = PROJECT_ROOT / "container" / "skills"
+MARKER_FILE = ".clawcode-skills.json"
+SKILLS_RESCAN_SECS = 30
+
+
+@dataclass
+class SkillsManifest:
+    digest: str  # Hash over all file hashes; '' when there are no skills
+    files: dict[str, str]  # Relative path -> sha256
+    signature: tuple  # (path, size, mtime_ns) of every file, to detect edits cheaply
+
+
+_manifest: SkillsManifest | None = None
+_checked_at = 0.0
+_synced: dict[str, tuple[str, dict[str, tuple[int, int] | None]]] = {}  # skills_dst -> (digest, file stats) last synced there
+
+
+def _stat_signature(root: Path) -> tuple:
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            entries.append((os.path.relpath(path, root), st.st_size, st.st_mtime_ns))
+    return tuple(entries)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def skills_manifest(root: Path | None = None) -> SkillsManifest:
+    """Current manifest of the skills source, rehashed only when file stats changed."""
+    global _manifest, _checked_at
+    root = root or SKILLS_SRC
+    now = time.monotonic()
+    if _manifest is not None and now - _checked_at < SKILLS_RESCAN_SECS:
+        return _manifest
+    _checked_at = now
+
+    signature = _stat_signature(root) if root.is_dir() else ()
+    if _manifest is not None and _manifest.signature == signature:
+        return _manifest
+
+    files = {rel: _hash_file(root / rel) for rel, _, _ in signature}
+    combined = hashlib.sha256(json.dumps(sorted(files.items())).encode()).hexdigest() if files else ""
+    _manifest = SkillsManifest(digest=combined, files=files, signature=signature)
+    return _manifest
+
+
+def _read_marker(skills_dst: Path) -> tuple[dict[str, str], dict[str, tuple[int, int]]]:
+    """Files (relative path -> sha256) last synced to ``skills_dst`` and their (size, mtime_ns) there."""
+    try:
+        marker = json.loads((skills_dst / MARKER_FILE).read_text())
+    except (OSError, ValueError):
+        return {}, {}
+    return marker.get("files", {}), {rel: tuple(st) for rel, st in marker.get("stats", {}).items()}
+
+
+def _dst_stats(skills_dst: Path, files: dict[str, str]) -> dict[str, tuple[int, int] | None]:
+    """(size, mtime_ns) of each synced file at the destination, None if it's gone."""
+    stats: dict[str, tuple[int, int] | None] = {}
+    for rel in files:
+        try:
+            st = os.stat(skills_dst / rel)
+            stats[rel] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            stats[rel] = None
+    return stats
+
+
+def sync_skills(skills_dst: Path, root: Path | None = None) -> bool:
+    """Bring ``skills_dst`` up to date with the skills source. Returns True if anything was copied.
+
+    Synced files the agent edited or deleted in its group folder are restored.
+    """
+    root = root or SKILLS_SRC
+    manifest = skills_manifest(root)
+    key = str(skills_dst)
+    dst_stats = _dst_stats(skills_dst, manifest.files)
+    if _synced.get(key) == (manifest.digest, dst_stats):
+        return False
+
+    previous, previous_stats = _read_marker(skills_dst)
+    copied = 0
+    for rel, file_hash in manifest.files.items():
+        if previous.get(rel) == file_hash and dst_stats[rel] is not None and previous_stats.get(rel) == dst_stats[rel]:
+            continue
+        dst = skills_dst / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(root / rel, dst)
+        copied += 1
+    removed = 0
+    for rel in previous.keys() - manifest.files.keys():
+        try:
+            (skills_dst / rel).unlink()
+            removed += 1
+        except OSError:
+            pass
+
+    if copied or removed:
+        dst_stats = _dst_stats(skills_dst, manifest.files)
+    if (copied or removed or manifest.files != previous) and (manifest.files or previous):
+        skills_dst.mkdir(parents=True, exist_ok=True)
+        (skills_dst / MARKER_FILE).write_text(
+            json.dumps({"digest": manifest.digest, "files": manifest.files, "stats": dst_stats})
+        )
+    _synced[key] = (manifest.digest, dst_stats)
+    if copied or removed:
+        logger.debug("Skills synced", skills_dir=key, copied=copied, removed=removed)
+    return copied > 0 or removed > 0
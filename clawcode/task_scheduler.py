@@ -14,12 +14,30 @@ from typing import Callable, Coroutine
 from croniter import croniter
 
 from clawcode.config import ASSISTANT_NAME, MAIN_GROUP_FOLDER, SCHEDULER_POLL_INTERVAL
-from clawcode.container_runner import ContainerInput, ContainerOutput, run_container_agent, write_tasks_snapshot
-from clawcode.db import get_all_tasks, get_due_tasks, get_task_by_id, log_task_run, update_task, update_task_after_run
+from clawcode.container_runner import (
+    ContainerInput,
+    ContainerOutput,
+    adopt_container_agent,
+    run_container_agent,
+)
+from clawcode.db import (
+    delete_container_run,
+    flush_writes,
+    get_due_tasks,
+    get_task_by_id,
+    log_task_run,
+    record_container_run_output,
+    register_container_run,
+    update_task,
+    update_task_after_run,
+)
 from clawcode.group_folder import resolve_group_folder_path
 from clawcode.group_queue import GroupQueue
+from clawcode.ipc_snapshots import ipc_snapshots
 from clawcode.logger import logger
-from clawcode.models import RegisteredGroup, ScheduledTask, TaskRunLog
+from clawcode.models import ContainerRun, RegisteredGroup, ScheduledTask, TaskRunLog
+
+TASK_CLOSE_DELAY = 10.0  # seconds
 
 
 class SchedulerDependencies:
@@ -73,52 +91,26 @@ async def _run_task(task: ScheduledTask, deps: SchedulerDependencies) -> None:
         return
 
     is_main = task.group_folder == MAIN_GROUP_FOLDER
-    all_tasks = get_all_tasks()
-    write_tasks_snapshot(
-        task.group_folder,
-        is_main,
-        [
-            {
-                "id": t.id,
-                "groupFolder": t.group_folder,
-                "prompt": t.prompt,
-                "schedule_type": t.schedule_type,
-                "schedule_value": t.schedule_value,
-                "status": t.status,
-                "next_run": t.next_run,
-            }
-            for t in all_tasks
-        ],
-    )
-
-    result: str | None = None
-    error: str | None = None
+    ipc_snapshots.write_tasks(task.group_folder, is_main)
 
     sessions = deps.get_sessions()
     session_id = sessions.get(task.group_folder) if task.context_mode == "group" else None
-
-    TASK_CLOSE_DELAY = 10.0  # seconds
-    close_handle: asyncio.TimerHandle | None = None
-
-    def schedule_close():
-        nonlocal close_handle
-        if close_handle:
-            return
-        loop = asyncio.get_event_loop()
-        close_handle = loop.call_later(TASK_CLOSE_DELAY, lambda: deps.queue.close_stdin(task.chat_jid))
+    run = _TaskRun(task, deps, start_time)
+
+    def on_process(proc, name: str) -> None:
+        deps.on_process(task.chat_jid, proc, name, task.group_folder)
+        run.container_name = name
+        # Registered like message runs, so a restarted host re-adopts the container instead of stopping it
+        register_container_run(ContainerRun(
+            container_name=name,
+            chat_jid=task.chat_jid,
+            group_folder=task.group_folder,
+            started_at=datetime.now(timezone.utc).isoformat(),
+            session_id=session_id,
+            task_id=task.id,
+        ))
 
     try:
-        async def on_output(streamed_output: ContainerOutput):
-            nonlocal result, error
-            if streamed_output.result:
-                result = streamed_output.result
-                await deps.send_message(task.chat_jid, streamed_output.result)
-                schedule_close()
-            if streamed_output.status == "success":
-                deps.queue.notify_idle(task.chat_jid)
-            if streamed_output.status == "error":
-                error = streamed_output.error or "Unknown error"
-
         output = await run_container_agent(
             group,
             ContainerInput(
@@ -130,31 +122,99 @@ async def _run_task(task: ScheduledTask, deps: SchedulerDependencies) -> None:
                 is_scheduled_task=True,
                 assistant_name=ASSISTANT_NAME,
             ),
+            on_process,
+            run.on_output,
+        )
+        run.finish(output)
+    except Exception as err:
+        run.fail(err)
+
+    _record_task_run(task, start_time, run.result, run.error)
+
+
+async def resume_task_run(container_run: ContainerRun, deps: SchedulerDependencies) -> None:
+    """Stream a scheduled task container that outlived the previous host to completion, then log the run."""
+    start_time = datetime.fromisoformat(container_run.started_at).timestamp()
+    task = get_task_by_id(container_run.task_id)
+    group = next((g for g in deps.registered_groups().values() if g.folder == container_run.group_folder), None)
+    if not task or not group:
+        logger.warning("Adopted task container has no task or group, letting it run out", container_name=container_run.container_name)
+        delete_container_run(container_run.container_name)
+        return
+
+    run = _TaskRun(task, deps, start_time, container_run.container_name)
+    try:
+        output = await adopt_container_agent(
+            group,
+            container_run.container_name,
             lambda proc, name: deps.on_process(task.chat_jid, proc, name, task.group_folder),
-            on_output,
+            run.on_output,
+            skip_results=container_run.outputs_delivered,
         )
+        run.finish(output)
+    except Exception as err:
+        run.fail(err)
+
+    _record_task_run(task, start_time, run.result, run.error)
+
 
-        if close_handle:
-            close_handle.cancel()
+class _TaskRun:
+    """Output handling shared by fresh and re-adopted task containers."""
 
+    def __init__(
+        self, task: ScheduledTask, deps: SchedulerDependencies, start_time: float, container_name: str | None = None
+    ) -> None:
+        self.task = task
+        self.deps = deps
+        self.start_time = start_time
+        self.container_name = container_name
+        self.result: str | None = None
+        self.error: str | None = None
+        self._close_handle: asyncio.TimerHandle | None = None
+
+    def _schedule_close(self) -> None:
+        if self._close_handle:
+            return
+        loop = asyncio.get_event_loop()
+        self._close_handle = loop.call_later(TASK_CLOSE_DELAY, lambda: self.deps.queue.close_stdin(self.task.chat_jid))
+
+    async def on_output(self, streamed_output: ContainerOutput) -> None:
+        if streamed_output.result:
+            self.result = streamed_output.result
+            await self.deps.send_message(self.task.chat_jid, streamed_output.result)
+            self._schedule_close()
+        if self.container_name and streamed_output.status != "session":
+            record_container_run_output(self.container_name)
+        if streamed_output.status == "success":
+            self.deps.queue.notify_idle(self.task.chat_jid)
+        if streamed_output.status == "error":
+            self.error = streamed_output.error or "Unknown error"
+
+    def finish(self, output: ContainerOutput) -> None:
+        self._done()
         if output.status == "error":
-            error = output.error or "Unknown error"
+            self.error = output.error or "Unknown error"
         elif output.result:
-            result = output.result
+            self.result = output.result
+        logger.info("Task completed", task_id=self.task.id, duration_ms=int((time.time() - self.start_time) * 1000))
 
-        logger.info("Task completed", task_id=task.id, duration_ms=int((time.time() - start_time) * 1000))
-    except Exception as err:
-        if close_handle:
-            close_handle.cancel()
-        error = str(err)
-        logger.error("Task failed", task_id=task.id, error=error)
+    def fail(self, err: Exception) -> None:
+        self._done()
+        self.error = str(err)
+        logger.error("Task failed", task_id=self.task.id, error=self.error)
+
+    def _done(self) -> None:
+        if self._close_handle:
+            self._close_handle.cancel()
+        if self.container_name:
+            delete_container_run(self.container_name)
 
-    duration_ms = int((time.time() - start_time) * 1000)
 
+def _record_task_run(task: ScheduledTask, start_time: float, result: str | None, error: str | None) -> None:
     log_task_run(TaskRunLog(
         task_id=task.id,
         run_at=datetime.now(timezone.utc).isoformat(),
-        duration_ms=duration_ms,
+        duration_ms=int((time.time() - start_time) * 1000),
         status="error" if error else "success",
         result=result,
         error=error,
@@ -186,6 +246,7 @@ async def start_scheduler_loop(deps: SchedulerDependencies) -> None:
     async def loop():
         while True:
             try:
+                await flush_writes()  # Next runs of tasks that just finished
                 due_tasks = get_due_tasks()
                 if due_tasks:
                     logger.info("Found due tasks", count=len(due_tasks))
@@ -0,0 +1,255 @@
+"""Workspace Snapshots.
+
+Each agent run mounts a copy-on-write snapshot of the prepared repo checkout
+at /workspace/repo instead of the shared checkout itself. Edits, build
+artifacts and node_modules die with the snapshot, so the shared checkout
+stays pristine and concurrent runs on one repo can't contaminate each other.
+
+Modes, tried in order for ``auto``:
+    btrfs    — ``btrfs subvolume snapshot`` (O(1); source must be a subvolume)
+    reflink  — ``cp --reflink=always`` (XFS/btrfs; O(files), no data copied)
+    hardlink — hardlink .git/objects (immutable), copy everything else. On
+               filesystems without reflinks (ext4) that is a full copy of the
+               worktree: O(repo) per run, made while holding the checkout
+               lock, so it serializes runs on the same repo. Its duration is
+               logged at info level.
+    overlay  — overlayfs upper dir over the checkout. Needs root, and the
+               checkout must not be reset while a run uses it, so it is only
+               used when selected explicitly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from clawcode.config import (
+    DATA_DIR,
+    WORKSPACE_HARVEST_RETENTION,
+    WORKSPACE_SNAPSHOT_HARVEST,
+    WORKSPACE_SNAPSHOT_MODE,
+)
+from clawcode.logger import logger
+
+WORKSPACES_DIR: Path = DATA_DIR / "workspaces"
+HARVESTED_DIR: Path = WORKSPACES_DIR / "harvested"
+POOL_SLOT_PREFIX = "pool-"  # Warm container repo slots (container_pool), not snapshots
+AUTO_MODES = ("btrfs", "reflink", "hardlink")
+SNAPSHOT_MODES = (*AUTO_MODES, "overlay")
+
+_live: dict[str, WorkspaceSnapshot] = {}
+_unsupported: set[str] = set()
+
+
+@dataclass
+class WorkspaceSnapshot:
+    run_id: str
+    mode: str
+    source: str
+    root: str  # Everything under here is removed on discard
+    path: str  # Mounted at /workspace/repo
+
+
+async def _run(*args: str, timeout: float = 300) -> None:
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise RuntimeError(f"{args[0]} timed out after {timeout}s") from None
+    if proc.returncode != 0:
+        raise RuntimeError(f"{args[0]} exited with code {proc.returncode}: {stderr.decode(errors='replace').strip()[-200:]}")
+
+
+def _is_btrfs_subvolume(path: str) -> bool:
+    # Subvolume roots always have inode 256 on btrfs
+    try:
+        return os.stat(path).st_ino == 256 and shutil.which("btrfs") is not None
+    except OSError:
+        return False
+
+
+async def _snapshot_btrfs(source: str, root: Path, path: Path) -> None:
+    if not _is_btrfs_subvolume(source):
+        raise RuntimeError("source is not a btrfs subvolume")
+    await _run("btrfs", "subvolume", "snapshot", source, str(path))
+
+
+async def _snapshot_reflink(source: str, root: Path, path: Path) -> None:
+    path.mkdir()
+    await _run("cp", "-a", "--reflink=always", f"{source}/.", str(path))
+
+
+async def _snapshot_hardlink(source: str, root: Path, path: Path) -> None:
+    # Git never modifies objects or packs in place, so sharing their inodes is safe.
+    # Everything else (worktree, index, refs, config) gets its own copy.
+    path.mkdir()
+    src_git = Path(source) / ".git"
+    entries = [e for e in Path(source).iterdir() if e.name != ".git"]
+    if entries:
+        await _run("cp", "-a", "--reflink=auto", *(str(e) for e in entries), str(path))
+    (path / ".git").mkdir()
+    git_entries = [e for e in src_git.iterdir() if e.name != "objects"]
+    if git_entries:
+        await _run("cp", "-a", "--reflink=auto", *(str(e) for e in git_entries), str(path / ".git"))
+    await _run("cp", "-al", str(src_git / "objects"), str(path / ".git" / "objects"))
+
+
+async def _snapshot_overlay(source: str, root: Path, path: Path) -> None:
+    upper, work = root / "upper", root / "work"
+    for d in (upper, work, path):
+        d.mkdir()
+    await _run(
+        "mount", "-t", "overlay", "overlay",
+        "-o", f"lowerdir={source},upperdir={upper},workdir={work}",
+        str(path),
+    )
+
+
+_STRATEGIES = {
+    "btrfs": _snapshot_btrfs,
+    "reflink": _snapshot_reflink,
+    "hardlink": _snapshot_hardlink,
+    "overlay": _snapshot_overlay,
+}
+
+
+async def create_snapshot(source: str, run_id: str, mode: str = WORKSPACE_SNAPSHOT_MODE) -> WorkspaceSnapshot | None:
+    """Snapshot ``source`` for one run. Returns None if snapshots are off or every mode failed.
+
+    Raises ValueError if ``run_id`` already has a live snapshot.
+    """
+    if mode == "off":
+        return None
+    if run_id in _live:
+        raise ValueError(f"Run {run_id} already has a live workspace snapshot")
+    modes = AUTO_MODES if mode == "auto" else (mode,)
+
+    root = WORKSPACES_DIR / run_id
+    for candidate in modes:
+        if candidate in _unsupported:
+            continue
+        start = time.time()
+        shutil.rmtree(root, ignore_errors=True)
+        root.mkdir(parents=True)
+        path = root / "repo"
+        try:
+            await _STRATEGIES[candidate](source, root, path)
+        except Exception as err:
+            logger.debug("Snapshot mode unavailable", mode=candidate, error=str(err))
+            if mode == "auto" and candidate != "hardlink":
+                _unsupported.add(candidate)  # Filesystem capabilities don't change at runtime
+            await _remove(WorkspaceSnapshot(run_id, candidate, source, str(root), str(path)))
+            continue
+
+        snapshot = WorkspaceSnapshot(run_id=run_id, mode=candidate, source=source, root=str(root), path=str(path))
+        _live[run_id] = snapshot
+        duration_ms = int((time.time() - start) * 1000)
+        if candidate == "hardlink":
+            # Not copy-on-write: worth seeing when it dominates run startup
+            logger.info("Workspace snapshot copied", run_id=run_id, mode=candidate, duration_ms=duration_ms)
+        else:
+            logger.debug("Workspace snapshot created", run_id=run_id, mode=candidate, duration_ms=duration_ms)
+        return snapshot
+
+    logger.warning("Failed to snapshot workspace, mounting shared checkout", run_id=run_id, mode=mode)
+    return None
+
+
+async def _remove(snapshot: WorkspaceSnapshot) -> None:
+    if snapshot.mode == "overlay" and os.path.ismount(snapshot.path):
+        try:
+            await _run("umount", snapshot.path, timeout=30)
+        except Exception as err:
+            logger.warning("Failed to unmount overlay snapshot", path=snapshot.path, error=str(err))
+            return
+    if snapshot.mode == "btrfs" and _is_btrfs_subvolume(snapshot.path):
+        try:
+            await _run("btrfs", "subvolume", "delete", snapshot.path, timeout=60)
+        except Exception as err:
+            logger.warning("Failed to delete btrfs snapshot", path=snapshot.path, error=str(err))
+    await asyncio.to_thread(shutil.rmtree, snapshot.root, True)
+
+
+def _existing_snapshot(root: Path) -> WorkspaceSnapshot:
+    """Rebuild the record of a snapshot on disk (its mode is read back from the mount / subvolume)."""
+    repo = root / "repo"
+    mode = "overlay" if os.path.ismount(repo) else "btrfs" if _is_btrfs_subvolume(str(repo)) else "copy"
+    return WorkspaceSnapshot(root.name, mode, "", str(root), str(repo))
+
+
+def adopt_snapshot(root: str) -> WorkspaceSnapshot | None:
+    """Take over the snapshot of a run re-adopted after a host restart, so it is released when the run ends."""
+    if not os.path.isdir(root):
+        return None
+    snapshot = _existing_snapshot(Path(root))
+    _live[snapshot.run_id] = snapshot  # Keeps cleanup_snapshots off it while the run is live
+    return snapshot
+
+
+async def release_snapshot(snapshot: WorkspaceSnapshot, failed: bool = False) -> str | None:
+    """Discard a run's snapshot, or keep it per WORKSPACE_SNAPSHOT_HARVEST.
+
+    Returns the harvested path, if kept.
+    """
+    _live.pop(snapshot.run_id, None)
+    harvest = WORKSPACE_SNAPSHOT_HARVEST == "always" or (WORKSPACE_SNAPSHOT_HARVEST == "error" and failed)
+    if not harvest:
+        await _remove(snapshot)
+        return None
+
+    if snapshot.mode == "overlay":
+        # Unmounting leaves exactly the run's changes in the upper dir
+        try:
+            await _run("umount", snapshot.path, timeout=30)
+        except Exception as err:
+            logger.warning("Failed to unmount overlay snapshot", path=snapshot.path, error=str(err))
+    HARVESTED_DIR.mkdir(parents=True, exist_ok=True)
+    dest = HARVESTED_DIR / snapshot.run_id
+    os.rename(snapshot.root, dest)
+    logger.info("Workspace snapshot harvested", run_id=snapshot.run_id, path=str(dest))
+    return str(dest)
+
+
+async def cleanup_snapshots(max_idle_ms: int) -> None:
+    """Remove snapshots left behind by crashed runs, and expired harvested ones.
+
+    Warm container slots are skipped: their mtime says nothing about the run
+    using them, and the pool removes them when the container is done.
+    """
+    now = time.time()
+    try:
+        entries = [e for e in WORKSPACES_DIR.iterdir() if e.is_dir() and e != HARVESTED_DIR]
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.name in _live or entry.name.startswith(POOL_SLOT_PREFIX):
+            continue
+        try:
+            idle_ms = (now - entry.stat().st_mtime) * 1000
+        except OSError:
+            continue
+        if idle_ms > max_idle_ms:
+            logger.info("Removing stale workspace snapshot", path=str(entry))
+            await _remove(_existing_snapshot(entry))
+
+    try:
+        harvested = list(HARVESTED_DIR.iterdir())
+    except FileNotFoundError:
+        return
+    for entry in harvested:
+        try:
+            expired = (now - entry.stat().st_mtime) * 1000 > WORKSPACE_HARVEST_RETENTION
+        except OSError:
+            continue
+        if expired:
+            await asyncio.to_thread(shutil.rmtree, entry, True)
@@ -2,13 +2,20 @@
 
 Replaces the stdio MCP server (ipc-mcp-stdio.ts) with in-process tools
 using the Python SDK's @tool decorator and create_sdk_mcp_server().
+
+Requests go to the host over its group socket when the runner connected one
+(length-prefixed JSON frames, each acked once the host acted on it, so tools
+report real success or failure). Otherwise they are dropped as files into
+/workspace/ipc/messages and /workspace/ipc/tasks.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import time
+from collections.abc import Callable
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -19,6 +26,7 @@ from croniter import croniter
 IPC_DIR = Path("/workspace/ipc")
 MESSAGES_DIR = IPC_DIR / "messages"
 TASKS_DIR = IPC_DIR / "tasks"
+IPC_REQUEST_TIMEOUT_SECS = 120.0
 
 
 def _write_ipc_file(dir_path: Path, data: dict) -> str:
@@ -32,6 +40,97 @@ def _write_ipc_file(dir_path: Path, data: dict) -> str:
     return filename
 
 
+class IpcSocket:
+    """Connection to the host's group socket. Host messages go to ``on_message`` (and are acked)."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        on_message: Callable[[dict], None],
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._on_message = on_message
+        self._seq = 0
+        self._pending: dict[int, asyncio.Future] = {}
+        self.closed = False
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    def _write(self, frame: dict) -> None:
+        payload = json.dumps(frame).encode()
+        self._writer.write(len(payload).to_bytes(4, "big") + payload)
+
+    async def request(self, data: dict) -> dict:
+        """Send a request; returns the host's ack ({"ok": bool, "error": ...})."""
+        self._seq += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._seq] = future
+        self._write({**data, "seq": self._seq})
+        await self._writer.drain()
+        return await asyncio.wait_for(future, IPC_REQUEST_TIMEOUT_SECS)
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                size = int.from_bytes(await self._reader.readexactly(4), "big")
+                frame = json.loads(await self._reader.readexactly(size))
+                if frame.get("type") == "ack":
+                    future = self._pending.pop(frame.get("ack"), None)
+                    if future and not future.done():
+                        future.set_result(frame)
+                    continue
+                seq = frame.pop("seq", None)
+                self._on_message(frame)
+                self._write({"type": "ack", "ack": seq})
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.closed = True
+            self._writer.close()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("connection to host lost"))
+
+
+_socket: IpcSocket | None = None
+
+
+async def connect_ipc_socket(path: str, token: str, on_message: Callable[[dict], None]) -> bool:
+    """Use the host's group socket for IPC. False (files stay in use) if it can't be reached.
+
+    The first frame presents this run's token, which tells the host which container is connected.
+    """
+    global _socket
+    try:
+        reader, writer = await asyncio.open_unix_connection(path)
+        payload = json.dumps({"type": "hello", "token": token}).encode()
+        writer.write(len(payload).to_bytes(4, "big") + payload)
+        await writer.drain()
+    except OSError:
+        return False
+    _socket = IpcSocket(reader, writer, on_message)
+    return True
+
+
+async def _send_ipc(dir_path: Path, data: dict) -> str | None:
+    """Send a request to the host. Returns an error message if it wasn't carried out."""
+    if _socket is None or _socket.closed:
+        _write_ipc_file(dir_path, data)
+        return None
+    try:
+        ack = await _socket.request(data)
+    except asyncio.TimeoutError:
+        return "No reply from the host in time; the request may still be carried out."
+    except (ConnectionError, OSError):
+        return "Lost the connection to the host; the request may not have been carried out."
+    return None if ack.get("ok") else ack.get("error") or "Rejected by the host."
+
+
+def _error_result(text: str) -> dict[str, Any]:
+    return {"content": [{"type": "text", "text": text}], "isError": True}
+
+
 def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
     """Create in-process MCP tools bound to the current container context.
 
@@ -65,7 +164,9 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "groupFolder": group_folder,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        _write_ipc_file(MESSAGES_DIR, data)
+        error = await _send_ipc(MESSAGES_DIR, data)
+        if error:
+            return _error_result(error)
         return {"content": [{"type": "text", "text": "Message sent."}]}
 
     @tool(
@@ -179,12 +280,14 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
 
-        filename = _write_ipc_file(TASKS_DIR, data)
+        error = await _send_ipc(TASKS_DIR, data)
+        if error:
+            return _error_result(error)
         return {
             "content": [
                 {
                     "type": "text",
-                    "text": f"Task scheduled ({filename}): {schedule_type} - {schedule_value}",
+                    "text": f"Task scheduled: {schedule_type} - {schedule_value}",
                 }
             ]
         }
@@ -259,7 +362,9 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "isMain": is_main,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        _write_ipc_file(TASKS_DIR, data)
+        error = await _send_ipc(TASKS_DIR, data)
+        if error:
+            return _error_result(error)
         return {
             "content": [
                 {"type": "text", "text": f"Task {args['task_id']} pause requested."}
@@ -285,7 +390,9 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "isMain": is_main,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        _write_ipc_file(TASKS_DIR, data)
+        error = await _send_ipc(TASKS_DIR, data)
+        if error:
+            return _error_result(error)
         return {
             "content": [
                 {"type": "text", "text": f"Task {args['task_id']} resume requested."}
@@ -311,7 +418,9 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "isMain": is_main,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        _write_ipc_file(TASKS_DIR, data)
+        error = await _send_ipc(TASKS_DIR, data)
+        if error:
+            return _error_result(error)
         return {
             "content": [
                 {
@@ -367,7 +476,9 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "trigger": args["trigger"],
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        _write_ipc_file(TASKS_DIR, data)
+        error = await _send_ipc(TASKS_DIR, data)
+        if error:
+            return _error_result(error)
         return {
             "content": [
                 {
@@ -409,7 +520,9 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "groupFolder": group_folder,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        _write_ipc_file(MESSAGES_DIR, data)
+        error = await _send_ipc(MESSAGES_DIR, data)
+        if error:
+            return _error_result(error)
         return {"content": [{"type": "text", "text": "Comment posted."}]}
 
     @tool(
@@ -471,7 +584,9 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "groupFolder": group_folder,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        _write_ipc_file(MESSAGES_DIR, data)
+        error = await _send_ipc(MESSAGES_DIR, data)
+        if error:
+            return _error_result(error)
         return {
             "content": [
                 {"type": "text", "text": f"Review submitted ({args['event']})."}
@@ -510,7 +625,9 @@ def create_ipc_tools(chat_jid: str, group_folder: str, is_main: bool) -> Any:
             "groupFolder": group_folder,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        _write_ipc_file(MESSAGES_DIR, data)
+        error = await _send_ipc(MESSAGES_DIR, data)
+        if error:
+            return _error_result(error)
         return {
             "content": [
                 {
@@ -5,18 +5,27 @@ Runs inside a container, receives config via stdin, outputs result to stdout.
 Input protocol:
     Stdin: Full ContainerInput JSON (read until EOF)
     IPC:   Follow-up messages written as JSON files to /workspace/ipc/input/
-           Files: {type:"message", text:"..."}.json -- polled and consumed
+           Files: {type:"message", text:"..."}.json -- consumed as inotify reports them (polled without inotify)
            Sentinel: /workspace/ipc/input/_close -- signals session end
+    Socket: when stdin carries "ipcSocket" and "ipcToken", follow-ups ({type:"message"}) and
+           {type:"close"} may also arrive over that socket (see ipc_tools)
 
 Stdout protocol:
-    Each result is wrapped in OUTPUT_START_MARKER / OUTPUT_END_MARKER pairs.
+    Version 1: each result is wrapped in OUTPUT_START_MARKER / OUTPUT_END_MARKER pairs.
     Multiple results may be emitted (one per agent teams result).
     Final marker after loop ends signals completion.
+
+    Version 2, when the host offers it (stdin "protocolVersion" >= 2): a
+    "CLAWCODE_PROTOCOL 2" line, then each message as a 4-byte big-endian
+    length + UTF-8 JSON with a "type": result, session, progress, usage,
+    tool_timing or error. Anything else printed to stdout goes to stderr.
 """
 
 from __future__ import annotations
 
 import asyncio
+import ctypes
+import ctypes.util
 import json
 import os
 import re
@@ -35,7 +44,7 @@ from claude_agent_sdk import (
     SystemMessage,
 )
 
-from ipc_tools import create_ipc_tools
+from ipc_tools import connect_ipc_socket, create_ipc_tools
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -43,10 +52,15 @@ from ipc_tools import create_ipc_tools
 
 IPC_INPUT_DIR = Path("/workspace/ipc/input")
 IPC_INPUT_CLOSE_SENTINEL = IPC_INPUT_DIR / "_close"
-IPC_POLL_SECS = 0.5
+IPC_POLL_SECS = 0.5  # Without inotify
+IPC_RESCAN_SECS = 5.0  # With inotify: safety net for mounts that don't deliver events
+IN_CLOSE_WRITE = 0x00000008  # inotify(7)
+IN_MOVED_TO = 0x00000080
 
 OUTPUT_START_MARKER = "---CLAWCODE_OUTPUT_START---"
 OUTPUT_END_MARKER = "---CLAWCODE_OUTPUT_END---"
+PROTOCOL_VERSION = 2
+PROGRESS_INTERVAL_SECS = 5.0
 
 SECRET_ENV_VARS = ["ANTHROPIC_API_KEY", "CLAUDE_CODE_OAUTH_TOKEN"]
 
@@ -73,8 +87,38 @@ class ContainerInput:
 # ---------------------------------------------------------------------------
 
 
+_frame_fd: int | None = None  # Set once protocol 2 is negotiated
+
+
+def negotiate_protocol(offered: int | None) -> int:
+    """Switch stdout to length-prefixed frames if the host offered version 2."""
+    global _frame_fd
+    if not offered or offered < 2:
+        return 1
+    sys.stdout.flush()
+    _frame_fd = os.dup(1)
+    os.dup2(2, 1)  # Stray prints (ours, the SDK's, subprocesses') can't corrupt frames
+    os.write(_frame_fd, f"CLAWCODE_PROTOCOL {PROTOCOL_VERSION}\n".encode())
+    return PROTOCOL_VERSION
+
+
+def write_message(message_type: str, **fields: Any) -> None:
+    """Send a typed message to the host. Protocol 1 only carries results and errors."""
+    if _frame_fd is None:
+        if message_type in ("result", "error"):
+            write_output(fields)
+        return
+    payload = json.dumps({"type": message_type, **fields}).encode()
+    data = len(payload).to_bytes(4, "big") + payload
+    while data:
+        data = data[os.write(_frame_fd, data):]
+
+
 def write_output(output: dict) -> None:
     """Write a structured output block to stdout."""
+    if _frame_fd is not None:
+        write_message("error" if output.get("status") == "error" else "result", **output)
+        return
     print(OUTPUT_START_MARKER, flush=True)
     print(json.dumps(output), flush=True)
     print(OUTPUT_END_MARKER, flush=True)
@@ -85,13 +129,37 @@ def log(message: str) -> None:
     print(f"[agent-runner] {message}", file=sys.stderr, flush=True)
 
 
+def phase(name: str) -> None:
+    """Emit a phase marker for the host's run ledger."""
+    print(f"CLAWCODE_PHASE {name} {int(time.time() * 1000)}", file=sys.stderr, flush=True)
+
+
 # ---------------------------------------------------------------------------
 # IPC input helpers
 # ---------------------------------------------------------------------------
 
 
+_socket_inbox: list[str] = []  # Follow-ups received over the IPC socket
+_socket_close_requested = False
+
+
+def on_host_message(message: dict) -> None:
+    """A message from the host over the IPC socket."""
+    global _socket_close_requested
+    if message.get("type") == "message" and message.get("text"):
+        _socket_inbox.append(message["text"])
+    elif message.get("type") == "close":
+        _socket_close_requested = True
+    if _input_watcher:
+        _input_watcher.notify()
+
+
 def should_close() -> bool:
-    """Check for _close sentinel."""
+    """Check for a close request (socket) or the _close sentinel."""
+    global _socket_close_requested
+    if _socket_close_requested:
+        _socket_close_requested = False
+        return True
     if IPC_INPUT_CLOSE_SENTINEL.exists():
         try:
             IPC_INPUT_CLOSE_SENTINEL.unlink()
@@ -103,10 +171,11 @@ def should_close() -> bool:
 
 def drain_ipc_input() -> list[str]:
     """Drain all pending IPC input messages. Returns message texts."""
+    messages: list[str] = _socket_inbox[:]
+    _socket_inbox.clear()
     try:
         IPC_INPUT_DIR.mkdir(parents=True, exist_ok=True)
         files = sorted(f for f in IPC_INPUT_DIR.iterdir() if f.suffix == ".json")
-        messages: list[str] = []
         for file_path in files:
             try:
                 data = json.loads(file_path.read_text())
@@ -122,7 +191,59 @@ def drain_ipc_input() -> list[str]:
         return messages
     except Exception as err:
         log(f"IPC drain error: {err}")
-        return []
+        return messages
+
+
+def inotify_watch(directory: Path, mask: int) -> int:
+    """Non-blocking inotify fd watching ``directory``. Raises OSError if unavailable."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError) as err:
+        raise OSError(f"inotify unavailable: {err}") from err
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    if libc.inotify_add_watch(fd, os.fsencode(directory), ctypes.c_uint32(mask)) < 0:
+        err = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(err, "inotify_add_watch failed")
+    return fd
+
+
+class InputWatcher:
+    """Wakes when a file lands in IPC_INPUT_DIR, so an idle container sleeps in the kernel."""
+
+    def __init__(self) -> None:
+        self._ready = asyncio.Event()
+        self._fd = -1
+        try:
+            IPC_INPUT_DIR.mkdir(parents=True, exist_ok=True)
+            self._fd = inotify_watch(IPC_INPUT_DIR, IN_MOVED_TO | IN_CLOSE_WRITE)
+            asyncio.get_running_loop().add_reader(self._fd, self._on_readable)
+        except OSError as err:
+            log(f"Polling IPC input every {IPC_POLL_SECS}s ({err})")
+
+    def notify(self) -> None:
+        self._ready.set()
+
+    def _on_readable(self) -> None:
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        self._ready.set()
+
+    async def wait(self) -> None:
+        timeout = IPC_RESCAN_SECS if self._fd >= 0 else IPC_POLL_SECS
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()  # The caller re-checks the directory next
+
+
+_input_watcher: InputWatcher | None = None
 
 
 async def wait_for_ipc_message() -> str | None:
@@ -130,13 +251,16 @@ async def wait_for_ipc_message() -> str | None:
 
     Returns the concatenated message text, or None if _close.
     """
+    global _input_watcher
+    if _input_watcher is None:
+        _input_watcher = InputWatcher()  # Watching before the first check, so nothing slips in between
     while True:
         if should_close():
             return None
         messages = drain_ipc_input()
         if messages:
             return "\n".join(messages)
-        await asyncio.sleep(IPC_POLL_SECS)
+        await _input_watcher.wait()
 
 
 # ---------------------------------------------------------------------------
@@ -311,6 +435,36 @@ def create_sanitize_bash_hook():
     return hook
 
 
+def create_tool_timing_hooks():
+    """Create PreToolUse / PostToolUse hooks that report each tool call's duration."""
+    started: dict[str, float] = {}
+
+    async def pre_hook(
+        input_data: dict[str, Any],
+        tool_use_id: str | None,
+        context: Any,
+    ) -> dict[str, Any]:
+        if tool_use_id:
+            started[tool_use_id] = time.monotonic()
+        return {}
+
+    async def post_hook(
+        input_data: dict[str, Any],
+        tool_use_id: str | None,
+        context: Any,
+    ) -> dict[str, Any]:
+        start = started.pop(tool_use_id, None) if tool_use_id else None
+        if start is not None:
+            write_message(
+                "tool_timing",
+                tool=input_data.get("tool_name"),
+                durationMs=int((time.monotonic() - start) * 1000),
+            )
+        return {}
+
+    return pre_hook, post_hook
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -331,7 +485,9 @@ async def main() -> None:
             assistant_name=raw.get("assistantName"),
             secrets=raw.get("secrets"),
         )
-        log(f"Received input for group: {container_input.group_folder}")
+        phase("input_received")
+        protocol = negotiate_protocol(raw.get("protocolVersion"))
+        log(f"Received input for group: {container_input.group_folder} (protocol {protocol})")
     except Exception as err:
         write_output(
             {"status": "error", "result": None, "error": f"Failed to parse input: {err}"}
@@ -348,6 +504,10 @@ async def main() -> None:
         os.environ["GH_TOKEN"] = container_input.secrets["GITHUB_TOKEN"]
         os.environ["GITHUB_TOKEN"] = container_input.secrets["GITHUB_TOKEN"]
 
+    if raw.get("ipcSocket") and raw.get("ipcToken"):
+        connected = await connect_ipc_socket(raw["ipcSocket"], raw["ipcToken"], on_host_message)
+        log(f"IPC transport: {'socket' if connected else 'files (socket unreachable)'}")
+
     # Create in-process MCP tools
     clawcode_server = create_ipc_tools(
         chat_jid=container_input.chat_jid,
@@ -395,6 +555,8 @@ async def main() -> None:
     if extra_dirs:
         log(f"Additional directories: {', '.join(extra_dirs)}")
 
+    tool_timing_pre, tool_timing_post = create_tool_timing_hooks()
+
     # Build SDK options
     options = ClaudeAgentOptions(
         cwd="/workspace/group",
@@ -420,8 +582,10 @@ async def main() -> None:
                 HookMatcher(hooks=[create_pre_compact_hook(container_input.assistant_name)])
             ],
             "PreToolUse": [
-                HookMatcher(matcher="Bash", hooks=[create_sanitize_bash_hook()])
+                HookMatcher(matcher="Bash", hooks=[create_sanitize_bash_hook()]),
+                HookMatcher(hooks=[tool_timing_pre]),
             ],
+            "PostToolUse": [HookMatcher(hooks=[tool_timing_post])],
         },
     )
 
@@ -429,6 +593,8 @@ async def main() -> None:
 
     try:
         async with ClaudeSDKClient(options=options) as client:
+            phase("sdk_connected")
+            first_message = True
             while True:
                 log(f"Starting query (session: {session_id or 'new'})...")
 
@@ -436,9 +602,16 @@ async def main() -> None:
 
                 result_count = 0
                 message_count = 0
+                last_progress = time.monotonic()
 
                 async for message in client.receive_response():
                     message_count += 1
+                    if first_message:
+                        first_message = False
+                        phase("first_message")
+                    if time.monotonic() - last_progress >= PROGRESS_INTERVAL_SECS:
+                        last_progress = time.monotonic()
+                        write_message("progress", messages=message_count)
 
                     if isinstance(message, SystemMessage):
                         if message.subtype == "init":
@@ -446,6 +619,7 @@ async def main() -> None:
                             if new_sid:
                                 session_id = new_sid
                                 log(f"Session initialized: {session_id}")
+                                write_message("session", sessionId=session_id)
 
                     if isinstance(message, ResultMessage):
                         result_count += 1
@@ -461,6 +635,13 @@ async def main() -> None:
                                 "newSessionId": session_id,
                             }
                         )
+                        write_message(
+                            "usage",
+                            usage=message.usage,
+                            costUsd=message.total_cost_usd,
+                            durationMs=message.duration_ms,
+                            numTurns=message.num_turns,
+                        )
 
                 log(
                     f"Query done. Messages: {message_count}, results: {result_count}"
@@ -66,6 +66,7 @@ def build_app_manifest(webhook_url: str) -> dict:
             "pull_request",
             "pull_request_review",
             "pull_request_review_comment",
+            "push",
         ],
     }
 
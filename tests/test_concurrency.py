@@ -0,0 +1,100 @@
+"""Tests for the adaptive container concurrency controller."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from clawcode.concurrency import ConcurrencyController, HostSignals, read_host_signals
+from clawcode.group_queue import GroupQueue
+
+GIB = 1024**3
+
+
+def _controller(**kwargs) -> ConcurrencyController:
+    kwargs.setdefault("memory_per_container", 2 * GIB)
+    return ConcurrencyController(floor=1, ceiling=8, initial=4, **kwargs)
+
+
+def _healthy(**overrides) -> HostSignals:
+    signals = HostSignals(mem_available_bytes=32 * GIB, psi={"cpu": 1.0, "memory": 0.0, "io": 2.0}, oom_kills=0)
+    for key, value in overrides.items():
+        setattr(signals, key, value)
+    return signals
+
+
+class TestConcurrencyController:
+    def test_additive_increase_only_under_demand(self):
+        controller = _controller()
+        assert controller.adjust(_healthy(), active=4, waiting=0) == 4
+        assert controller.adjust(_healthy(), active=4, waiting=3) == 5
+        assert controller.adjust(_healthy(), active=5, waiting=3) == 6
+
+    def test_multiplicative_decrease_on_pressure(self):
+        controller = _controller()
+        assert controller.adjust(_healthy(psi={"memory": 60.0}), active=4, waiting=0) == 2
+        assert controller.adjust(_healthy(mem_available_bytes=GIB // 8), active=2, waiting=0) == 1
+        assert controller.adjust(_healthy(mem_available_bytes=GIB // 8), active=1, waiting=0) == 1  # Floor
+
+    def test_new_oom_kills_back_off(self):
+        controller = _controller()
+        controller.adjust(_healthy(oom_kills=7), active=4, waiting=0)  # Baseline
+        assert controller.limit == 4
+        assert controller.adjust(_healthy(oom_kills=8), active=4, waiting=0) == 2
+
+    def test_no_increase_without_memory_headroom(self):
+        controller = _controller()
+        assert controller.adjust(_healthy(mem_available_bytes=GIB), active=4, waiting=2) == 4
+
+    def test_slow_docker_daemon_backs_off(self):
+        controller = _controller()
+        assert controller.adjust(_healthy(docker_latency_ms=5000), active=4, waiting=0) == 2
+
+    def test_ceiling(self):
+        controller = ConcurrencyController(floor=1, ceiling=4, initial=4, memory_per_container=GIB)
+        assert controller.adjust(_healthy(), active=4, waiting=5) == 4
+
+
+class TestReadHostSignals:
+    def test_parses_proc_files(self, tmp_path):
+        (tmp_path / "meminfo").write_text("MemTotal: 16000000 kB\nMemAvailable: 8000000 kB\n")
+        (tmp_path / "pressure").mkdir()
+        (tmp_path / "pressure" / "memory").write_text(
+            "some avg10=12.50 avg60=3.00 avg300=1.00 total=100\nfull avg10=1.00 avg60=0.00 avg300=0.00 total=5\n"
+        )
+        (tmp_path / "vmstat").write_text("pgfault 1\noom_kill 3\n")
+
+        signals = read_host_signals(tmp_path)
+        assert signals.mem_available_bytes == 8_000_000 * 1024
+        assert signals.psi == {"memory": 12.5}
+        assert signals.oom_kills == 3
+
+
+class TestQueueUsesController:
+    @pytest.mark.asyncio
+    async def test_raised_limit_starts_waiting_groups(self):
+        queue = GroupQueue()
+        limit = 1
+        queue.set_concurrency_limit_fn(lambda: limit)
+        release = asyncio.Event()
+        started: list[str] = []
+
+        async def process_messages(group_jid: str) -> bool:
+            started.append(group_jid)
+            await release.wait()
+            return True
+
+        queue.set_process_messages_fn(process_messages)
+        queue.enqueue_message_check("gh:octo/a#issue:1")
+        queue.enqueue_message_check("gh:octo/b#issue:1")
+        await asyncio.sleep(0.01)
+        assert started == ["gh:octo/a#issue:1"]
+        assert queue.load() == (1, 1)
+
+        limit = 2
+        queue.on_concurrency_limit_changed(limit)
+        await asyncio.sleep(0.01)
+        assert started == ["gh:octo/a#issue:1", "gh:octo/b#issue:1"]
+        release.set()
+        await asyncio.sleep(0.01)
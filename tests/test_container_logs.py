@@ -0,0 +1,52 @@
+"""Tests for buffered, rotated per-run container log files."""
+
+from __future__ import annotations
+
+import gzip
+import os
+import time
+
+import pytest
+
+from clawcode.container_logs import ContainerLogWriter, cleanup_container_logs
+
+
+class TestContainerLogWriter:
+    @pytest.mark.asyncio
+    async def test_writes_compressed_file_and_keeps_tail(self, tmp_path):
+        writer = ContainerLogWriter(tmp_path, "clawcode-run-1", flush_bytes=1024)
+        for i in range(200):
+            writer.write(f"[agent-runner] line {i}\n".encode())
+        await writer.close()
+
+        content = gzip.decompress(writer.path.read_bytes()).decode()
+        assert content.count("\n") == 200
+        assert writer.bytes_written == len(content)
+        assert writer.tail(2) == ["[agent-runner] line 198", "[agent-runner] line 199"]
+
+    @pytest.mark.asyncio
+    async def test_rotates_and_keeps_newest_parts(self, tmp_path):
+        writer = ContainerLogWriter(tmp_path, "clawcode-run-1", rotate_bytes=1000, max_parts=2, flush_bytes=500)
+        for _ in range(20):
+            writer.write(b"x" * 499 + b"\n")
+            await writer.flush()  # Each chunk goes out on its own, so rotation is deterministic
+        await writer.close()
+
+        parts = sorted(p.name for p in tmp_path.iterdir())
+        assert parts == ["clawcode-run-1.8.log.gz", "clawcode-run-1.9.log.gz"]
+
+
+class TestCleanupContainerLogs:
+    def test_age_and_size_retention(self, tmp_path):
+        logs = tmp_path / "octo--hello" / "logs"
+        logs.mkdir(parents=True)
+        now = time.time()
+        for name, age_days in (("old.0.log.gz", 10), ("mid.0.log.gz", 2), ("new.0.log.gz", 0)):
+            path = logs / name
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+        (logs / "notes.txt").write_text("not a container log")
+
+        removed = cleanup_container_logs(tmp_path, max_age_ms=7 * 86_400_000, max_group_bytes=150)
+        assert removed == 2
+        assert sorted(p.name for p in logs.iterdir()) == ["new.0.log.gz", "notes.txt"]
@@ -0,0 +1,134 @@
+"""Tests for the warm container pool."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+
+from clawcode.container_pool import REPO_SLOT_MARKER, ContainerPool, move_contents, pool_key
+
+
+class FakeProcess:
+    def __init__(self):
+        self.returncode = None
+
+
+def _mounts(repo_path: str = "/data/workspaces/run-1/repo") -> list[dict]:
+    return [
+        {"host_path": repo_path, "container_path": "/workspace/repo", "readonly": False},
+        {"host_path": "/groups/octo--hello", "container_path": "/workspace/group", "readonly": False},
+    ]
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    monkeypatch.setattr("clawcode.container_pool.WORKSPACES_DIR", tmp_path)
+    spawned: list[tuple[list[dict], str]] = []
+    stopped: list[str] = []
+
+    async def spawn(mounts, name):
+        spawned.append((mounts, name))
+        return FakeProcess()
+
+    async def stop(name, process):
+        stopped.append(name)
+        process.returncode = 0
+
+    return ContainerPool(spawn, stop, max_size=4, max_per_layout=2), spawned, stopped
+
+
+class TestPoolKey:
+    def test_snapshot_repo_mount_becomes_slot(self):
+        a = pool_key(_mounts("/ws/run-1/repo"), repo_is_snapshot=True)
+        b = pool_key(_mounts("/ws/run-2/repo"), repo_is_snapshot=True)
+        assert a == b
+        assert a[0][0] == REPO_SLOT_MARKER
+
+    def test_shared_checkout_is_part_of_key(self):
+        a = pool_key(_mounts("/repos/octo--a"), repo_is_snapshot=False)
+        b = pool_key(_mounts("/repos/octo--b"), repo_is_snapshot=False)
+        assert a != b
+
+
+class TestContainerPool:
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self, pool):
+        p, spawned, _ = pool
+        key = pool_key(_mounts(), repo_is_snapshot=True)
+
+        assert p.acquire(key, _mounts()) is None
+        await asyncio.sleep(0.01)
+        assert len(spawned) == 1
+
+        warm = p.acquire(key, _mounts("/data/workspaces/run-2/repo"))
+        assert warm is not None
+        assert warm.repo_slot and os.path.isdir(warm.repo_slot)
+        # The warm container binds the slot, not the snapshot of the run that triggered it
+        repo_mount = next(m for m in spawned[0][0] if m["container_path"] == "/workspace/repo")
+        assert repo_mount["host_path"] == warm.repo_slot
+        assert p.stats()["hits"] == 1 and p.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_dead_container_is_a_miss(self, pool):
+        p, _, _ = pool
+        key = pool_key(_mounts(), repo_is_snapshot=True)
+        p.acquire(key, _mounts())
+        await asyncio.sleep(0.01)
+        p._layouts[key].warm[0].process.returncode = 1
+
+        assert p.acquire(key, _mounts()) is None
+
+    @pytest.mark.asyncio
+    async def test_size_follows_arrival_rate(self, pool):
+        p, _, _ = pool
+        key = pool_key(_mounts(), repo_is_snapshot=True)
+        assert p.target_size(key) == 0
+
+        p.acquire(key, _mounts())
+        assert p.target_size(key) == 1
+        for _ in range(50):
+            p._layouts[key].arrivals.append(p._layouts[key].arrivals[-1])
+        assert p.target_size(key) == 2  # capped by max_per_layout
+
+    @pytest.mark.asyncio
+    async def test_maintain_retires_idle_layouts(self, pool):
+        p, _, stopped = pool
+        key = pool_key(_mounts(), repo_is_snapshot=True)
+        p.acquire(key, _mounts())
+        await asyncio.sleep(0.01)
+        slot = p._layouts[key].warm[0].repo_slot
+
+        p._layouts[key].arrivals.clear()
+        await p.maintain()
+
+        assert len(stopped) == 1
+        assert not os.path.exists(slot)
+        assert key not in p._layouts
+
+    @pytest.mark.asyncio
+    async def test_close_stops_warm_containers(self, pool):
+        p, _, stopped = pool
+        key = pool_key(_mounts(), repo_is_snapshot=True)
+        p.acquire(key, _mounts())
+        await asyncio.sleep(0.01)
+
+        await p.close()
+
+        assert len(stopped) == 1
+        assert p.stats()["warm"] == 0
+
+
+def test_move_contents_round_trip(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    (src / ".git").mkdir(parents=True)
+    (src / "README.md").write_text("hi")
+    dest.mkdir()
+
+    move_contents(str(src), str(dest))
+    assert sorted(os.listdir(dest)) == [".git", "README.md"]
+    assert os.listdir(src) == []
+
+    move_contents(str(dest), str(src))
+    assert (src / "README.md").read_text() == "hi"
@@ -0,0 +1,102 @@
+"""Tests for container resource profiles and usage sampling."""
+
+from __future__ import annotations
+
+import pytest
+
+from clawcode import container_resources
+from clawcode.container_resources import (
+    ResourceSample,
+    UsageSampler,
+    parse_size,
+    read_cgroup_sample,
+    resource_profile,
+)
+from clawcode.container_runtime import ContainerSpec, api_create_config, cli_run_args
+from clawcode.db import get_agent_run_usage
+from clawcode.models import ContainerConfig
+from clawcode.run_ledger import RunTimer, summarize_usage
+
+
+class TestResourceProfile:
+    def test_parse_size(self):
+        assert parse_size("512m") == 512 * 1024**2
+        assert parse_size("1.5GiB") == int(1.5 * 1024**3)
+        assert parse_size("4096") == 4096
+        with pytest.raises(ValueError):
+            parse_size("lots")
+
+    def test_group_overrides_defaults(self, monkeypatch):
+        monkeypatch.setattr(container_resources, "CONTAINER_CPUS", 1.0)
+        monkeypatch.setattr(container_resources, "CONTAINER_MEMORY", "2g")
+        monkeypatch.setattr(container_resources, "CONTAINER_TMPFS", "/tmp:1g")
+
+        assert resource_profile(None).is_default
+        profile = resource_profile(ContainerConfig(memory="8g", tmpfs=["/tmp:4g", "/home/node/.cache"], blkio_weight=200))
+        assert not profile.is_default
+        assert profile.cpus == 1.0
+        assert profile.memory_bytes == 8 * 1024**3
+        assert profile.tmpfs == {"/tmp": f"size={4 * 1024**3}", "/home/node/.cache": ""}
+        assert profile.blkio_weight == 200
+
+    def test_limits_reach_both_backends(self):
+        spec = ContainerSpec(
+            name="clawcode-x",
+            image="img",
+            cpus=1.5,
+            memory_bytes=1024**3,
+            tmpfs={"/tmp": "size=1048576"},
+            blkio_weight=300,
+        )
+        args = cli_run_args(spec)
+        assert "--cpus=1.5" in args and f"--memory={1024**3}" in args and "--blkio-weight=300" in args
+        assert args[args.index("--tmpfs") + 1] == "/tmp:size=1048576"
+
+        host_config = api_create_config(spec)["HostConfig"]
+        assert host_config["NanoCpus"] == 1_500_000_000
+        assert host_config["Memory"] == 1024**3
+        assert host_config["Tmpfs"] == {"/tmp": "size=1048576"}
+        assert host_config["BlkioWeight"] == 300
+
+
+class TestUsageSampling:
+    def test_read_cgroup_sample(self, tmp_path):
+        (tmp_path / "cpu.stat").write_text("usage_usec 2500000\nuser_usec 2000000\n")
+        (tmp_path / "memory.current").write_text("1048576\n")
+        (tmp_path / "memory.peak").write_text("4194304\n")
+        assert read_cgroup_sample(tmp_path) == ResourceSample(2_500_000, 1_048_576, 4_194_304)
+        assert read_cgroup_sample(tmp_path / "gone") is None
+
+    @pytest.mark.asyncio
+    async def test_sampler_keeps_cpu_and_peak(self):
+        samples = iter([ResourceSample(1_000, 300), None, ResourceSample(5_000_000, 200)])
+
+        async def sample():
+            return next(samples)
+
+        sampler = UsageSampler(sample, interval_secs=0)
+        for _ in range(3):
+            await sampler.sample_once()
+        usage = await sampler.stop()
+        assert (usage.cpu_ms, usage.peak_memory_bytes, usage.samples) == (5_000, 300, 2)
+
+    @pytest.mark.asyncio
+    async def test_no_samples_means_no_usage(self):
+        async def sample():
+            raise OSError("daemon gone")
+
+        sampler = UsageSampler(sample, interval_secs=0)
+        await sampler.sample_once()
+        assert await sampler.stop() is None
+
+    def test_usage_recorded_with_run(self):
+        timer = RunTimer("gh:octo/hello#issue:1", "octo--hello")
+        timer.profile = resource_profile(ContainerConfig(cpus=2, memory="1g"))
+        timer.usage = container_resources.ResourceUsage(cpu_ms=1200, peak_memory_bytes=512 * 1024**2, samples=3)
+        run = timer.build("success")
+        assert (run.cpus, run.memory_limit_bytes, run.cpu_ms, run.peak_memory_bytes) == (2, 1024**3, 1200, 512 * 1024**2)
+
+        timer.finish("success")
+        summary = summarize_usage(get_agent_run_usage("1970-01-01"))
+        assert summary["octo--hello"]["peak_mib_max"] == 512
+        assert summary["octo--hello"]["limit_mib"] == 1024
@@ -53,6 +53,22 @@ class TestCleanupOrphans:
         # ps + 2 stop calls = 3
         assert mock_run.call_count == 3
 
+    @patch("clawcode.container_runtime.subprocess.run")
+    def test_keeps_adopted_containers(self, mock_run):
+        mock_run.return_value = type("Result", (), {
+            "stdout": "clawcode-group1-111\nclawcode-group2-222\n"
+        })()
+        cleanup_orphans(keep={"clawcode-group1-111"})
+        assert mock_run.call_count == 2
+        assert mock_run.call_args.args[0] == [CONTAINER_RUNTIME_BIN, "stop", "clawcode-group2-222"]
+
+    @patch("clawcode.container_runtime.subprocess.run")
+    def test_only_stops_listed_candidates(self, mock_run):
+        cleanup_orphans(keep={"clawcode-group1-111"}, candidates={"clawcode-group1-111", "clawcode-group2-222"})
+        # No fresh listing: a container started since the candidates were listed survives
+        assert mock_run.call_count == 1
+        assert mock_run.call_args.args[0] == [CONTAINER_RUNTIME_BIN, "stop", "clawcode-group2-222"]
+
     @patch("clawcode.container_runtime.subprocess.run")
     def test_does_nothing_when_no_orphans(self, mock_run):
         mock_run.return_value = type("Result", (), {"stdout": ""})()
@@ -2,17 +2,30 @@
 
 from __future__ import annotations
 
+import json
+import sqlite3
+
+from clawcode import db
+from clawcode.config import ASSISTANT_NAME
 from clawcode.db import (
+    advance_thread_cursor,
     create_task,
+    delete_container_run,
     delete_task,
     get_all_chats,
+    get_container_runs,
     get_messages_since,
     get_task_by_id,
+    get_thread_cursor,
+    get_threads_with_pending_messages,
+    record_container_run_output,
+    register_container_run,
+    set_thread_cursor,
     store_chat_metadata,
     store_message,
     update_task,
 )
-from clawcode.models import NewMessage, ScheduledTask
+from clawcode.models import ContainerRun, NewMessage, ScheduledTask
 
 
 # ---------------------------------------------------------------------------
@@ -27,7 +40,7 @@ class TestStoreMessage:
             id="msg-1", chat_jid="group@g.us", sender="123@s.whatsapp.net",
             sender_name="Alice", content="hello world", timestamp="2024-01-01T00:00:01.000Z",
         ))
-        messages = get_messages_since("group@g.us", "2024-01-01T00:00:00.000Z", "Andy")
+        messages = get_messages_since("group@g.us", 0)
         assert len(messages) == 1
         assert messages[0].id == "msg-1"
         assert messages[0].sender == "123@s.whatsapp.net"
@@ -40,7 +53,7 @@ class TestStoreMessage:
             id="msg-2", chat_jid="group@g.us", sender="111@s.whatsapp.net",
             sender_name="Dave", content="", timestamp="2024-01-01T00:00:04.000Z",
         ))
-        messages = get_messages_since("group@g.us", "2024-01-01T00:00:00.000Z", "Andy")
+        messages = get_messages_since("group@g.us", 0)
         assert len(messages) == 0
 
     def test_upserts_on_duplicate(self):
@@ -53,7 +66,7 @@ class TestStoreMessage:
             id="msg-dup", chat_jid="group@g.us", sender="123@s.whatsapp.net",
             sender_name="Alice", content="updated", timestamp="2024-01-01T00:00:01.000Z",
         ))
-        messages = get_messages_since("group@g.us", "2024-01-01T00:00:00.000Z", "Andy")
+        messages = get_messages_since("group@g.us", 0)
         assert len(messages) == 1
         assert messages[0].content == "updated"
 
@@ -84,33 +97,124 @@ class TestGetMessagesSince:
             sender_name="Carol", content="third", timestamp="2024-01-01T00:00:04.000Z",
         ))
 
-    def test_returns_messages_after_timestamp(self):
+    def test_returns_messages_after_cursor(self):
         self._setup_messages()
-        msgs = get_messages_since("group@g.us", "2024-01-01T00:00:02.000Z", "Andy")
+        msgs = get_messages_since("group@g.us", 2)
         assert len(msgs) == 1
         assert msgs[0].content == "third"
 
     def test_excludes_bot_messages(self):
         self._setup_messages()
-        msgs = get_messages_since("group@g.us", "2024-01-01T00:00:00.000Z", "Andy")
+        msgs = get_messages_since("group@g.us", 0)
         assert not any(m.content == "bot reply" for m in msgs)
 
-    def test_returns_all_non_bot_when_empty_timestamp(self):
+    def test_returns_all_non_bot_from_cursor_zero(self):
         self._setup_messages()
-        msgs = get_messages_since("group@g.us", "", "Andy")
-        assert len(msgs) == 3
+        msgs = get_messages_since("group@g.us", 0)
+        assert [m.seq for m in msgs] == [1, 2, 4]
 
-    def test_filters_pre_migration_bot_via_content_prefix(self):
+    def test_flags_assistant_name_prefix_as_bot_message(self):
         self._setup_messages()
         store_message(NewMessage(
             id="m5", chat_jid="group@g.us", sender="Bot@s.whatsapp.net",
-            sender_name="Bot", content="Andy: old bot reply",
+            sender_name="Bot", content=f"{ASSISTANT_NAME}: old bot reply",
             timestamp="2024-01-01T00:00:05.000Z",
         ))
-        msgs = get_messages_since("group@g.us", "2024-01-01T00:00:04.000Z", "Andy")
+        msgs = get_messages_since("group@g.us", 4)
         assert len(msgs) == 0
 
 
+    def test_seq_follows_arrival_per_thread_and_survives_upserts(self):
+        self._setup_messages()
+        store_message(NewMessage(
+            id="x1", chat_jid="other@g.us", sender="Eve", sender_name="Eve",
+            content="elsewhere", timestamp="2023-12-31T00:00:00.000Z",
+        ))
+        store_message(NewMessage(
+            id="m1", chat_jid="group@g.us", sender="Alice@s.whatsapp.net",
+            sender_name="Alice", content="first (edited)", timestamp="2024-01-01T00:00:09.000Z",
+        ))
+        assert [(m.id, m.seq) for m in get_messages_since("group@g.us", 0)] == [("m1", 1), ("m2", 2), ("m4", 4)]
+        assert [m.seq for m in get_messages_since("other@g.us", 0)] == [1]
+
+
+# ---------------------------------------------------------------------------
+# thread cursors
+# ---------------------------------------------------------------------------
+
+
+class TestThreadCursors:
+    def test_set_and_advance(self):
+        assert get_thread_cursor("gh:octo/hello#issue:1") == 0
+        set_thread_cursor("gh:octo/hello#issue:1", 3)
+        assert get_thread_cursor("gh:octo/hello#issue:1") == 3
+
+        for i in range(5):
+            store_message(NewMessage(
+                id=f"d{i}", chat_jid="gh:octo/hello#issue:1", sender="octocat", sender_name="octocat",
+                content="hi", timestamp="2024-01-01T00:00:00.000Z",
+            ))
+        advance_thread_cursor("gh:octo/hello#issue:1")
+        assert get_thread_cursor("gh:octo/hello#issue:1") == 5
+        assert get_thread_cursor("gh:octo/hello#issue:2") == 0
+
+    def test_threads_with_pending_messages(self):
+        def store(thread: int, msg_id: str, timestamp: str, is_bot_message: bool = False) -> None:
+            jid = f"gh:octo/hello#issue:{thread}"
+            store_chat_metadata(jid, timestamp)
+            store_message(NewMessage(
+                id=msg_id, chat_jid=jid, sender="octocat", sender_name="octocat",
+                content="hi", timestamp=timestamp, is_bot_message=is_bot_message,
+            ))
+
+        store(1, "a1", "2024-01-01T00:00:05.000Z")
+        store(1, "a2", "2024-01-01T00:00:06.000Z")
+        store(2, "b1", "2024-01-01T00:00:01.000Z")  # Handled
+        store(2, "b2", "2024-01-01T00:00:02.000Z", is_bot_message=True)  # Only bot output since
+        store(3, "c1", "2024-01-01T00:00:03.000Z")
+        store(3, "c2", "2024-01-01T00:00:04.000Z")
+        set_thread_cursor("gh:octo/hello#issue:1", 1)
+        set_thread_cursor("gh:octo/hello#issue:2", 1)
+
+        assert get_threads_with_pending_messages() == [
+            {"chat_jid": "gh:octo/hello#issue:3", "pending": 2, "oldest": "2024-01-01T00:00:03.000Z"},
+            {"chat_jid": "gh:octo/hello#issue:1", "pending": 1, "oldest": "2024-01-01T00:00:06.000Z"},
+        ]
+
+
+class TestSeqCursorMigration:
+    def test_numbers_messages_and_converts_timestamp_cursors(self):
+        conn = sqlite3.connect(":memory:")
+        conn.executescript("""
+            CREATE TABLE messages (id TEXT, chat_jid TEXT, sender TEXT, sender_name TEXT, content TEXT,
+                                   timestamp TEXT, is_from_me INTEGER, is_bot_message INTEGER DEFAULT 0,
+                                   PRIMARY KEY (id, chat_jid));
+            CREATE TABLE router_state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE container_runs (container_name TEXT PRIMARY KEY, chat_jid TEXT NOT NULL,
+                                         group_folder TEXT NOT NULL, started_at TEXT NOT NULL, session_id TEXT,
+                                         cursor TEXT NOT NULL DEFAULT '', previous_cursor TEXT NOT NULL DEFAULT '',
+                                         outputs_delivered INTEGER NOT NULL DEFAULT 0);
+        """)
+        for i, ts in enumerate(["2024-01-01T00:00:03Z", "2024-01-01T00:00:01Z", "2024-01-01T00:00:02Z"]):
+            conn.execute("INSERT INTO messages (id, chat_jid, content, timestamp) VALUES (?, 'gh:o/r#issue:1', 'hi', ?)", (f"m{i}", ts))
+        conn.execute(
+            "INSERT INTO router_state VALUES ('last_agent_timestamp', ?)",
+            (json.dumps({"gh:o/r#issue:1": "2024-01-01T00:00:02Z"}),),
+        )
+        conn.execute(
+            "INSERT INTO container_runs (container_name, chat_jid, group_folder, started_at, cursor, previous_cursor) "
+            "VALUES ('clawcode-o--r-1', 'gh:o/r#issue:1', 'o--r', 't', '2024-01-01T00:00:03Z', '')"
+        )
+        conn.commit()
+
+        db._create_schema(conn)
+        assert conn.execute("SELECT id, seq FROM messages ORDER BY seq").fetchall() == [("m1", 1), ("m2", 2), ("m0", 3)]
+        assert conn.execute("SELECT chat_jid, seq FROM thread_cursors").fetchall() == [("gh:o/r#issue:1", 2)]
+        assert conn.execute("SELECT value FROM router_state WHERE key = 'last_agent_timestamp'").fetchone() is None
+        assert conn.execute("SELECT cursor, previous_cursor FROM container_runs").fetchone() == ("3", "0")
+        conn.close()
+
+
 # ---------------------------------------------------------------------------
 # store_chat_metadata
 # ---------------------------------------------------------------------------
@@ -181,3 +285,36 @@ class TestTaskCrud:
         ))
         delete_task("task-3")
         assert get_task_by_id("task-3") is None
+
+
+# ---------------------------------------------------------------------------
+# Container run registry
+# ---------------------------------------------------------------------------
+
+
+class TestContainerRuns:
+    def test_register_record_and_delete(self):
+        register_container_run(ContainerRun(
+            container_name="clawcode-octo--hello-1", chat_jid="gh:octo/hello#issue:1", group_folder="octo--hello",
+            started_at="2024-01-01T00:00:00.000Z", session_id="s1",
+            cursor=2, previous_cursor=1,
+        ))
+        record_container_run_output("clawcode-octo--hello-1")
+        record_container_run_output("clawcode-octo--hello-1", session_id="s2")
+
+        [run] = get_container_runs()
+        assert run.outputs_delivered == 2
+        assert run.session_id == "s2"
+        assert run.previous_cursor == 1
+
+        delete_container_run("clawcode-octo--hello-1")
+        assert get_container_runs() == []
+
+    def test_task_and_snapshot_fields_round_trip(self):
+        register_container_run(ContainerRun(
+            container_name="clawcode-main-1", chat_jid="main@g.us", group_folder="main",
+            started_at="2024-01-01T00:00:00.000Z", task_id="task-1", snapshot_root="/data/workspaces/main-1",
+        ))
+        [run] = get_container_runs()
+        assert run.task_id == "task-1"
+        assert run.snapshot_root == "/data/workspaces/main-1"
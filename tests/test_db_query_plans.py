@@ -0,0 +1,129 @@
+"""EXPLAIN QUERY PLAN checks for db.py's hot queries on a large seeded database.
+
+The real db functions run against the seeded database with statement tracing
+on; each traced SELECT/DELETE is explained, so the assertions follow the
+queries as db.py actually issues them.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from clawcode import db
+from clawcode.config import ASSISTANT_NAME
+
+MESSAGES = 2_000_000
+CHATS = 20_000
+TASKS = 100_000  # Mostly completed; a few hundred active
+EVENTS = 200_000
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA cache_size = -262144")
+    db._create_schema(conn)
+    conn.executescript(f"""
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {MESSAGES - 1})
+        INSERT INTO messages (id, chat_jid, sender, sender_name, content, timestamp, is_from_me, is_bot_message, seq)
+        SELECT printf('m%08d', i), printf('gh:octo/repo#issue:%06d', i / {MESSAGES // CHATS}), 'octocat', 'octocat', 'please fix',
+               printf('2024-01-01T00:00:00.%08dZ', i), 0, i % 3 = 0, 1 + i % {MESSAGES // CHATS}
+        FROM n;
+
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {CHATS - 1})
+        INSERT INTO chats (jid, name, last_message_time, channel, is_group)
+        SELECT printf('gh:octo/repo#issue:%06d', i), NULL, '2024-01-01T00:00:00Z', 'github', 1 FROM n;
+        INSERT INTO thread_cursors (chat_jid, seq)
+        SELECT jid, {MESSAGES // CHATS} FROM chats WHERE rowid % 100 != 0;  -- 1% of threads have a backlog
+
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {TASKS - 1})
+        INSERT INTO scheduled_tasks (id, group_folder, chat_jid, prompt, schedule_type, schedule_value, next_run, status, created_at)
+        SELECT 'task-' || i, 'octo--repo' || (i % 2000), 'gh:octo/repo', 'check CI', 'interval', '60000',
+               CASE WHEN i % 500 = 0 THEN printf('2024-01-01T00:%02d:00Z', i % 60) END,
+               CASE WHEN i % 500 = 0 THEN 'active' ELSE 'completed' END,
+               printf('2024-01-01T00:00:%02d.%06dZ', i % 60, i)
+        FROM n;
+
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {EVENTS - 1})
+        INSERT INTO processed_events (delivery_id, processed_at)
+        SELECT 'delivery-' || i, printf('2024-01-%02dT00:00:00.%06dZ', 1 + i % 28, i) FROM n;
+
+        ANALYZE;
+    """)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def explain(seeded, monkeypatch):
+    """Run ``fn`` against the seeded database; returns the query plan of every statement it ran."""
+
+    def run(fn) -> list[str]:
+        statements: list[str] = []
+        monkeypatch.setattr(db, "_db", seeded)
+        seeded.set_trace_callback(statements.append)
+        try:
+            fn()
+        finally:
+            seeded.set_trace_callback(None)
+        plans = []
+        for sql in statements:
+            if sql.lstrip().upper().startswith(("SELECT", "DELETE", "UPDATE")):
+                rows = seeded.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+                plans.append("\n".join(row["detail"] for row in rows))
+        return plans
+
+    return run
+
+
+class TestQueryPlans:
+    def test_messages_since_range_scans_chat_index(self, explain):
+        [plan] = explain(lambda: db.get_messages_since("gh:octo/repo#issue:000007", 50))
+        assert "USING INDEX idx_messages_chat_seq (chat_jid=? AND seq>?)" in plan
+        assert "TEMP B-TREE" not in plan  # Rows come out in seq order
+
+    def test_thread_cursor_lookup_uses_primary_key(self, explain):
+        [plan] = explain(lambda: db.get_thread_cursor("gh:octo/repo#issue:000007"))
+        assert "USING INDEX sqlite_autoindex_thread_cursors_1 (chat_jid=?)" in plan
+
+    def test_pending_threads_seek_each_cursor(self, explain):
+        [plan] = explain(db.get_threads_with_pending_messages)
+        assert "USING INDEX idx_messages_chat_seq (chat_jid=? AND seq>?)" in plan
+        assert "USING INDEX sqlite_autoindex_thread_cursors_1 (chat_jid=?)" in plan
+        assert "SCAN m" not in plan  # Never the whole message history
+
+    def test_due_tasks_use_partial_index(self, explain):
+        [plan] = explain(db.get_due_tasks)
+        assert "USING INDEX idx_due_tasks (next_run>? AND next_run<?)" in plan  # next_run IS NOT NULL becomes >NULL
+        assert "TEMP B-TREE" not in plan
+
+    def test_group_task_snapshot_uses_group_index(self, explain):
+        [plan] = explain(lambda: db.get_task_snapshot("octo--repo7"))
+        assert "USING INDEX idx_tasks_group (group_folder=?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_processed_events_cleanup_uses_processed_at_index(self, explain):
+        [plan] = explain(lambda: db.cleanup_processed_events(max_age_ms=10**13))  # Cutoff far in the past: deletes nothing
+        assert "USING COVERING INDEX idx_processed_at (processed_at<?)" in plan or "USING INDEX idx_processed_at (processed_at<?)" in plan
+
+    def test_event_lookup_uses_primary_key(self, explain):
+        [plan] = explain(lambda: db.is_event_processed("delivery-42"))
+        assert "USING COVERING INDEX sqlite_autoindex_processed_events_1 (delivery_id=?)" in plan
+
+
+class TestBotMessageMigration:
+    def test_flags_prefixed_messages_once(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute(
+            "CREATE TABLE messages (id TEXT, chat_jid TEXT, sender TEXT, sender_name TEXT, content TEXT, "
+            "timestamp TEXT, is_from_me INTEGER, is_bot_message INTEGER DEFAULT 0, PRIMARY KEY (id, chat_jid))"
+        )
+        conn.execute("INSERT INTO messages (id, chat_jid, content, timestamp) VALUES ('m1', 'c', ?, 't1')", (f"{ASSISTANT_NAME}: hi",))
+        conn.execute("INSERT INTO messages (id, chat_jid, content, timestamp) VALUES ('m2', 'c', 'hello', 't2')")
+        db._create_schema(conn)
+        assert conn.execute("SELECT id FROM messages WHERE is_bot_message = 1").fetchall() == [("m1",)]
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+        conn.close()
@@ -0,0 +1,78 @@
+"""Tests for the WAL database and its group-committing writer thread."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from clawcode import db
+from clawcode.db import (
+    close_database,
+    committed,
+    db_writer_stats,
+    flush_writes,
+    get_router_state,
+    init_database,
+    is_event_processed,
+    mark_event_processed,
+    set_router_state,
+)
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    init_database(tmp_path / "messages.db")
+    yield tmp_path / "messages.db"
+    close_database()
+
+
+class TestDbWriter:
+    @pytest.mark.asyncio
+    async def test_wal_and_read_your_writes(self, file_db):
+        assert db._get_db().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert await committed(mark_event_processed("delivery-1"))
+        assert is_event_processed("delivery-1")
+        assert not await committed(mark_event_processed("delivery-1"))
+
+    @pytest.mark.asyncio
+    async def test_writes_are_group_committed(self, file_db):
+        for i in range(200):
+            set_router_state(f"key-{i}", str(i))
+        await flush_writes()
+        assert get_router_state("key-199") == "199"
+        stats = db_writer_stats()
+        assert stats["writes"] == 200
+        assert stats["batches"] < 200
+
+    @pytest.mark.asyncio
+    async def test_failed_write_does_not_roll_back_the_batch(self, file_db):
+        set_router_state("before", "1")
+        failed = db._write(lambda conn: conn.execute("INSERT INTO no_such_table VALUES (1)"))
+        set_router_state("after", "2")
+        with pytest.raises(sqlite3.OperationalError):
+            await committed(failed)
+        await flush_writes()
+        assert get_router_state("before") == "1"
+        assert get_router_state("after") == "2"
+        assert db_writer_stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_snapshot_version_bumped_once_committed(self, file_db):
+        version = db.snapshot_version("tasks")
+        write = db._write(lambda conn: None, snapshot="tasks")
+        await committed(write)
+        assert db.snapshot_version("tasks") == version + 1
+
+    def test_read_connection_is_query_only(self, file_db):
+        with pytest.raises(sqlite3.OperationalError):
+            db._get_db().execute("INSERT INTO router_state (key, value) VALUES ('x', 'y')")
+
+    @pytest.mark.asyncio
+    async def test_flush_and_close_persist_writes(self, file_db):
+        set_router_state("last_timestamp", "2024-01-01T00:00:00.000Z")
+        await flush_writes()
+        close_database()
+        conn = sqlite3.connect(str(file_db))
+        assert conn.execute("SELECT value FROM router_state WHERE key = 'last_timestamp'").fetchone() == ("2024-01-01T00:00:00.000Z",)
+        conn.close()
@@ -0,0 +1,244 @@
+"""Tests for the Docker Engine API backend against a fake daemon on a unix socket."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+
+import pytest
+
+from clawcode.container_runtime import ContainerSpec, api_create_config, cli_run_args
+from clawcode.docker_api import DockerAPIError, DockerClient, demux_stream
+
+
+def _frame(stream: int, payload: bytes) -> bytes:
+    return bytes([stream, 0, 0, 0]) + struct.pack(">I", len(payload)) + payload
+
+
+class FakeDaemon:
+    """Minimal Engine API: create, attach (echoes stdin on exit), start, wait, stop."""
+
+    def __init__(self):
+        self.requests: list[str] = []
+        self.created: dict = {}
+        self.exited = asyncio.Event()
+        self.started = asyncio.Event()
+        self.attach_query = ""
+        self.late_frame: bytes | None = None  # Sent after /wait has already answered
+        self.hold_attach = False  # Never end the attach stream
+        self.exit_on_start = False  # The container exits as soon as it starts (e.g. bad entrypoint)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, _ = request_line.decode().split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                key, _, value = line.decode().partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            path = target.split("?")[0].removeprefix("/v1.41")
+            self.requests.append(f"{method} {path}")
+
+            if path.endswith("/attach"):
+                writer.write(b"HTTP/1.1 101 UPGRADED\r\nConnection: Upgrade\r\nUpgrade: tcp\r\n\r\n")
+                await writer.drain()
+                self.attach_query = target.split("?")[1]
+                if "stdin=1" in target:
+                    stdin = await reader.read()  # until the client half-closes
+                    await self.started.wait()
+                else:
+                    stdin = b""  # Re-attach to a running container
+                writer.write(_frame(2, b"[agent-runner] booted\n") + _frame(1, b"echo:") + _frame(1, stdin))
+                await writer.drain()
+                self.exited.set()
+                if self.late_frame is not None:
+                    await asyncio.sleep(0.05)
+                    writer.write(self.late_frame)
+                    await writer.drain()
+                if self.hold_attach:
+                    await asyncio.sleep(3600)
+                writer.close()
+                return
+
+            status, payload = 404, {"message": "no such route"}
+            if path == "/_ping":
+                status, payload = 200, "OK"
+            elif path == "/containers/create" and "name=taken" in target:
+                status, payload = 409, {"message": "Conflict. The container name is already in use"}
+            elif path == "/containers/create":
+                self.created = json.loads(body)
+                status, payload = 201, {"Id": "c0ffee"}
+            elif path.endswith("/start"):
+                self.started.set()
+                if self.exit_on_start:
+                    self.exited.set()
+                status, payload = 204, None
+            elif path.endswith("/wait"):
+                # Like the real daemon: headers once the wait is registered, the body on exit.
+                # A next-exit wait registered after the exit never answers.
+                data = json.dumps({"StatusCode": 0}).encode()
+                already_exited = self.exited.is_set()
+                writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode())
+                await writer.drain()
+                if already_exited and "condition=next-exit" in target:
+                    await asyncio.sleep(3600)
+                await self.exited.wait()
+                writer.write(data)
+                await writer.drain()
+                continue
+            elif path.endswith("/stop"):
+                status, payload = 204, None
+            elif path == "/containers/json":
+                status, payload = 200, [{"Names": ["/clawcode-octo--hello-1"]}]
+
+            data = b"" if payload is None else json.dumps(payload).encode()
+            writer.write(
+                f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+                + data
+            )
+            await writer.drain()
+
+
+@pytest.fixture
+async def daemon(tmp_path):
+    fake = FakeDaemon()
+    socket_path = str(tmp_path / "docker.sock")
+    server = await asyncio.start_unix_server(fake.handle, path=socket_path)
+    client = DockerClient(socket_path)
+    yield fake, client
+    await client.close()
+    server.close()
+
+
+def _spec() -> ContainerSpec:
+    return ContainerSpec(
+        name="clawcode-octo--hello-1",
+        image="clawcode-agent:latest",
+        mounts=[
+            {"host_path": "/groups/g", "container_path": "/workspace/group", "readonly": False},
+            {"host_path": "/groups/global", "container_path": "/workspace/global", "readonly": True},
+        ],
+        env={"TZ": "UTC"},
+        cap_drop=["ALL"],
+        pids_limit=512,
+        extra_hosts=["169.254.169.254:0.0.0.0"],
+    )
+
+
+class TestContainerSpec:
+    def test_cli_args(self):
+        assert cli_run_args(_spec()) == [
+            "run", "-i", "--rm", "--name", "clawcode-octo--hello-1",
+            "--cap-drop=ALL", "--pids-limit=512", "--add-host=169.254.169.254:0.0.0.0",
+            "-e", "TZ=UTC",
+            "-v", "/groups/g:/workspace/group",
+            "-v", "/groups/global:/workspace/global:ro",
+            "clawcode-agent:latest",
+        ]
+
+    def test_api_config_matches(self):
+        config = api_create_config(_spec())
+        assert config["OpenStdin"] and config["StdinOnce"] and not config["Tty"]
+        assert config["HostConfig"]["AutoRemove"]
+        assert config["HostConfig"]["Binds"] == ["/groups/g:/workspace/group", "/groups/global:/workspace/global:ro"]
+        assert config["Env"] == ["TZ=UTC"]
+
+
+class TestDemux:
+    @pytest.mark.asyncio
+    async def test_splits_streams_across_partial_reads(self):
+        raw = asyncio.StreamReader()
+        stdout, stderr = asyncio.StreamReader(), asyncio.StreamReader()
+        data = _frame(1, b"hello ") + _frame(2, b"log") + _frame(1, b"world")
+        raw.feed_data(data[:5])
+        raw.feed_data(data[5:])
+        raw.feed_eof()
+
+        await demux_stream(raw, stdout, stderr)
+        assert await stdout.read() == b"hello world"
+        assert await stderr.read() == b"log"
+
+
+class TestDockerClient:
+    @pytest.mark.asyncio
+    async def test_run_attached_round_trip(self, daemon):
+        fake, client = daemon
+        process = await client.run_attached("clawcode-octo--hello-1", api_create_config(_spec()))
+
+        process.stdin.write(b'{"prompt": "hi"}')
+        process.stdin.close()
+
+        stdout = await process.stdout.read()
+        stderr = await process.stderr.read()
+        assert await process.wait() == 0
+        assert process.returncode == 0
+        assert stdout == b'echo:{"prompt": "hi"}'
+        assert stderr == b"[agent-runner] booted\n"
+        # Attach and wait are in place before start, like `docker run -i`
+        assert fake.requests.index("POST /containers/c0ffee/attach") < fake.requests.index("POST /containers/c0ffee/start")
+        assert fake.created["Image"] == "clawcode-agent:latest"
+
+    @pytest.mark.asyncio
+    async def test_final_frame_after_wait_is_not_lost(self, daemon):
+        fake, client = daemon
+        fake.late_frame = _frame(1, b"---RESULT---")
+        process = await client.run_attached("clawcode-octo--hello-1", api_create_config(_spec()))
+        process.stdin.write(b"x")
+        process.stdin.close()
+
+        await fake.exited.wait()
+        assert await process.wait() == 0
+        assert await process.stdout.read() == b"echo:x---RESULT---"
+
+    @pytest.mark.asyncio
+    async def test_attach_closed_after_drain_timeout(self, daemon, monkeypatch):
+        monkeypatch.setattr("clawcode.docker_api.ATTACH_DRAIN_TIMEOUT", 0.05)
+        fake, client = daemon
+        fake.hold_attach = True
+        process = await client.run_attached("clawcode-octo--hello-1", api_create_config(_spec()))
+        process.stdin.close()
+
+        assert await asyncio.wait_for(process.wait(), timeout=2) == 0
+        assert await process.stdout.read() == b"echo:"
+
+    @pytest.mark.asyncio
+    async def test_container_exiting_at_start_is_seen(self, daemon):
+        fake, client = daemon
+        fake.exit_on_start = True
+        config = api_create_config(_spec())
+        config["HostConfig"]["AutoRemove"] = False  # next-exit: only answered if registered before the exit
+        process = await client.run_attached("clawcode-octo--hello-1", config)
+        process.stdin.close()
+
+        assert await asyncio.wait_for(process.wait(), timeout=2) == 0
+        assert fake.requests.index("POST /containers/c0ffee/wait") < fake.requests.index("POST /containers/c0ffee/start")
+
+    @pytest.mark.asyncio
+    async def test_reattach_replays_output(self, daemon):
+        fake, client = daemon
+        process = await client.reattach("c0ffee")
+
+        assert await process.stdout.read() == b"echo:"
+        assert await process.stderr.read() == b"[agent-runner] booted\n"
+        assert await process.wait() == 0
+        assert "stdin=0" in fake.attach_query and "logs=1" in fake.attach_query
+        assert "POST /containers/c0ffee/start" not in fake.requests
+
+    @pytest.mark.asyncio
+    async def test_simple_requests(self, daemon):
+        _, client = daemon
+        assert await client.ping()
+        await client.stop("clawcode-octo--hello-1")
+        names = await client.list("clawcode-")
+        assert names[0]["Names"] == ["/clawcode-octo--hello-1"]
+
+    @pytest.mark.asyncio
+    async def test_errors_raise(self, daemon):
+        _, client = daemon
+        with pytest.raises(DockerAPIError, match="already in use") as exc:
+            await client.create("taken", {})
+        assert exc.value.status_code == 409
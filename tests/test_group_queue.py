@@ -113,6 +113,59 @@ class TestGroupQueueShutdown:
         assert call_count == 0
 
 
+class TestGroupQueueAdopt:
+    @pytest.mark.asyncio
+    async def test_adopted_run_holds_slot_and_takes_piped_messages(self, queue, monkeypatch, tmp_path):
+        monkeypatch.setattr("clawcode.group_folder.DATA_DIR", tmp_path)
+        monkeypatch.setattr("clawcode.group_queue.MAX_CONCURRENT_CONTAINERS", 1)
+        release = asyncio.Event()
+        processed: list[str] = []
+
+        async def resume(group_jid: str) -> bool:
+            await release.wait()
+            return True
+
+        async def process_messages(group_jid: str) -> bool:
+            processed.append(group_jid)
+            return True
+
+        queue.set_process_messages_fn(process_messages)
+        queue.adopt("group1@g.us", "clawcode-group1-1", "group1", resume)
+        await asyncio.sleep(0.01)
+
+        assert queue.active_jids() == ["group1@g.us"]
+        assert queue.send_message("group1@g.us", "follow-up")
+        assert len(list((tmp_path / "ipc" / "group1" / "input").glob("*.json"))) == 1
+
+        queue.enqueue_message_check("group2@g.us")  # No slot while the adopted run is live
+        await asyncio.sleep(0.01)
+        assert processed == []
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert processed == ["group2@g.us"]
+
+    @pytest.mark.asyncio
+    async def test_adopted_task_container_takes_no_messages(self, queue):
+        release = asyncio.Event()
+
+        async def resume(group_jid: str) -> bool:
+            await release.wait()
+            return False  # Ignored for tasks: no message retry
+
+        assert queue.adopt("group1@g.us", "clawcode-group1-1", "group1", resume, task_id="task-1")
+        await asyncio.sleep(0.01)
+        # One slot per thread: a second container of the same thread is refused
+        assert not queue.adopt("group1@g.us", "clawcode-group1-2", "group1", resume)
+
+        assert queue.active_jids() == ["group1@g.us"]
+        assert not queue.send_message("group1@g.us", "follow-up")
+
+        release.set()
+        await asyncio.sleep(0.01)
+        assert queue.active_jids() == []
+
+
 class TestGroupQueueTaskPriority:
     @pytest.mark.asyncio
     async def test_drains_tasks_before_messages(self, queue):
@@ -46,7 +46,7 @@ def setup_groups():
         register_group=lambda jid, group: (
             groups.__setitem__(jid, group),
             set_registered_group(jid, group),
-        ),
+        )[1],
         sync_group_metadata=_noop_async,
         get_available_groups=lambda: [],
         write_groups_snapshot=lambda *a: None,
@@ -0,0 +1,71 @@
+"""Tests for the dirty-tracked per-group IPC snapshot files."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from clawcode.db import create_task, set_registered_group, store_chat_metadata, update_task
+from clawcode.ipc_snapshots import IpcSnapshots
+from clawcode.models import RegisteredGroup, ScheduledTask
+
+
+def _task(task_id: str, group_folder: str) -> ScheduledTask:
+    return ScheduledTask(
+        id=task_id, group_folder=group_folder, chat_jid=f"gh:octo/{group_folder}#issue:1",
+        prompt="check CI", schedule_type="interval", schedule_value="60000",
+        status="active", created_at=f"2024-01-01T00:00:0{task_id[-1]}.000Z",
+    )
+
+
+@pytest.fixture
+def ipc_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("clawcode.group_folder.DATA_DIR", tmp_path)
+    return tmp_path / "ipc"
+
+
+class TestTasksSnapshot:
+    def test_filters_per_group_and_rewrites_only_on_change(self, ipc_dir):
+        snapshots = IpcSnapshots()
+        create_task(_task("task-1", "alpha"))
+        create_task(_task("task-2", "beta"))
+
+        assert snapshots.write_tasks("alpha", is_main=False)
+        assert snapshots.write_tasks("main", is_main=True)
+        alpha = json.loads((ipc_dir / "alpha" / "current_tasks.json").read_text())
+        assert [t["id"] for t in alpha] == ["task-1"]
+        assert alpha[0]["groupFolder"] == "alpha"
+        assert [t["id"] for t in json.loads((ipc_dir / "main" / "current_tasks.json").read_text())] == ["task-2", "task-1"]
+
+        assert not snapshots.write_tasks("alpha", is_main=False)  # Nothing changed
+
+        update_task("task-2", status="paused")
+        assert not snapshots.write_tasks("alpha", is_main=False)  # Another group's task
+        assert snapshots.write_tasks("main", is_main=True)
+
+    def test_rewrites_deleted_file(self, ipc_dir):
+        snapshots = IpcSnapshots()
+        assert snapshots.write_tasks("alpha", is_main=False)
+        (ipc_dir / "alpha" / "current_tasks.json").unlink()
+        assert snapshots.write_tasks("alpha", is_main=False)
+
+
+class TestGroupsSnapshot:
+    def test_main_sees_group_chats_others_get_none(self, ipc_dir):
+        snapshots = IpcSnapshots()
+        store_chat_metadata("gh:octo/alpha", "2024-01-01T00:00:00.000Z", name="octo/alpha", is_group=True)
+        store_chat_metadata("gh:octo/dm", "2024-01-01T00:00:01.000Z", name="dm", is_group=False)
+        set_registered_group("gh:octo/alpha", RegisteredGroup(
+            name="octo/alpha", folder="alpha", trigger="@clawcode", added_at="2024-01-01T00:00:00.000Z",
+        ))
+
+        assert snapshots.write_groups("main", is_main=True)
+        assert snapshots.write_groups("alpha", is_main=False)
+        groups = json.loads((ipc_dir / "main" / "available_groups.json").read_text())["groups"]
+        assert groups == [{"jid": "gh:octo/alpha", "name": "octo/alpha", "lastActivity": "2024-01-01T00:00:00.000Z", "isRegistered": True}]
+        assert json.loads((ipc_dir / "alpha" / "available_groups.json").read_text())["groups"] == []
+
+        store_chat_metadata("gh:octo/beta", "2024-01-01T00:00:02.000Z", name="octo/beta", is_group=True)
+        assert not snapshots.write_groups("alpha", is_main=False)
+        assert snapshots.write_groups("main", is_main=True)
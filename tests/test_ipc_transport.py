@@ -0,0 +1,158 @@
+"""Tests for the per-group IPC socket transport."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from clawcode.ipc_transport import SOCKET_NAME, IpcSocketHub, read_frame, write_input_file
+from clawcode.output_parser import encode_frame
+
+
+def _frame(data: dict) -> bytes:
+    return encode_frame(json.dumps(data).encode())
+
+
+@pytest.fixture
+def ipc_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("clawcode.group_folder.DATA_DIR", tmp_path)
+    return tmp_path / "ipc" / "octo--hello"
+
+
+async def _connect(ipc_dir, token: str):
+    reader, writer = await asyncio.open_unix_connection(str(ipc_dir / SOCKET_NAME))
+    writer.write(_frame({"type": "hello", "token": token}))
+    await writer.drain()
+    return reader, writer
+
+
+@pytest.fixture
+async def hub(ipc_dir):  # Closed while DATA_DIR still points at tmp_path
+    hub = IpcSocketHub()
+    yield hub
+    await hub.close()
+
+
+class TestIpcSocketHub:
+    @pytest.mark.asyncio
+    async def test_requests_are_handled_in_order_and_acked(self, hub, ipc_dir):
+        handled: list[str] = []
+
+        async def handler(group_folder: str, data: dict) -> None:
+            if data["type"] == "github_comment":
+                raise RuntimeError("GitHub API error 422")
+            await asyncio.sleep(0.01 if data["text"] == "first" else 0)
+            handled.append(f"{group_folder}:{data['text']}")
+
+        hub.set_handler(handler)
+        path, token = await hub.ensure("octo--hello", "clawcode-octo--hello-1")
+        assert path == "/workspace/ipc/host.sock"
+        reader, writer = await _connect(ipc_dir, token)
+
+        writer.write(_frame({"type": "message", "text": "first", "seq": 1}))
+        writer.write(_frame({"type": "message", "text": "second", "seq": 2}))
+        writer.write(_frame({"type": "github_comment", "text": "x", "seq": 3}))
+        acks = [await read_frame(reader) for _ in range(3)]
+
+        assert handled == ["octo--hello:first", "octo--hello:second"]
+        assert [(a["ack"], a["ok"]) for a in acks] == [(1, True), (2, True), (3, False)]
+        assert acks[2]["error"] == "GitHub API error 422"
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_unacked_host_messages_fall_back_to_files(self, hub, ipc_dir):
+        async def handler(group_folder: str, data: dict) -> None:
+            pass
+
+        hub.set_handler(handler)
+        _, token = await hub.ensure("octo--hello", "clawcode-octo--hello-1")
+        assert not hub.send("clawcode-octo--hello-1", {"type": "message", "text": "nobody home"})
+
+        reader, writer = await _connect(ipc_dir, token)
+        await asyncio.sleep(0.01)
+        assert hub.send("clawcode-octo--hello-1", {"type": "message", "text": "acked"})
+        assert hub.send("clawcode-octo--hello-1", {"type": "message", "text": "lost"})
+        assert hub.send("clawcode-octo--hello-1", {"type": "close"})
+
+        first = await read_frame(reader)
+        assert first == {"type": "message", "text": "acked", "seq": 1}
+        writer.write(_frame({"type": "ack", "ack": 1}))
+        await writer.drain()
+        await asyncio.sleep(0.01)
+        writer.close()
+        await asyncio.sleep(0.05)
+
+        files = sorted((ipc_dir / "input").iterdir())
+        texts = [json.loads(f.read_text())["text"] for f in files if f.suffix == ".json"]
+        assert texts == ["lost"]
+        assert (ipc_dir / "input" / "_close").exists()
+
+    @pytest.mark.asyncio
+    async def test_close_does_not_resend_unacked_messages(self, hub, ipc_dir):
+        async def handler(group_folder: str, data: dict) -> None:
+            pass
+
+        hub.set_handler(handler)
+        _, token = await hub.ensure("octo--hello", "clawcode-octo--hello-1")
+        reader, writer = await _connect(ipc_dir, token)
+        await asyncio.sleep(0.01)
+        assert hub.send("clawcode-octo--hello-1", {"type": "message", "text": "received, not acked"})
+        assert await read_frame(reader) == {"type": "message", "text": "received, not acked", "seq": 1}
+
+        await hub.close()
+
+        assert await read_frame(reader) is None
+        assert not (ipc_dir / "input").exists()
+        assert not hub.send("clawcode-octo--hello-1", {"type": "close"})
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_containers_of_one_group_are_routed_by_token(self, hub, ipc_dir):
+        async def handler(group_folder: str, data: dict) -> None:
+            pass
+
+        hub.set_handler(handler)
+        _, token_a = await hub.ensure("octo--hello", "clawcode-octo--hello-a")
+        _, token_b = await hub.ensure("octo--hello", "clawcode-octo--hello-b")
+        reader_a, writer_a = await _connect(ipc_dir, token_a)
+        reader_b, writer_b = await _connect(ipc_dir, token_b)
+        await asyncio.sleep(0.01)
+
+        # The second container doesn't take over the first one's connection
+        assert hub.send("clawcode-octo--hello-a", {"type": "message", "text": "for a"})
+        assert hub.send("clawcode-octo--hello-b", {"type": "close"})
+        assert await read_frame(reader_a) == {"type": "message", "text": "for a", "seq": 1}
+        assert await read_frame(reader_b) == {"type": "close", "seq": 1}
+
+        hub.release("clawcode-octo--hello-a")
+        assert await read_frame(reader_a) is None
+        assert not hub.send("clawcode-octo--hello-a", {"type": "close"})
+        assert hub.send("clawcode-octo--hello-b", {"type": "message", "text": "still here"})
+        writer_a.close()
+        writer_b.close()
+
+    @pytest.mark.asyncio
+    async def test_connection_without_valid_token_is_closed(self, hub, ipc_dir):
+        handled: list[dict] = []
+
+        async def handler(group_folder: str, data: dict) -> None:
+            handled.append(data)
+
+        hub.set_handler(handler)
+        await hub.ensure("octo--hello", "clawcode-octo--hello-1")
+        reader, writer = await _connect(ipc_dir, "guessed")
+        writer.write(_frame({"type": "message", "text": "spoofed", "seq": 1}))
+
+        assert await read_frame(reader) is None
+        assert handled == []
+        writer.close()
+
+
+class TestWriteInputFile:
+    def test_message_and_close(self, ipc_dir):
+        assert write_input_file("octo--hello", {"type": "message", "text": "hi"})
+        assert write_input_file("octo--hello", {"type": "close"})
+        names = sorted(p.name for p in (ipc_dir / "input").iterdir())
+        assert len(names) == 2 and names[0].endswith(".json") and names[1] == "_close"
@@ -0,0 +1,156 @@
+"""Tests for the inotify-driven IPC watcher and its per-group dispatcher."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from clawcode import ipc
+from clawcode.fs_watch import IN_MOVED_TO, Inotify
+from clawcode.ipc import IpcDeps, IpcDispatcher, start_ipc_watcher
+from clawcode.models import RegisteredGroup
+
+try:
+    Inotify().close()
+    HAS_INOTIFY = True
+except OSError:
+    HAS_INOTIFY = False
+
+requires_inotify = pytest.mark.skipif(not HAS_INOTIFY, reason="inotify not available")
+
+GROUP = RegisteredGroup(name="octo/hello", folder="octo--hello", trigger="@clawcode", added_at="2024-01-01T00:00:00.000Z")
+
+
+def _drop(directory, name: str, payload: dict) -> None:
+    """Write like the agent runner does: temp file, then rename into place."""
+    directory.mkdir(parents=True, exist_ok=True)
+    temp = directory / f"{name}.json.tmp"
+    temp.write_text(json.dumps(payload))
+    temp.rename(directory / f"{name}.json")
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@requires_inotify
+class TestInotify:
+    def test_reports_renamed_files(self, tmp_path):
+        inotify = Inotify()
+        try:
+            inotify.add_watch(tmp_path, IN_MOVED_TO)
+            assert inotify.read_events() == []
+            (tmp_path / "a.json.tmp").write_text("{}")
+            (tmp_path / "a.json.tmp").rename(tmp_path / "a.json")
+            [event] = inotify.read_events()
+            assert (event.path, event.name) == (tmp_path, "a.json")
+        finally:
+            inotify.close()
+
+
+@requires_inotify
+class TestIpcWatcher:
+    @pytest.mark.asyncio
+    async def test_wakes_on_new_files_without_polling(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ipc, "DATA_DIR", tmp_path)
+        monkeypatch.setattr(ipc, "IPC_WATCHER", "auto")
+        monkeypatch.setattr(ipc, "IPC_RESCAN_INTERVAL", 3_600_000)  # Rescans can't be what picks files up
+        monkeypatch.setattr(ipc, "_ipc_watcher_running", False)
+        sent: list[tuple[str, str]] = []
+
+        async def send_message(jid: str, text: str) -> None:
+            sent.append((jid, text))
+
+        async def noop(*args) -> None:
+            pass
+
+        # Written while the host was down: found by the initial scan
+        _drop(tmp_path / "ipc" / "octo--hello" / "messages", "1", {"type": "message", "chatJid": "gh:octo/hello#issue:1", "text": "early"})
+
+        await start_ipc_watcher(IpcDeps(
+            send_message=send_message,
+            send_structured_message=None,
+            registered_groups=lambda: {"gh:octo/hello": GROUP},
+            register_group=lambda jid, group: None,
+            sync_group_metadata=noop,
+            get_available_groups=lambda: [],
+            write_groups_snapshot=lambda *args: None,
+        ))
+        await _wait_for(lambda: len(sent) == 1)
+
+        _drop(tmp_path / "ipc" / "octo--hello" / "messages", "2", {"type": "message", "chatJid": "gh:octo/hello#issue:1", "text": "later"})
+        # A group namespace created after startup
+        _drop(tmp_path / "ipc" / "octo--other" / "messages", "3", {"type": "message", "chatJid": "gh:octo/hello#issue:1", "text": "blocked"})
+        await _wait_for(lambda: len(sent) == 2)
+        await _wait_for(lambda: not list((tmp_path / "ipc" / "octo--other" / "messages").glob("*.json")))
+
+        assert sent == [("gh:octo/hello#issue:1", "early"), ("gh:octo/hello#issue:1", "later")]
+        assert not list((tmp_path / "ipc" / "octo--hello" / "messages").iterdir())
+
+
+class TestIpcDispatcher:
+    @pytest.mark.asyncio
+    async def test_slow_group_does_not_block_others(self):
+        release = asyncio.Event()
+        handled: list[str] = []
+
+        async def process_group(source_group: str) -> None:
+            if source_group == "octo--slow":
+                await release.wait()
+            handled.append(source_group)
+
+        dispatcher = IpcDispatcher(process_group, max_concurrent=4)
+        dispatcher.schedule("octo--slow")
+        dispatcher.schedule("octo--fast")
+        await _wait_for(lambda: handled == ["octo--fast"])
+
+        stats = dispatcher.stats()
+        assert stats["octo--fast"]["drains"] == 1
+        assert stats["octo--slow"]["drains"] == 0
+        release.set()
+        await _wait_for(lambda: handled == ["octo--fast", "octo--slow"])
+        assert dispatcher.stats()["octo--slow"]["pending_secs"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_group_drains_in_order_and_again_when_marked_meanwhile(self):
+        events: list[str] = []
+        gate = asyncio.Event()
+
+        async def process_group(source_group: str) -> None:
+            events.append("start")
+            await gate.wait()
+            events.append("end")
+
+        dispatcher = IpcDispatcher(process_group, max_concurrent=4)
+        dispatcher.schedule("octo--hello")
+        await _wait_for(lambda: events == ["start"])
+        dispatcher.schedule("octo--hello")  # Coalesced into one more drain
+        dispatcher.schedule("octo--hello")
+        gate.set()
+        await _wait_for(lambda: len(events) == 4)
+        await asyncio.sleep(0.01)
+        assert events == ["start", "end", "start", "end"]
+        assert dispatcher.stats()["octo--hello"]["drains"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        running = 0
+        peak = 0
+
+        async def process_group(source_group: str) -> None:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        dispatcher = IpcDispatcher(process_group, max_concurrent=2)
+        for i in range(5):
+            dispatcher.schedule(f"octo--repo{i}")
+        await _wait_for(lambda: all(s["drains"] == 1 for s in dispatcher.stats().values()))
+        assert peak == 2
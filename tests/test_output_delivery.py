@@ -0,0 +1,118 @@
+"""Tests for the bounded per-run output delivery queue."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from clawcode.container_runner import ContainerOutput, _stream_container
+from clawcode.models import RegisteredGroup
+from clawcode.output_delivery import OutputDelivery
+from clawcode.output_parser import OUTPUT_END_MARKER, OUTPUT_START_MARKER
+
+
+class TestOutputDelivery:
+    @pytest.mark.asyncio
+    async def test_slow_consumer_does_not_block_submit(self):
+        delivered: list[int] = []
+        release = asyncio.Event()
+
+        async def on_output(output: int) -> None:
+            await release.wait()
+            delivered.append(output)
+
+        delivery = OutputDelivery(on_output, maxsize=8)
+        for i in range(5):
+            await asyncio.wait_for(delivery.submit(i), timeout=0.1)
+        assert delivered == []
+
+        release.set()
+        await delivery.close()
+        assert delivered == [0, 1, 2, 3, 4]
+        assert delivery.stats()["blocked_secs"] == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_applies_backpressure(self):
+        async def on_output(output: int) -> None:
+            await asyncio.sleep(0.02)
+
+        delivery = OutputDelivery(on_output, maxsize=1)
+        for i in range(4):
+            await delivery.submit(i)
+        await delivery.close()
+
+        stats = delivery.stats()
+        assert stats["delivered"] == 4
+        assert stats["max_depth"] == 1
+        assert stats["blocked_secs"] > 0
+
+    @pytest.mark.asyncio
+    async def test_failed_delivery_does_not_stop_later_ones(self):
+        delivered: list[int] = []
+
+        async def on_output(output: int) -> None:
+            if output == 1:
+                raise RuntimeError("GitHub 502")
+            delivered.append(output)
+
+        delivery = OutputDelivery(on_output, maxsize=4)
+        for i in range(3):
+            await delivery.submit(i)
+        await delivery.close()
+        assert delivered == [0, 2]
+        assert delivery.failed == 1
+        assert str(delivery.error) == "GitHub 502"
+
+
+class FakeProcess:
+    """Exited container whose stdout holds the given bytes."""
+
+    def __init__(self, stdout: bytes):
+        self.stdout, self.stderr = asyncio.StreamReader(), asyncio.StreamReader()
+        self.stdout.feed_data(stdout)
+        self.stdout.feed_eof()
+        self.stderr.feed_eof()
+        self.returncode = 0
+
+    async def wait(self) -> int:
+        return 0
+
+
+class TestStreamedRunOutcome:
+    @pytest.fixture(autouse=True)
+    def _isolate(self, monkeypatch, tmp_path):
+        async def no_stats(_name):
+            return None
+
+        monkeypatch.setattr("clawcode.container_runner.resolve_group_folder_path", lambda folder: str(tmp_path))
+        monkeypatch.setattr("clawcode.container_runner.sandbox_stats", no_stats)
+
+    async def _run(self, on_output) -> ContainerOutput:
+        group = RegisteredGroup(name="octo/hello", folder="octo--hello", trigger="@bot", added_at="2024-01-01T00:00:00Z")
+        stdout = f"{OUTPUT_START_MARKER}\n{json.dumps({'status': 'success', 'result': 'Done'})}\n{OUTPUT_END_MARKER}\n"
+        return await _stream_container(
+            group, FakeProcess(stdout.encode()), "clawcode-octo--hello-1", "sandbox", on_output, None, time.time()
+        )
+
+    @pytest.mark.asyncio
+    async def test_undelivered_result_fails_the_run(self):
+        async def on_output(output: ContainerOutput) -> None:
+            raise RuntimeError("GitHub 502")
+
+        result = await self._run(on_output)
+        assert result.status == "error"
+        assert "GitHub 502" in result.error
+
+    @pytest.mark.asyncio
+    async def test_delivered_result_succeeds(self):
+        delivered: list[str] = []
+
+        async def on_output(output: ContainerOutput) -> None:
+            delivered.append(output.result)
+
+        result = await self._run(on_output)
+        assert result.status == "success"
+        assert delivered == ["Done"]
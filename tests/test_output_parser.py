@@ -0,0 +1,103 @@
+"""Tests for the incremental stdout frame parser."""
+
+from __future__ import annotations
+
+import json
+
+from clawcode.container_runner import _output_from_message
+from clawcode.output_parser import (
+    OUTPUT_END_MARKER,
+    OUTPUT_START_MARKER,
+    PROTOCOL_HELLO,
+    PROTOCOL_VERSION,
+    OutputFrameParser,
+    encode_frame,
+)
+
+
+def _frame(payload: dict) -> bytes:
+    return f"{OUTPUT_START_MARKER}\n{json.dumps(payload, ensure_ascii=False)}\n{OUTPUT_END_MARKER}\n".encode()
+
+
+def _feed_in_chunks(parser: OutputFrameParser, data: bytes, size: int) -> list[str]:
+    frames: list[str] = []
+    for i in range(0, len(data), size):
+        frames.extend(parser.feed(data[i:i + size]))
+    return frames
+
+
+class TestOutputFrameParser:
+    def test_frames_split_at_every_byte(self):
+        data = b"noise\n" + _frame({"result": "one"}) + b"more noise" + _frame({"result": "two"})
+        frames = _feed_in_chunks(OutputFrameParser(), data, 1)
+        assert [json.loads(f)["result"] for f in frames] == ["one", "two"]
+
+    def test_multibyte_utf8_split_across_chunks(self):
+        data = _frame({"result": "héllo → 世界 🎉"})
+        for size in (1, 2, 3, 5, 7):
+            frames = _feed_in_chunks(OutputFrameParser(), data, size)
+            assert json.loads(frames[0])["result"] == "héllo → 世界 🎉"
+
+    def test_text_between_frames_not_retained(self):
+        parser = OutputFrameParser()
+        parser.feed(b"x" * 100_000)
+        assert parser.buffered < len(OUTPUT_START_MARKER)
+
+    def test_incomplete_frame_waits_for_end(self):
+        parser = OutputFrameParser()
+        data = _frame({"result": "r" * 50_000})
+        assert parser.feed(data[:-40]) == []
+        assert len(parser.feed(data[-40:])) == 1
+        assert parser.buffered < len(OUTPUT_START_MARKER)
+
+    def test_oversized_frame_dropped_and_parsing_resumes(self):
+        parser = OutputFrameParser(max_frame_size=1000)
+        data = _frame({"result": "r" * 5000}) + _frame({"result": "ok"})
+        frames = _feed_in_chunks(parser, data, 256)
+        assert [json.loads(f)["result"] for f in frames] == ["ok"]
+        assert parser.frames_dropped == 1
+
+
+def _hello() -> bytes:
+    return f"{PROTOCOL_HELLO}{PROTOCOL_VERSION}\n".encode()
+
+
+def _message(message_type: str, **fields) -> bytes:
+    return encode_frame(json.dumps({"type": message_type, **fields}, ensure_ascii=False).encode())
+
+
+class TestLengthPrefixedProtocol:
+    def test_negotiated_frames_split_at_every_byte(self):
+        data = _hello() + _message("session", sessionId="s1") + _message("result", status="success", result="日本語")
+        parser = OutputFrameParser()
+        frames = [json.loads(f) for f in _feed_in_chunks(parser, data, 1)]
+        assert parser.protocol == 2
+        assert [f["type"] for f in frames] == ["session", "result"]
+        assert frames[1]["result"] == "日本語"
+
+    def test_markers_inside_payload_are_just_data(self):
+        data = _hello() + _message("result", result=f"{OUTPUT_START_MARKER} not a frame {OUTPUT_END_MARKER}")
+        frames = OutputFrameParser().feed(data)
+        assert OUTPUT_START_MARKER in json.loads(frames[0])["result"]
+
+    def test_old_runner_falls_back_to_markers(self):
+        parser = OutputFrameParser()
+        frames = _feed_in_chunks(parser, _frame({"result": "legacy"}), 3)
+        assert parser.protocol == 1
+        assert json.loads(frames[0])["result"] == "legacy"
+
+    def test_oversized_frame_skipped(self):
+        parser = OutputFrameParser(max_frame_size=100)
+        data = _hello() + _message("result", result="r" * 500) + _message("result", result="ok")
+        frames = _feed_in_chunks(parser, data, 64)
+        assert [json.loads(f)["result"] for f in frames] == ["ok"]
+        assert parser.frames_dropped == 1
+
+
+class TestOutputFromMessage:
+    def test_message_types(self):
+        assert _output_from_message({"type": "session", "sessionId": "s1"}).status == "session"
+        error = _output_from_message({"type": "error", "error": "boom"})
+        assert (error.status, error.error) == ("error", "boom")
+        legacy = _output_from_message({"status": "success", "result": "hi", "newSessionId": "s2"})
+        assert (legacy.status, legacy.result, legacy.new_session_id) == ("success", "hi", "s2")
@@ -0,0 +1,102 @@
+"""Tests for repo checkout LRU eviction under a disk quota."""
+
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from clawcode import repo_cache
+from clawcode.repo_cache import CheckoutCache
+
+
+@pytest.fixture
+def repos_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(repo_cache, "REPOS_DIR", tmp_path)
+    return tmp_path
+
+
+def _make_checkout(base, name: str, size: int, age_secs: float) -> None:
+    git_dir = base / name / ".git"
+    git_dir.mkdir(parents=True)
+    (base / name / "blob").write_bytes(os.urandom(size))
+    mtime = time.time() - age_secs
+    os.utime(git_dir, (mtime, mtime))
+
+
+class TestCheckoutCache:
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used_over_quota(self, repos_dir):
+        _make_checkout(repos_dir, "o--old", 64 * 1024, age_secs=3000)
+        _make_checkout(repos_dir, "o--mid", 64 * 1024, age_secs=2000)
+        _make_checkout(repos_dir, "o--new", 64 * 1024, age_secs=1000)
+        cache = CheckoutCache(max_bytes=150 * 1024)
+
+        evicted = await cache.enforce_quota(set)
+
+        assert evicted == ["o--old"]
+        assert not (repos_dir / "o--old").exists()
+        assert (repos_dir / "o--new").exists()
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_record_use_refreshes_recency(self, repos_dir):
+        _make_checkout(repos_dir, "o--a", 64 * 1024, age_secs=3000)
+        _make_checkout(repos_dir, "o--b", 64 * 1024, age_secs=1000)
+        cache = CheckoutCache(max_bytes=100 * 1024)
+        cache.record_use("o--a", hit=True)
+
+        assert await cache.enforce_quota(set) == ["o--b"]
+
+    @pytest.mark.asyncio
+    async def test_never_evicts_active_checkouts(self, repos_dir):
+        _make_checkout(repos_dir, "o--busy", 64 * 1024, age_secs=3000)
+        _make_checkout(repos_dir, "o--idle", 64 * 1024, age_secs=1000)
+        cache = CheckoutCache(max_bytes=10 * 1024)
+
+        evicted = await cache.enforce_quota(lambda: {"o--busy"})
+
+        assert evicted == ["o--idle"]
+        assert (repos_dir / "o--busy").exists()
+
+    @pytest.mark.asyncio
+    async def test_run_started_while_waiting_for_lock_is_kept(self, repos_dir):
+        _make_checkout(repos_dir, "o--a", 64 * 1024, age_secs=3000)
+        cache = CheckoutCache(max_bytes=10 * 1024)
+        forgotten: list[str] = []
+        cache.on_evict = forgotten.append
+        checks = iter([set(), {"o--a"}])
+
+        assert await cache.enforce_quota(lambda: next(checks)) == []
+        assert (repos_dir / "o--a").exists()
+        assert forgotten == []
+
+    @pytest.mark.asyncio
+    async def test_evicted_checkout_is_forgotten_and_not_reset(self, repos_dir):
+        _make_checkout(repos_dir, "o--a", 64 * 1024, age_secs=3000)
+        cache = CheckoutCache(max_bytes=10 * 1024)
+        forgotten: list[str] = []
+        cache.on_evict = forgotten.append
+
+        assert await cache.enforce_quota(set) == ["o--a"]
+        assert forgotten == ["o--a"]
+        with pytest.raises(FileNotFoundError):
+            await repo_cache.reset_checkout("o", "a")
+
+    @pytest.mark.asyncio
+    async def test_under_quota_keeps_everything(self, repos_dir):
+        _make_checkout(repos_dir, "o--a", 4 * 1024, age_secs=10)
+        cache = CheckoutCache(max_bytes=10 * 1024**2)
+        assert await cache.enforce_quota(set) == []
+        assert cache.stats()["bytes"] > 0
+
+    def test_hit_rate(self, repos_dir):
+        cache = CheckoutCache(max_bytes=1)
+        cache.record_use("o--a", hit=False)
+        cache.record_use("o--a", hit=True)
+        cache.record_use("o--a", hit=True)
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.667
@@ -0,0 +1,68 @@
+"""Tests for scheduled git maintenance of repo checkouts."""
+
+from __future__ import annotations
+
+import subprocess
+import time
+
+import pytest
+
+from clawcode import db, repo_maintenance
+from clawcode.repo_maintenance import MAINTENANCE_TASKS, RepoMaintenanceScheduler
+
+
+@pytest.fixture
+def repos_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(repo_maintenance, "REPOS_DIR", tmp_path)
+    return tmp_path
+
+
+def _init_repo(path) -> None:
+    path.mkdir()
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    (path / "README").write_text("hello\n")
+    subprocess.run(["git", "-C", str(path), "add", "README"], check=True)
+    subprocess.run(
+        ["git", "-C", str(path), "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"],
+        check=True,
+    )
+
+
+class TestRepoMaintenanceScheduler:
+    def test_due_checkouts_oldest_first_and_skips_active(self, repos_dir):
+        for name in ("o--a", "o--b", "o--c"):
+            (repos_dir / name / ".git").mkdir(parents=True)
+        scheduler = RepoMaintenanceScheduler(interval_ms=1000, max_per_pass=5)
+        scheduler._last_run = {"o--a": time.time() - 10, "o--b": time.time() - 20}
+
+        assert scheduler.due_checkouts({"o--b"}) == ["o--c", "o--a"]
+
+    def test_recently_maintained_not_due(self, repos_dir):
+        (repos_dir / "o--a" / ".git").mkdir(parents=True)
+        scheduler = RepoMaintenanceScheduler(interval_ms=60_000)
+        scheduler._last_run = {"o--a": time.time()}
+        assert scheduler.due_checkouts(set()) == []
+
+    @pytest.mark.asyncio
+    async def test_runs_tasks_and_records_durations(self, repos_dir):
+        _init_repo(repos_dir / "o--repo")
+        scheduler = RepoMaintenanceScheduler(interval_ms=1000)
+
+        await scheduler._run_pass(set)
+
+        rows = db._get_db().execute(
+            "SELECT task, status FROM repo_maintenance_logs WHERE checkout = ?", ("o--repo",)
+        ).fetchall()
+        assert sorted(r["task"] for r in rows) == sorted(MAINTENANCE_TASKS)
+        assert all(r["status"] == "success" for r in rows)
+        assert scheduler.due_checkouts(set()) == []
+
+    @pytest.mark.asyncio
+    async def test_defers_when_repo_becomes_active(self, repos_dir):
+        _init_repo(repos_dir / "o--repo")
+        scheduler = RepoMaintenanceScheduler(interval_ms=1000)
+
+        await scheduler._maintain("o--repo", lambda: {"o--repo"})
+
+        count = db._get_db().execute("SELECT COUNT(*) FROM repo_maintenance_logs").fetchone()[0]
+        assert count == 0
@@ -0,0 +1,163 @@
+"""Tests for push-driven repo prefetching, freshness, and backoff."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from clawcode.github.event_mapper import map_webhook_to_prefetch
+from clawcode.repo_cache import CheckoutCache
+from clawcode.repo_prefetch import RepoPrefetcher
+
+REPO_JID = "gh:octo/hello"
+
+
+def _payload(**overrides):
+    base = {
+        "installation": {"id": 1},
+        "repository": {"full_name": "octo/hello"},
+        "sender": {"login": "alice", "type": "User"},
+    }
+    base.update(overrides)
+    return base
+
+
+async def _token(owner: str, repo: str) -> str:
+    return "tok"
+
+
+@pytest.fixture
+def fetches(monkeypatch, tmp_path):
+    """Record fetch_checkout calls; tests can set ``fail`` or ``gate``."""
+    calls: list[tuple[str, str]] = []
+    control = {"fail": False, "gate": None}
+
+    async def fake_fetch(owner, repo, token):
+        calls.append((owner, repo))
+        if control["gate"]:
+            await control["gate"].wait()
+        if control["fail"]:
+            raise RuntimeError("network down")
+        (tmp_path / f"{owner}--{repo}" / ".git").mkdir(parents=True, exist_ok=True)
+        return False
+
+    async def fake_reset(owner, repo, only_if_moved=False):
+        return f"/repos/{owner}--{repo}"
+
+    monkeypatch.setattr("clawcode.repo_prefetch.checkout_dir", lambda owner, repo: tmp_path / f"{owner}--{repo}")
+    monkeypatch.setattr("clawcode.repo_prefetch.fetch_checkout", fake_fetch)
+    monkeypatch.setattr("clawcode.repo_prefetch.reset_checkout", fake_reset)
+    return calls, control
+
+
+class TestMapWebhookToPrefetch:
+    def test_push_maps_to_repo(self):
+        assert map_webhook_to_prefetch("push", _payload(ref="refs/heads/main")) == REPO_JID
+
+    def test_branch_deletion_ignored(self):
+        assert map_webhook_to_prefetch("push", _payload(deleted=True)) is None
+
+    def test_pull_request_actions(self):
+        assert map_webhook_to_prefetch("pull_request", _payload(action="synchronize")) == REPO_JID
+        assert map_webhook_to_prefetch("pull_request", _payload(action="labeled")) is None
+
+    def test_other_events_ignored(self):
+        assert map_webhook_to_prefetch("issues", _payload(action="opened")) is None
+
+
+class TestRepoPrefetcher:
+    @pytest.mark.asyncio
+    async def test_push_fetches_and_marks_fresh(self, fetches):
+        calls, _ = fetches
+        prefetcher = RepoPrefetcher(_token)
+        assert not prefetcher.is_fresh(REPO_JID)
+
+        prefetcher.notify_push(REPO_JID)
+        await asyncio.sleep(0.01)
+
+        assert calls == [("octo", "hello")]
+        assert prefetcher.is_fresh(REPO_JID)
+
+    @pytest.mark.asyncio
+    async def test_prepare_skips_fetch_when_fresh(self, fetches):
+        calls, _ = fetches
+        prefetcher = RepoPrefetcher(_token)
+        prefetcher.notify_push(REPO_JID)
+        await asyncio.sleep(0.01)
+
+        path = await prefetcher.prepare_checkout("octo", "hello", "tok")
+        assert path == "/repos/octo--hello"
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_eviction_makes_checkout_stale(self, fetches):
+        calls, _ = fetches
+        cache = CheckoutCache()
+        prefetcher = RepoPrefetcher(_token, cache=cache)
+        await prefetcher.prepare_checkout("octo", "hello", "tok", pristine=True)
+        assert prefetcher.is_fresh(REPO_JID)
+
+        cache.on_evict("octo--hello")
+        assert not prefetcher.is_fresh(REPO_JID)
+        assert REPO_JID not in prefetcher._pristine
+
+    @pytest.mark.asyncio
+    async def test_checkout_evicted_before_reset_is_fetched_again(self, fetches, monkeypatch):
+        calls, _ = fetches
+        resets = iter([FileNotFoundError("evicted"), None])
+
+        async def reset(owner, repo, only_if_moved=False):
+            if err := next(resets):
+                raise err
+            return f"/repos/{owner}--{repo}"
+
+        monkeypatch.setattr("clawcode.repo_prefetch.reset_checkout", reset)
+        prefetcher = RepoPrefetcher(_token)
+        prefetcher.notify_push(REPO_JID)
+        await asyncio.sleep(0.01)
+
+        assert await prefetcher.prepare_checkout("octo", "hello", "tok") == "/repos/octo--hello"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_push_during_fetch_triggers_refetch(self, fetches):
+        calls, control = fetches
+        control["gate"] = asyncio.Event()
+        prefetcher = RepoPrefetcher(_token)
+
+        prefetcher.notify_push(REPO_JID)
+        await asyncio.sleep(0.01)
+        prefetcher.notify_push(REPO_JID)  # coalesced while in flight
+        control["gate"].set()
+        await asyncio.sleep(0.01)
+
+        assert len(calls) == 2
+        assert prefetcher.is_fresh(REPO_JID)
+
+    @pytest.mark.asyncio
+    async def test_failure_backs_off(self, fetches):
+        calls, control = fetches
+        control["fail"] = True
+        prefetcher = RepoPrefetcher(_token)
+
+        prefetcher.notify_push(REPO_JID)
+        await asyncio.sleep(0.01)
+        assert not prefetcher.schedule(REPO_JID)
+        assert prefetcher.sweep() == 0
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, fetches):
+        calls, control = fetches
+        control["gate"] = asyncio.Event()
+        prefetcher = RepoPrefetcher(_token, concurrency=1)
+
+        prefetcher.notify_push("gh:octo/a")
+        prefetcher.notify_push("gh:octo/b")
+        await asyncio.sleep(0.01)
+        assert len(calls) == 1
+
+        control["gate"].set()
+        await asyncio.sleep(0.01)
+        assert len(calls) == 2
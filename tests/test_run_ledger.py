@@ -0,0 +1,67 @@
+"""Tests for the per-run phase timing ledger."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from clawcode.db import get_agent_run_phases
+from clawcode.group_queue import GroupQueue
+from clawcode.run_ledger import RunTimer, summarize_phases
+
+
+class TestRunTimer:
+    def test_phases_sorted_with_elapsed(self):
+        timer = RunTimer("gh:octo/hello#issue:1", "octo--hello", enqueued_at=100.0, slot_acquired_at=100.5)
+        timer.mark("spawned", 101.0)
+        timer.mark_runner_line("CLAWCODE_PHASE input_received 101250")
+        timer.mark("exit", 104.0)
+
+        run = timer.build("success")
+        assert [p.phase for p in run.phases] == ["enqueued", "slot_acquired", "spawned", "runner:input_received", "exit"]
+        assert [p.elapsed_ms for p in run.phases] == [0, 500, 500, 250, 2750]
+        assert run.duration_ms == 4000
+
+    def test_non_marker_lines_ignored(self):
+        timer = RunTimer("gh:octo/hello#issue:1", "octo--hello")
+        assert not timer.mark_runner_line("[agent-runner] Received input")
+        assert not timer.mark_runner_line("CLAWCODE_PHASE garbled")
+
+    def test_finish_writes_ledger(self):
+        timer = RunTimer("gh:octo/hello#issue:1", "octo--hello")
+        timer.mark("exit")
+        timer.finish("success")
+
+        rows = get_agent_run_phases("1970-01-01", "octo--hello")
+        assert [r["phase"] for r in rows] == ["enqueued", "slot_acquired", "exit"]
+        assert get_agent_run_phases("1970-01-01", "other--repo") == []
+
+
+class TestSummarizePhases:
+    def test_percentiles_per_repo_and_phase(self):
+        rows = [{"group_folder": "octo--hello", "phase": "spawned", "elapsed_ms": ms} for ms in range(1, 101)]
+        rows.append({"group_folder": "octo--other", "phase": "spawned", "elapsed_ms": 7})
+
+        summary = summarize_phases(rows)
+        assert summary["octo--hello"]["spawned"] == {"count": 100, "p50": 50, "p95": 95, "p99": 99}
+        assert summary["octo--other"]["spawned"]["p99"] == 7
+
+
+class TestQueueRunTiming:
+    @pytest.mark.asyncio
+    async def test_records_enqueue_and_slot_times(self):
+        queue = GroupQueue()
+        timings: list[tuple[float | None, float | None]] = []
+
+        async def process_messages(group_jid: str) -> bool:
+            timings.append(queue.run_timing(group_jid))
+            return True
+
+        queue.set_process_messages_fn(process_messages)
+        queue.enqueue_message_check("gh:octo/hello#issue:1")
+        await asyncio.sleep(0.01)
+
+        enqueued_at, slot_at = timings[0]
+        assert enqueued_at is not None and slot_at is not None
+        assert enqueued_at <= slot_at
@@ -0,0 +1,97 @@
+"""Tests for the bubblewrap process sandbox runtime."""
+
+from __future__ import annotations
+
+import pytest
+
+from clawcode import sandbox_runtime
+from clawcode.container_runtime import ContainerSpec
+from clawcode.sandbox_runtime import build_bwrap_args, is_sandbox, spawn_sandbox
+
+
+def _spec(**overrides) -> ContainerSpec:
+    spec = ContainerSpec(
+        name="clawcode-octo--hello-1",
+        image="unused",
+        mounts=[
+            {"host_path": "/groups/octo--hello", "container_path": "/workspace/group", "readonly": False},
+            {"host_path": "/groups/global", "container_path": "/workspace/global", "readonly": True},
+        ],
+        env={"TZ": "UTC"},
+        pids_limit=512,
+    )
+    for key, value in overrides.items():
+        setattr(spec, key, value)
+    return spec
+
+
+@pytest.fixture
+def fake_bwrap(tmp_path, monkeypatch):
+    """A bwrap stand-in that drops its options and execs the command after ``--``."""
+    script = tmp_path / "bwrap"
+    script.write_text('#!/bin/sh\nwhile [ "$1" != "--" ]; do shift; done\nshift\nexec "$@"\n')
+    script.chmod(0o755)
+    monkeypatch.setattr(sandbox_runtime, "BWRAP_BIN", str(script))
+    monkeypatch.setattr(sandbox_runtime, "DATA_DIR", tmp_path)
+    return script
+
+
+class TestBuildBwrapArgs:
+    def test_same_mount_layout_as_container(self):
+        args = build_bwrap_args(_spec())
+        joined = " ".join(args)
+        assert "--bind /groups/octo--hello /workspace/group" in joined
+        assert "--ro-bind /groups/global /workspace/global" in joined
+        assert "--unshare-user" in args and "--unshare-pid" in args
+        assert args[args.index("--chdir") + 1] == "/workspace/group"
+        assert args[args.index("--") + 1:] == [sandbox_runtime.SANDBOX_PYTHON, "/app/main.py"]
+
+    def test_seccomp_fd_passed(self):
+        args = build_bwrap_args(_spec(), seccomp_fd=7)
+        assert args[args.index("--seccomp") + 1] == "7"
+
+    def test_extra_hosts_override_etc_hosts(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sandbox_runtime, "DATA_DIR", tmp_path)
+        args = build_bwrap_args(_spec(extra_hosts=["metadata.google.internal:0.0.0.0"]))
+        hosts = tmp_path / "sandbox" / "hosts"
+        assert args[args.index(str(hosts)) + 1] == "/etc/hosts"
+        assert "0.0.0.0 metadata.google.internal" in hosts.read_text()
+
+
+class TestSpawnSandbox:
+    @pytest.mark.asyncio
+    async def test_speaks_stdin_stdout(self, fake_bwrap):
+        process = await spawn_sandbox(_spec(command=["cat"]))
+        assert is_sandbox("clawcode-octo--hello-1")
+
+        process.stdin.write(b'{"prompt": "hi"}')
+        process.stdin.close()
+        assert await process.stdout.read() == b'{"prompt": "hi"}'
+        assert await process.wait() == 0
+
+    @pytest.mark.asyncio
+    async def test_joins_cgroup_before_exec(self, fake_bwrap, tmp_path, monkeypatch):
+        parent = tmp_path / "cgroup"
+        parent.mkdir()
+        monkeypatch.setattr(sandbox_runtime, "SANDBOX_CGROUP_PARENT", str(parent))
+
+        process = await spawn_sandbox(_spec(command=["true"]))
+        await process.wait()
+
+        cgroup = parent / "clawcode-octo--hello-1"
+        assert (cgroup / "pids.max").read_text() == "512"
+        assert (cgroup / "memory.max").read_text() == sandbox_runtime.SANDBOX_MEMORY_MAX
+        assert (cgroup / "cgroup.procs").read_text().strip() == str(process.pid)
+
+    @pytest.mark.asyncio
+    async def test_cgroup_follows_resource_profile(self, fake_bwrap, tmp_path, monkeypatch):
+        parent = tmp_path / "cgroup"
+        parent.mkdir()
+        monkeypatch.setattr(sandbox_runtime, "SANDBOX_CGROUP_PARENT", str(parent))
+
+        process = await spawn_sandbox(_spec(command=["true"], cpus=1.5, memory_bytes=1024**3))
+        await process.wait()
+
+        cgroup = parent / "clawcode-octo--hello-1"
+        assert (cgroup / "memory.max").read_text() == str(1024**3)
+        assert (cgroup / "cpu.max").read_text() == "150000 100000"
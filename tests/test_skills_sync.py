@@ -0,0 +1,81 @@
+"""Tests for content-hashed incremental skills sync."""
+
+from __future__ import annotations
+
+import pytest
+
+from clawcode import skills_sync
+from clawcode.skills_sync import MARKER_FILE, skills_manifest, sync_skills
+
+
+@pytest.fixture
+def src(tmp_path, monkeypatch):
+    monkeypatch.setattr(skills_sync, "_manifest", None)
+    monkeypatch.setattr(skills_sync, "_synced", {})
+    monkeypatch.setattr(skills_sync, "SKILLS_RESCAN_SECS", 0)
+    root = tmp_path / "skills"
+    (root / "agent-browser").mkdir(parents=True)
+    (root / "agent-browser" / "SKILL.md").write_text("v1")
+    return root
+
+
+class TestSkillsSync:
+    def test_first_sync_copies_and_writes_marker(self, src, tmp_path):
+        dst = tmp_path / "group" / "skills"
+        assert sync_skills(dst, src)
+        assert (dst / "agent-browser" / "SKILL.md").read_text() == "v1"
+        assert (dst / MARKER_FILE).exists()
+
+    def test_unchanged_is_noop(self, src, tmp_path, monkeypatch):
+        dst = tmp_path / "group" / "skills"
+        sync_skills(dst, src)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("copied again")
+
+        monkeypatch.setattr(skills_sync.shutil, "copy2", fail)
+        assert not sync_skills(dst, src)
+
+    def test_marker_survives_restart(self, src, tmp_path, monkeypatch):
+        dst = tmp_path / "group" / "skills"
+        sync_skills(dst, src)
+        monkeypatch.setattr(skills_sync, "_synced", {})  # New process
+        assert not sync_skills(dst, src)
+
+    def test_edited_or_deleted_synced_file_restored(self, src, tmp_path):
+        dst = tmp_path / "group" / "skills"
+        (src / "agent-browser" / "extra.md").write_text("x")
+        sync_skills(dst, src)
+
+        (dst / "agent-browser" / "SKILL.md").write_text("agent edit")
+        (dst / "agent-browser" / "extra.md").unlink()
+        assert sync_skills(dst, src)
+        assert (dst / "agent-browser" / "SKILL.md").read_text() == "v1"
+        assert (dst / "agent-browser" / "extra.md").read_text() == "x"
+        assert not sync_skills(dst, src)
+
+    def test_changed_file_resynced_and_agent_files_kept(self, src, tmp_path):
+        dst = tmp_path / "group" / "skills"
+        sync_skills(dst, src)
+        (dst / "my-skill").mkdir()
+        (dst / "my-skill" / "SKILL.md").write_text("agent-made")
+
+        (src / "agent-browser" / "SKILL.md").write_text("version 2")
+        assert sync_skills(dst, src)
+        assert (dst / "agent-browser" / "SKILL.md").read_text() == "version 2"
+        assert (dst / "my-skill" / "SKILL.md").read_text() == "agent-made"
+
+    def test_removed_source_file_removed(self, src, tmp_path):
+        dst = tmp_path / "group" / "skills"
+        (src / "agent-browser" / "extra.md").write_text("x")
+        sync_skills(dst, src)
+
+        (src / "agent-browser" / "extra.md").unlink()
+        assert sync_skills(dst, src)
+        assert not (dst / "agent-browser" / "extra.md").exists()
+
+    def test_manifest_cached_within_rescan_window(self, src, monkeypatch):
+        monkeypatch.setattr(skills_sync, "SKILLS_RESCAN_SECS", 3600)
+        first = skills_manifest(src)
+        (src / "agent-browser" / "SKILL.md").write_text("changed")
+        assert skills_manifest(src) is first
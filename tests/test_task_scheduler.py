@@ -0,0 +1,55 @@
+"""Tests for scheduled task runs re-adopted after a host restart."""
+
+from __future__ import annotations
+
+import pytest
+
+from clawcode.container_runner import ContainerOutput
+from clawcode.db import create_task, get_container_runs, get_task_by_id, register_container_run
+from clawcode.group_queue import GroupQueue
+from clawcode.models import ContainerRun, RegisteredGroup, ScheduledTask
+from clawcode.task_scheduler import SchedulerDependencies, resume_task_run
+
+
+@pytest.mark.asyncio
+async def test_resumed_task_run_is_logged(monkeypatch):
+    create_task(ScheduledTask(
+        id="task-1", group_folder="main", chat_jid="main@g.us",
+        prompt="daily report", schedule_type="interval", schedule_value="3600000",
+        context_mode="isolated", next_run="2024-06-01T00:00:00+00:00", status="active",
+        created_at="2024-01-01T00:00:00+00:00",
+    ))
+    run = ContainerRun(
+        container_name="clawcode-main-1", chat_jid="main@g.us", group_folder="main",
+        started_at="2024-06-01T00:00:00+00:00", task_id="task-1", outputs_delivered=1,
+    )
+    register_container_run(run)
+    adopted: list[tuple[str, int]] = []
+    sent: list[str] = []
+
+    async def adopt(group, container_name, on_process, on_output, skip_results=0):
+        adopted.append((container_name, skip_results))
+        await on_output(ContainerOutput(status="success", result="Report posted"))
+        return ContainerOutput(status="success", result=None)
+
+    async def send_message(jid: str, text: str) -> None:
+        sent.append(text)
+
+    monkeypatch.setattr("clawcode.task_scheduler.adopt_container_agent", adopt)
+    group = RegisteredGroup(name="Main", folder="main", trigger="@bot", added_at="2024-01-01T00:00:00Z")
+    deps = SchedulerDependencies(
+        registered_groups=lambda: {"main@g.us": group},
+        get_sessions=dict,
+        queue=GroupQueue(),
+        on_process=lambda *args: None,
+        send_message=send_message,
+    )
+
+    await resume_task_run(run, deps)
+
+    assert adopted == [("clawcode-main-1", 1)]
+    assert sent == ["Report posted"]
+    assert get_container_runs() == []
+    task = get_task_by_id("task-1")
+    assert task.last_result == "Report posted"
+    assert task.next_run > "2024-06-01T00:00:00+00:00"
@@ -0,0 +1,135 @@
+"""Tests for per-run copy-on-write workspace snapshots."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from clawcode import workspace_snapshot
+from clawcode.workspace_snapshot import (
+    adopt_snapshot,
+    cleanup_snapshots,
+    create_snapshot,
+    release_snapshot,
+)
+
+
+@pytest.fixture
+def workspaces(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace_snapshot, "WORKSPACES_DIR", tmp_path / "workspaces")
+    monkeypatch.setattr(workspace_snapshot, "HARVESTED_DIR", tmp_path / "workspaces" / "harvested")
+    monkeypatch.setattr(workspace_snapshot, "_live", {})
+    return tmp_path / "workspaces"
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    path = tmp_path / "repos" / "octo--hello"
+    path.mkdir(parents=True)
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    (path / "README").write_text("original\n")
+    subprocess.run(["git", "-C", str(path), "add", "README"], check=True)
+    subprocess.run(
+        ["git", "-C", str(path), "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"],
+        check=True,
+    )
+    return path
+
+
+class TestHardlinkSnapshot:
+    @pytest.mark.asyncio
+    async def test_edits_do_not_reach_source(self, workspaces, checkout):
+        snapshot = await create_snapshot(str(checkout), "run-1", mode="hardlink")
+        assert snapshot is not None
+
+        Path(snapshot.path, "README").write_text("edited\n")
+        Path(snapshot.path, "build.out").write_text("artifact")
+
+        assert (checkout / "README").read_text() == "original\n"
+        assert not (checkout / "build.out").exists()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_a_working_repo(self, workspaces, checkout):
+        snapshot = await create_snapshot(str(checkout), "run-1", mode="hardlink")
+        log = subprocess.run(
+            ["git", "-C", snapshot.path, "log", "--oneline"], capture_output=True, text=True, check=True
+        )
+        assert "init" in log.stdout
+        status = subprocess.run(
+            ["git", "-C", snapshot.path, "status", "--porcelain"], capture_output=True, text=True, check=True
+        )
+        assert status.stdout == ""
+
+    @pytest.mark.asyncio
+    async def test_objects_are_hardlinked(self, workspaces, checkout):
+        await create_snapshot(str(checkout), "run-1", mode="hardlink")
+        objects = [p for p in (checkout / ".git" / "objects").rglob("*") if p.is_file()]
+        assert objects
+        assert all(p.stat().st_nlink >= 2 for p in objects)
+
+
+class TestSnapshotLifecycle:
+    @pytest.mark.asyncio
+    async def test_auto_falls_back(self, workspaces, checkout):
+        snapshot = await create_snapshot(str(checkout), "run-1", mode="auto")
+        assert snapshot is not None
+        assert snapshot.mode in workspace_snapshot.AUTO_MODES
+
+    @pytest.mark.asyncio
+    async def test_live_run_id_is_not_reused(self, workspaces, checkout):
+        live = await create_snapshot(str(checkout), "run-1", mode="hardlink")
+        with pytest.raises(ValueError):
+            await create_snapshot(str(checkout), "run-1", mode="hardlink")
+        assert Path(live.path, "README").exists()
+
+    @pytest.mark.asyncio
+    async def test_off_returns_none(self, workspaces, checkout):
+        assert await create_snapshot(str(checkout), "run-1", mode="off") is None
+
+    @pytest.mark.asyncio
+    async def test_release_discards(self, workspaces, checkout):
+        snapshot = await create_snapshot(str(checkout), "run-1", mode="hardlink")
+        assert await release_snapshot(snapshot) is None
+        assert not os.path.exists(snapshot.root)
+        assert (checkout / "README").exists()
+
+    @pytest.mark.asyncio
+    async def test_release_harvests_failed_runs(self, workspaces, checkout, monkeypatch):
+        monkeypatch.setattr(workspace_snapshot, "WORKSPACE_SNAPSHOT_HARVEST", "error")
+        snapshot = await create_snapshot(str(checkout), "run-1", mode="hardlink")
+        harvested = await release_snapshot(snapshot, failed=True)
+        assert harvested is not None
+        assert os.path.exists(os.path.join(harvested, "repo", "README"))
+
+    @pytest.mark.asyncio
+    async def test_cleanup_removes_only_stale_snapshots(self, workspaces, checkout):
+        live = await create_snapshot(str(checkout), "run-live", mode="hardlink")
+        stale = workspaces / "run-crashed"
+        (stale / "repo").mkdir(parents=True)
+        os.utime(stale, (0, 0))
+        slot = workspaces / "pool-clawcode-octo--hello-1"  # Claimed warm container, long run
+        (slot / "repo").mkdir(parents=True)
+        os.utime(slot, (0, 0))
+
+        await cleanup_snapshots(max_idle_ms=1000)
+
+        assert not stale.exists()
+        assert os.path.exists(live.path)
+        assert slot.exists()
+
+    @pytest.mark.asyncio
+    async def test_adopted_snapshot_survives_cleanup_until_released(self, workspaces, checkout):
+        root = workspaces / "run-adopted"
+        (root / "repo").mkdir(parents=True)
+        os.utime(root, (0, 0))
+
+        snapshot = adopt_snapshot(str(root))
+        await cleanup_snapshots(max_idle_ms=1000)
+        assert root.exists()
+
+        await release_snapshot(snapshot)
+        assert not root.exists()
+        assert adopt_snapshot(str(root)) is None